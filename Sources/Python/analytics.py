@@ -0,0 +1,378 @@
+from geo import Gazetteer, get_gazetteer, normalize_address
+from listing_store import ListingStore
+from typing import Iterable
+from utils import Any, Optional
+import apartments as aparts
+import numpy as np
+import time
+
+
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90)
+DAY = 24 * 60 * 60
+
+
+def group_percentiles(keys: np.ndarray,
+                      values: np.ndarray,
+                      percentiles: Iterable[float] = DEFAULT_PERCENTILES) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Computes percentiles of the values of every group at once: values are sorted by group and value,
+    so percentiles of all groups are read from the sorted array with linear interpolation, as `np.percentile` does.
+    NaN values are skipped.
+
+    :param keys: integer key of the group of every value.
+    :param values: values as floats.
+    :param percentiles: percentiles from 0 to 100.
+    :return: tuple of the sorted keys of the groups, amounts of values in the groups
+    and the matrix of percentiles where every row is a group.
+    """
+    percentiles = tuple(percentiles)
+    has_value = ~np.isnan(values)
+    keys, values = keys[has_value], values[has_value]
+    order = np.lexsort((values, keys))
+    keys, values = keys[order], values[order]
+    unique_keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    if not len(unique_keys):
+        return unique_keys, counts, np.empty((0, len(percentiles)))
+
+    positions = starts[:, None] + (counts[:, None] - 1) * np.asarray(percentiles, dtype=np.float64) / 100
+    lower = np.floor(positions).astype(np.int64)
+    upper = np.ceil(positions).astype(np.int64)
+    fraction = positions - lower
+    return unique_keys, counts, values[lower] * (1 - fraction) + values[upper] * fraction
+
+
+def _make_table(names: list[Any],
+                counts: np.ndarray,
+                matrix: np.ndarray,
+                percentiles: Iterable[float]) -> dict[Any, dict[str, float]]:
+    """
+    Private method which represents percentiles of the groups as a dictionary, e.g. {1: {"count": 10, "p50": 30000.0}}.
+    """
+    columns = [f"p{percentile:g}" for percentile in percentiles]
+    return {
+        name: {"count": int(count), **dict(zip(columns, row.tolist()))}
+        for name, count, row in zip(names, counts, matrix)
+    }
+
+
+class MarketSnapshot:
+    """
+    Summary of the market over many apartments, e.g. of a single crawl or of the listing store.
+    Every property of the apartments is kept in a NumPy array, so all statistics are computed
+    with sorting and group-by over the arrays. Missing prices and areas are NaN,
+    missing amount of rooms and unknown districts are -1.
+    """
+    prices: np.ndarray
+    rooms: np.ndarray
+    areas: np.ndarray
+    districts: np.ndarray
+    district_names: list[str]
+
+    def __init__(self,
+                 prices: Iterable[Optional[float]],
+                 rooms: Iterable[Optional[int]],
+                 areas: Iterable[Optional[float]],
+                 districts: Iterable[Optional[str]]):
+        """
+        :param prices: prices of the apartments.
+        :param rooms: amounts of rooms, where 0 is a studio.
+        :param areas: areas in square meters.
+        :param districts: names of the districts.
+        """
+        self.prices = np.array([np.nan if price is None else price for price in prices], dtype=np.float64)
+        self.rooms = np.array([-1 if count is None else count for count in rooms], dtype=np.int16)
+        self.areas = np.array([np.nan if area is None else area for area in areas], dtype=np.float64)
+        codes: dict[str, int] = dict()
+        self.districts = np.array([-1 if district is None else codes.setdefault(district, len(codes))
+                                   for district in districts], dtype=np.int32)
+        self.district_names = list(codes)
+
+    @classmethod
+    def from_apartments(cls,
+                        apartments: Iterable[aparts.Apartment],
+                        gazetteer: Optional[Gazetteer] = None) -> "MarketSnapshot":
+        """
+        Makes snapshot of the apartments. Amount of rooms and area are parsed from the names,
+        districts are found by the gazetteer.
+
+        :param apartments: apartments or `ApartmentBatch`.
+        :param gazetteer: gazetteer of the city, by default the bundled one is used.
+        :return: `MarketSnapshot` object.
+        """
+        if isinstance(apartments, aparts.ApartmentBatch):
+            names, addresses = apartments.names, apartments.addresses
+            prices = [value if value >= 0 else None for value in apartments.price_values]
+        else:
+            apartments = list(apartments)
+            names = [apartment.name for apartment in apartments]
+            addresses = [apartment.address for apartment in apartments]
+            prices = [apartment.price_value for apartment in apartments]
+
+        return cls(prices, map(aparts.parse_rooms, names), map(aparts.parse_area, names),
+                   _get_districts(addresses, gazetteer or get_gazetteer()))
+
+    @classmethod
+    def from_listing_store(cls, store: ListingStore, gazetteer: Optional[Gazetteer] = None, **conditions) -> "MarketSnapshot":
+        """
+        Makes snapshot of the stored listings.
+
+        :param store: listing store.
+        :param gazetteer: gazetteer of the city, by default the bundled one is used.
+        :param conditions: keyword arguments of `ListingStore.query`.
+        :return: `MarketSnapshot` object.
+        """
+        listings = store.query(**conditions)
+        return cls([listing["price_value"] for listing in listings], [listing["rooms"] for listing in listings],
+                   [aparts.parse_area(listing["name"]) for listing in listings],
+                   _get_districts([listing["address"] for listing in listings], gazetteer or get_gazetteer()))
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def get_price_per_square_meter(self) -> np.ndarray:
+        """
+        Gets price of the square meter of every apartment, NaN if price or area is unknown.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(self.areas > 0, self.prices / self.areas, np.nan)
+
+    def get_percentiles_by_rooms(self,
+                                 percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+                                 per_square_meter: bool = False) -> dict[int, dict[str, float]]:
+        """
+        Gets percentiles of the prices of the apartments with the same amount of rooms.
+        Apartments without amount of rooms are skipped.
+
+        :param percentiles: percentiles from 0 to 100.
+        :param per_square_meter: whether prices of the square meter are used instead of the prices.
+        :return: dictionary where key is an amount of rooms and value is a dictionary with "count" of the prices
+        and percentiles, e.g. "p50".
+        """
+        percentiles = tuple(percentiles)
+        values = self.get_price_per_square_meter() if per_square_meter else self.prices
+        known = self.rooms >= 0
+        keys, counts, matrix = group_percentiles(self.rooms[known].astype(np.int64), values[known], percentiles)
+        return _make_table(keys.tolist(), counts, matrix, percentiles)
+
+    def get_percentiles_by_district(self,
+                                    percentiles: Iterable[float] = DEFAULT_PERCENTILES,
+                                    per_square_meter: bool = False) -> dict[str, dict[str, float]]:
+        """
+        Gets percentiles of the prices of the apartments in the same district, see `get_percentiles_by_rooms`.
+        Apartments in unknown districts are skipped.
+
+        :return: dictionary where key is a name of the district.
+        """
+        percentiles = tuple(percentiles)
+        values = self.get_price_per_square_meter() if per_square_meter else self.prices
+        known = self.districts >= 0
+        keys, counts, matrix = group_percentiles(self.districts[known].astype(np.int64), values[known], percentiles)
+        return _make_table([self.district_names[key] for key in keys.tolist()], counts, matrix, percentiles)
+
+    def get_cheap_outliers(self, factor: float = 1.5, min_group_size: int = 5, by_district: bool = False) -> np.ndarray:
+        """
+        Finds unusually cheap offers: price is lower than the first quartile of the apartments with the same amount
+        of rooms by more than `factor` interquartile ranges. Such offers are either bargains or scams.
+
+        :param factor: amount of the interquartile ranges below the first quartile.
+        :param min_group_size: groups with less prices never have outliers.
+        :param by_district: whether apartments are compared only within the same district.
+        :return: boolean array where every value tells whether the apartment is an outlier.
+        """
+        keys = self.rooms.astype(np.int64)
+
+        if by_district:
+            keys = np.where(self.districts >= 0, keys * (len(self.district_names) + 1) + self.districts, -1)
+
+        known = (self.rooms >= 0) & (keys >= 0) & ~np.isnan(self.prices)
+        keys, prices = keys[known], self.prices[known]
+        group_keys, counts, quartiles = group_percentiles(keys, prices, (25, 75))
+        outliers = np.zeros(len(self), dtype=bool)
+
+        if not len(group_keys):
+            return outliers
+
+        groups = np.minimum(np.searchsorted(group_keys, keys), len(group_keys) - 1)
+        lower_bound = quartiles[:, 0] - factor * (quartiles[:, 1] - quartiles[:, 0])
+        is_cheap = (group_keys[groups] == keys) & (prices < lower_bound[groups]) & (counts[groups] >= min_group_size)
+        outliers[np.flatnonzero(known)[is_cheap]] = True
+        return outliers
+
+
+def _get_districts(addresses: list[Optional[str]], gazetteer: Gazetteer) -> list[Optional[str]]:
+    """
+    Private method which finds district of every address as the location filter does: the district written
+    in the address is preferred to the district of the street. Each distinct address is geocoded once.
+    """
+    districts: dict[str, Optional[str]] = dict()
+    result = list()
+
+    for address in addresses:
+        key = normalize_address(address)
+
+        if key not in districts:
+            district = gazetteer.find_district(address) if key else None
+            place = gazetteer.geocode(address) if key and not district else None
+            districts[key] = district.name if district else place.district if place else None
+
+        result.append(districts[key])
+    return result
+
+
+class PriceHistory:
+    """
+    Prices of the listings over time. Observations are sorted by listing and time once,
+    so history of any listing, changes of all listings and trends of the market are read from the sorted arrays.
+    """
+    urls: list[str]
+    listings: np.ndarray
+    times: np.ndarray
+    prices: np.ndarray
+    _codes: dict[str, int]
+    _starts: np.ndarray
+
+    def __init__(self, observations: Iterable[tuple[str, float, Optional[float]]]):
+        """
+        :param observations: tuples of the listing's url, unix timestamp and price.
+        """
+        codes: dict[str, int] = dict()
+        listings, times, prices = list(), list(), list()
+
+        for url, seen_at, price in observations:
+            listings.append(codes.setdefault(url, len(codes)))
+            times.append(seen_at)
+            prices.append(np.nan if price is None else price)
+
+        self.urls = list(codes)
+        listings = np.array(listings, dtype=np.int64)
+        times = np.array(times, dtype=np.float64)
+        order = np.lexsort((times, listings))
+        self.listings, self.times = listings[order], times[order]
+        self.prices = np.array(prices, dtype=np.float64)[order]
+        self._starts = np.searchsorted(self.listings, np.arange(len(self.urls) + 1))
+        self._codes = codes
+
+    @classmethod
+    def from_listing_store(cls, store: ListingStore, since: Optional[float] = None) -> "PriceHistory":
+        """
+        Makes history of all prices of the stored listings.
+
+        :param since: unix timestamp, prices which were seen before it are skipped.
+        """
+        return cls(store.get_all_price_history(since))
+
+    @classmethod
+    def from_crawls(cls, crawls: Iterable[tuple[float, Iterable[aparts.Apartment]]]) -> "PriceHistory":
+        """
+        Makes history from the results of several crawls.
+
+        :param crawls: tuples of unix timestamp of the crawl and its apartments.
+        """
+        return cls((apartment.url, seen_at, apartment.price_value)
+                   for seen_at, apartments in crawls for apartment in apartments if apartment.url)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    def get_listing(self, url: str) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Gets prices of the listing over time.
+
+        :return: tuple of timestamps and prices in the order of time, both are empty if listing is unknown.
+        """
+        code = self._codes.get(url)
+
+        if code is None:
+            return np.empty(0), np.empty(0)
+
+        start, end = self._starts[code], self._starts[code + 1]
+        return self.times[start:end], self.prices[start:end]
+
+    def get_changes(self) -> dict[str, np.ndarray]:
+        """
+        Gets first and last price of every listing.
+
+        :return: dictionary of arrays in the order of `urls`: "first_price", "last_price", "change",
+        which is relative change of the price, and "observations", which is an amount of prices.
+        """
+        starts, ends = self._starts[:-1], self._starts[1:] - 1
+        first, last = self.prices[starts], self.prices[ends]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            change = np.where(first > 0, (last - first) / first, np.nan)
+
+        return {"first_price": first, "last_price": last, "change": change, "observations": ends - starts + 1}
+
+    def get_price_over_time(self,
+                            bucket: float = DAY,
+                            percentiles: Iterable[float] = (50,)) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Gets percentiles of the observed prices in every period of time.
+
+        :param bucket: length of the period in seconds, by default a day.
+        :param percentiles: percentiles from 0 to 100.
+        :return: tuple of the periods' starts as unix timestamps, amounts of prices and the matrix of percentiles
+        where every row is a period.
+        """
+        periods = np.floor(self.times / bucket).astype(np.int64)
+        keys, counts, matrix = group_percentiles(periods, self.prices, percentiles)
+        return keys * bucket, counts, matrix
+
+    def get_rolling_trend(self, window: int = 7, bucket: float = DAY) -> dict[str, np.ndarray]:
+        """
+        Gets trend of the median price: medians of the periods are averaged over the rolling window
+        and slope of the prices within the window is computed with least squares. Periods without prices are skipped.
+
+        :param window: amount of the periods in the window.
+        :param bucket: length of the period in seconds, by default a day.
+        :return: dictionary of arrays, where every value is a period: "time" is a start of the period,
+        "median" is a median price of the period, "rolling" is an average of the medians within the window
+        and "slope" is a change of the price per period within the window.
+        """
+        starts, _, medians = self.get_price_over_time(bucket)
+        medians = medians[:, 0] if len(medians) else np.empty(0)
+
+        if not len(starts):
+            return {"time": starts, "median": medians, "rolling": medians, "slope": medians}
+
+        periods = np.round((starts - starts[0]) / bucket).astype(np.int64)
+        x = np.zeros(periods[-1] + 1)
+        y = np.zeros(periods[-1] + 1)
+        counts = np.zeros(periods[-1] + 1)
+        x[periods], y[periods], counts[periods] = periods, medians, 1
+        sums = {name: _rolling_sum(values, window) for name, values in
+                (("n", counts), ("x", x), ("y", y), ("xx", x * x), ("xy", x * y))}
+        n, sx, sy, sxx, sxy = (sums[name][periods] for name in ("n", "x", "y", "xx", "xy"))
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rolling = sy / n
+            slope = np.where(n > 1, (n * sxy - sx * sy) / (n * sxx - sx * sx), np.nan)
+
+        return {"time": starts, "median": medians, "rolling": rolling, "slope": slope}
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Private method which sums every value with the previous `window - 1` values.
+    """
+    sums = np.cumsum(values)
+    sums[window:] = sums[window:] - sums[:-window]
+    return sums
+
+
+if __name__ == "__main__":
+    from listing_store import get_listing_store
+
+    start = time.perf_counter()
+    snapshot = MarketSnapshot.from_listing_store(get_listing_store())
+    print(f"Listings: {len(snapshot)}")
+
+    for rooms_count, row in snapshot.get_percentiles_by_rooms().items():
+        print(f"{rooms_count} rooms: {row}")
+
+    for district, row in snapshot.get_percentiles_by_district().items():
+        print(f"{district}: {row}")
+
+    print(f"Cheap outliers: {int(snapshot.get_cheap_outliers().sum())}")
+    print(f"Computed in {time.perf_counter() - start:.2f}s")
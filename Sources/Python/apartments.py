@@ -1,7 +1,32 @@
 from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.common.by import By
+from typing import Iterable, Iterator
 from utils import Logger, Optional, Any
+from waits import Timeouts, probe
+from urllib.parse import urlencode
+from array import array
 import enum
+import re
+import sys
+
+
+_BATCH_EXTRACTION_SCRIPT = """
+const [cards, fields] = arguments;
+return cards.map(card => {
+    const result = {};
+    for (const [key, className, attribute] of fields) {
+        const element = card.getElementsByClassName(className)[0];
+        if (!element) {
+            result[key] = null;
+        } else if (attribute) {
+            result[key] = attribute in element ? element[attribute] : element.getAttribute(attribute);
+        } else {
+            result[key] = element.innerText.trim();
+        }
+    }
+    return result;
+});
+"""
 
 
 class ApartmentsSite(enum.Enum):
@@ -50,6 +75,21 @@ class ApartmentsSite(enum.Enum):
             case self.avito:
                 return 'geo-address-QTv9k'
 
+    def get_apartments_fields(self) -> list[tuple[str, str, Optional[str]]]:
+        """
+        Gets all fields of the apartment's announcement which can be extracted at once.
+
+        :return: list of tuples, where the first value is a name of the apartment's property,
+        the second one is a html class of the element and the third one is an attribute to read
+        or None if element's text should be read.
+        """
+        return [
+            ("name", self.get_apartments_name(), "title"),
+            ("url", self.get_apartments_url(), "href"),
+            ("price", self.get_apartments_price(), None),
+            ("address", self.get_apartments_address(), None)
+        ]
+
     def get_list_of_apartments(self) -> str:
         """
         Gets list of all apartments from the single page.
@@ -60,6 +100,103 @@ class ApartmentsSite(enum.Enum):
             case self.avito:
                 return 'iva-item-root-Nj_hb'
 
+    def get_next_page_attribute(self) -> tuple[str, str]:
+        """
+        Gets attribute which marks the link to the next page of the search results.
+
+        :return: tuple of two strings, where the first one is a name of the attribute and the second one is its value.
+        """
+        match self:
+            case self.avito:
+                return "data-marker", "pagination-button/nextPage"
+
+    def get_next_page(self) -> str:
+        """
+        Gets link which leads to the next page of the search results.
+
+        :return: string which represents html xpath of the next page link.
+        """
+        name, value = self.get_next_page_attribute()
+        return f'//*[@{name}="{value}"]'
+
+    def get_search_url(self, price: Optional[range] = None) -> str:
+        """
+        Gets url of the long time renting search results filtered by the given price.
+        Can be used to get search results without configuring filters on the web site.
+
+        :param price: range of prices or None if price should not be filtered.
+        :return: string which represents url of the search results.
+        """
+        match self:
+            case self.avito:
+                url = f"{self.value}/sdam/na_dlitelnyy_srok-ASgBAgICAkSSA8gQ8AeQUg"
+                query = {"pmin": price.start, "pmax": price.stop} if price else {}
+
+        return f"{url}?{urlencode(query)}" if query else url
+
+    def get_newest_first_parameter(self) -> tuple[str, str]:
+        """
+        Gets query parameter of the search url which sorts search results from the newest to the oldest.
+
+        :return: tuple of two strings, where the first one is a name of the parameter and the second one is its value.
+        """
+        match self:
+            case self.avito:
+                return "s", "104"
+
+    def get_timeouts(self) -> Timeouts:
+        """
+        Gets timeouts of waiting for the web site's conditions.
+
+        :return: `Timeouts` object.
+        """
+        match self:
+            case self.avito:
+                return Timeouts(element=10, results=15)
+
+    def get_details_fields(self) -> list[tuple[str, str, str]]:
+        """
+        Gets blocks of the apartment's own page which are read by the details enrichment.
+        "params" block is a list of "name: value" items, e.g. area and floor, "description" is a free text.
+
+        :return: list of tuples, where the first value is a name of the block,
+        the second one is a name of the html attribute which marks the block and the third one is its value.
+        """
+        match self:
+            case self.avito:
+                return [
+                    ("params", "data-marker", "item-view/item-params"),
+                    ("description", "data-marker", "item-view/item-description")
+                ]
+
+    def get_requests_per_second(self) -> float:
+        """
+        Gets maximum rate of requests to the web site's host, which doesn't trigger its rate limiting.
+
+        :return: amount of requests per second.
+        """
+        match self:
+            case self.avito:
+                return 2.0
+
+    def get_blocked_urls(self) -> list[str]:
+        """
+        Gets resources of the web site which are not needed for parsing and are blocked in the browser,
+        e.g. images, fonts, media, ads and trackers.
+
+        :return: list of url patterns, where "*" matches any amount of characters.
+        """
+        match self:
+            case self.avito:
+                return [
+                    "*.jpg", "*.jpeg", "*.png", "*.gif", "*.webp", "*.avif", "*.svg", "*.ico",
+                    "*.woff", "*.woff2", "*.ttf", "*.otf",
+                    "*.mp4", "*.webm",
+                    "*mc.yandex.ru*", "*an.yandex.ru*", "*yandex.ru/ads*", "*adfox*",
+                    "*googletagmanager.com*", "*google-analytics.com*", "*doubleclick.net*",
+                    "*top-fwz1.mail.ru*", "*vk.com/rtrg*"
+                ]
+
     def get_category(self) -> str:
         """
         Gets category on the web site which represents long time renting.
@@ -115,26 +252,124 @@ class ApartmentsSite(enum.Enum):
                 return '//*[@id="app"]/div[3]/div[3]/div[1]/div/div[2]/div[2]/div/button[1]'
 
 
+def parse_rooms(name: Optional[str]) -> Optional[int]:
+    """
+    Parses amount of rooms from the apartment's *name*, e.g. "2-к. квартира, 54 м², 3/9 эт.".
+
+    :param name: name of the apartment.
+    :return: amount of rooms, where 0 is a studio, or None if amount can't be parsed.
+    """
+    if not name:
+        return None
+
+    if "студи" in name.lower():
+        return 0
+
+    found = re.search(r"(\d+)-к", name)
+    return int(found.group(1)) if found else None
+
+
+def parse_area(name: Optional[str]) -> Optional[float]:
+    """
+    Parses total area of the apartment from its *name*, e.g. "2-к. квартира, 54,5 м², 3/9 эт.".
+
+    :param name: name of the apartment.
+    :return: area in square meters or None if area can't be parsed.
+    """
+    if not name:
+        return None
+
+    found = re.search(r"(\d+(?:[.,]\d+)?)\s*м(?:²|2)", name)
+    return float(found.group(1).replace(",", ".")) if found else None
+
+
+_CURRENCIES = {"₽": "RUB", "руб": "RUB", "$": "USD", "€": "EUR"}
+_PERIODS = {"месяц": "month", "мес": "month", "сутки": "day", "сут": "day", "недел": "week"}
+
+
+def parse_price(text: Optional[str]) -> tuple[Optional[int], Optional[str], Optional[str]]:
+    """
+    Parses price's display text, e.g. "25 000 ₽ в месяц".
+
+    :param text: price as it is shown on the web site.
+    :return: tuple of the price as an integer, ISO code of the currency and the period of payment
+    ("month", "week" or "day"). Values which can't be parsed are None.
+    """
+    if not text:
+        return None, None, None
+
+    digits = re.search(r"\d[\d\s\u00a0\u202f]*", text)
+    value = int(re.sub(r"\D", "", digits.group())) if digits else None
+    lowered = text.lower()
+    currency = next((code for symbol, code in _CURRENCIES.items() if symbol in lowered), None)
+    period = next((name for word, name in _PERIODS.items() if word in lowered), None)
+    return value, currency, period
+
+
 class Apartment:
     """
     Model which represents apartment's info.
+    Model doesn't keep the web element it was parsed from, so it can outlive the page.
     """
-    _web_element: WebElement = None
-    _site: ApartmentsSite = None
-    _logger: Optional[Logger] = None
-
-    name: Optional[str] = None
-    url: Optional[str] = None
-    price: Optional[float] = None
-    additional_info: Optional[str] = None
-    address: Optional[str] = None
-
-    def __init__(self, element: WebElement, site: ApartmentsSite, logger: Optional[Logger] = None):
-        self._web_element = element
+    __slots__ = ("_site", "name", "url", "price", "price_value", "currency", "period", "additional_info", "address",
+                 "alternate_urls")
+
+    _site: ApartmentsSite
+    name: Optional[str]
+    url: Optional[str]
+    price: Optional[str]
+    price_value: Optional[int]
+    currency: Optional[str]
+    period: Optional[str]
+    additional_info: Optional[str]
+    address: Optional[str]
+    alternate_urls: list[str]
+
+    def __init__(self, element: Optional[WebElement], site: ApartmentsSite, logger: Optional[Logger] = None):
         self._site = site
-        self._logger = logger
+        self.name = None
+        self.url = None
+        self.additional_info = None
+        self.address = None
+        self.alternate_urls = list()
+        self.set_price(None)
 
-        self.parse_element()
+        if element is not None:
+            self.parse_element(element, logger)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Optional[Any]], site: ApartmentsSite) -> "Apartment":
+        """
+        Makes apartment from already extracted values without touching the web.
+
+        :param data: dictionary in the same format as `as_dict` returns.
+        :param site: site from which the apartment was extracted.
+        :return: `Apartment` object.
+        """
+        apartment = cls(None, site)
+        apartment.name = data.get("name")
+        apartment.url = data.get("url")
+        apartment.set_price(data.get("price"))
+        apartment.additional_info = data.get("additional_info")
+        apartment.address = data.get("address")
+        apartment.alternate_urls = list(data.get("alternate_urls") or [])
+        return apartment
+
+    @classmethod
+    def extract_all(cls, web_driver, elements: list[WebElement], site: ApartmentsSite) -> list["Apartment"]:
+        """
+        Extracts all apartments from the given elements in a single web driver's round trip.
+
+        :param web_driver: web driver which owns the elements.
+        :param elements: list of web elements. Each element represents an apartment.
+        :param site: site from which apartments are extracted.
+        :return: list of apartments in the same order as elements.
+        """
+        if not elements:
+            return []
+
+        list_of_data = web_driver.execute_script(_BATCH_EXTRACTION_SCRIPT, elements, site.get_apartments_fields())
+        return [cls.from_dict(data, site) for data in list_of_data]
 
     def __repr__(self):
         return '{\n' \
@@ -145,6 +380,18 @@ class Apartment:
                 f'\t"address": {self.address}\n' \
                '}'
 
+    def get_site(self) -> ApartmentsSite:
+        return self._site
+
+    def set_price(self, price: Optional[str]):
+        """
+        Assigns price's display text and its parsed values.
+
+        :param price: price as it is shown on the web site.
+        """
+        self.price = price
+        self.price_value, self.currency, self.period = parse_price(price)
+
     def as_dict(self) -> dict[str, Optional[Any]]:
         """
         Represents current model as a dictionary.
@@ -155,63 +402,178 @@ class Apartment:
             "name": self.name,
             "url": self.url,
             "price": self.price,
+            "price_value": self.price_value,
+            "currency": self.currency,
+            "period": self.period,
             "additional_info": self.additional_info,
-            "address": self.address
+            "address": self.address,
+            "alternate_urls": list(self.alternate_urls)
         }
 
-    def parse_element(self):
+    def parse_element(self, element: WebElement, logger: Optional[Logger] = None):
         """
         Parses needed info about apartment from the web site and assigns it to the properties.
+
+        :param element: web element which represents the apartment. It isn't kept after parsing.
+        :param logger: optional logger of the parsing errors.
         """
-        self._parse_name()
-        self._parse_url()
-        self._parse_price()
-        self._parse_address()
+        self._parse_name(element, logger)
+        self._parse_url(element, logger)
+        self._parse_price(element, logger)
+        self._parse_address(element, logger)
 
-    def _parse_name(self):
+    def _parse_name(self, element: WebElement, logger: Optional[Logger]):
         """
-        Parsed *name* of the apartments from the web. If the error was thrown it is logged by the logger and nothing assigns.
+        Parsed *name* of the apartments from the web without waiting for it.
+        If the element is missing nothing assigns. If the error was thrown it is logged by the logger and nothing assigns.
         """
         try:
-            element = self._web_element.find_element(By.CLASS_NAME, self._site.get_apartments_name())
-            self.name = element.get_attribute("title")
+            name_element = probe(element, By.CLASS_NAME, self._site.get_apartments_name())
+
+            if name_element is not None:
+                self.name = name_element.get_attribute("title")
         except Exception as e:
-            self._throw_error(e)
+            self._throw_error(e, logger)
 
-    def _parse_url(self):
+    def _parse_url(self, element: WebElement, logger: Optional[Logger]):
         """
-        Parsed *url* of the apartments from the web. If the error was thrown it is logged by the logger and nothing assigns.
+        Parsed *url* of the apartments from the web without waiting for it.
+        If the element is missing nothing assigns. If the error was thrown it is logged by the logger and nothing assigns.
         """
         try:
-            element = self._web_element.find_element(By.CLASS_NAME, self._site.get_apartments_url())
-            self.url = element.get_attribute("href")
+            url_element = probe(element, By.CLASS_NAME, self._site.get_apartments_url())
+
+            if url_element is not None:
+                self.url = url_element.get_attribute("href")
         except Exception as e:
-            self._throw_error(e)
+            self._throw_error(e, logger)
 
-    def _parse_price(self):
+    def _parse_price(self, element: WebElement, logger: Optional[Logger]):
         """
-        Parsed *price* of the apartments from the web. If the error was thrown it is logged by the logger and nothing assigns.
+        Parsed *price* of the apartments from the web without waiting for it.
+        If the element is missing nothing assigns. If the error was thrown it is logged by the logger and nothing assigns.
         """
         try:
-            element = self._web_element.find_element(By.CLASS_NAME, self._site.get_apartments_price())
-            self.price = element.text
+            price_element = probe(element, By.CLASS_NAME, self._site.get_apartments_price())
+
+            if price_element is not None:
+                self.set_price(price_element.text)
         except Exception as e:
-            self._throw_error(e)
+            self._throw_error(e, logger)
 
-    def _parse_address(self):
+    def _parse_address(self, element: WebElement, logger: Optional[Logger]):
         """
-        Parsed *address* of th apartments from the web. If the error was thrown it is logged by the logger and nothing assigns.
+        Parsed *address* of th apartments from the web without waiting for it.
+        If the element is missing nothing assigns. If the error was thrown it is logged by the logger and nothing assigns.
         """
         try:
-            element = self._web_element.find_element(By.CLASS_NAME, self._site.get_apartments_address())
-            self.address = element.text
+            address_element = probe(element, By.CLASS_NAME, self._site.get_apartments_address())
+
+            if address_element is not None:
+                self.address = address_element.text
         except Exception as e:
-            self._throw_error(e)
+            self._throw_error(e, logger)
 
-    def _throw_error(self, e: Exception):
+    @staticmethod
+    def _throw_error(e: Exception, logger: Optional[Logger]):
         """
         If logger is not None logs the exception.
         :param e: Exception which should be logged
+        :param logger: optional logger.
+        """
+        if logger:
+            logger.out(f"Error was throws: {e}")
+
+
+class ApartmentBatch:
+    """
+    Compact storage of many apartments of the same site where every property is kept in its own array.
+    Prices are kept as 64-bit integers, missing prices are represented by -1.
+    Apartments without alternate urls are represented by None instead of an empty list.
+    Apartments are made on access, so only the batch itself is kept in memory.
+    """
+    __slots__ = ("_site", "names", "urls", "prices", "price_values", "currencies", "periods",
+                 "additional_infos", "addresses", "alternate_urls")
+
+    _site: ApartmentsSite
+    names: list[Optional[str]]
+    urls: list[Optional[str]]
+    prices: list[Optional[str]]
+    price_values: array
+    currencies: list[Optional[str]]
+    periods: list[Optional[str]]
+    additional_infos: list[Optional[str]]
+    addresses: list[Optional[str]]
+    alternate_urls: list[Optional[list[str]]]
+
+    def __init__(self, site: ApartmentsSite, apartments: Iterable[Apartment] = ()):
+        self._site = site
+        self.names = list()
+        self.urls = list()
+        self.prices = list()
+        self.price_values = array("q")
+        self.currencies = list()
+        self.periods = list()
+        self.additional_infos = list()
+        self.addresses = list()
+        self.alternate_urls = list()
+        self.extend(apartments)
+
+    def __len__(self) -> int:
+        return len(self.urls)
+
+    def __getitem__(self, index: int) -> Apartment:
+        apartment = Apartment(None, self._site)
+        apartment.name = self.names[index]
+        apartment.url = self.urls[index]
+        apartment.price = self.prices[index]
+        apartment.price_value = self.price_values[index] if self.price_values[index] >= 0 else None
+        apartment.currency = self.currencies[index]
+        apartment.period = self.periods[index]
+        apartment.additional_info = self.additional_infos[index]
+        apartment.address = self.addresses[index]
+        apartment.alternate_urls = list(self.alternate_urls[index] or ())
+        return apartment
+
+    def __iter__(self) -> Iterator[Apartment]:
+        return (self[index] for index in range(len(self)))
+
+    def get_site(self) -> ApartmentsSite:
+        return self._site
+
+    def append(self, apartment: Apartment):
+        """
+        Copies apartment's properties into the batch. Repeated short values are interned.
+
+        :param apartment: apartment of the batch's site.
+        """
+        self.names.append(apartment.name)
+        self.urls.append(apartment.url)
+        self.prices.append(apartment.price)
+        self.price_values.append(apartment.price_value if apartment.price_value is not None else -1)
+        self.currencies.append(_intern(apartment.currency))
+        self.periods.append(_intern(apartment.period))
+        self.additional_infos.append(apartment.additional_info)
+        self.addresses.append(_intern(apartment.address))
+        self.alternate_urls.append(list(apartment.alternate_urls) if apartment.alternate_urls else None)
+
+    def extend(self, apartments: Iterable[Apartment]):
+        """
+        Copies properties of all apartments into the batch. Apartments can be consumed lazily, e.g. from a parser.
+
+        :param apartments: iterable of the apartments.
+        """
+        for apartment in apartments:
+            self.append(apartment)
+
+    def as_dicts(self) -> list[dict[str, Optional[Any]]]:
         """
-        if self._logger:
-            self._logger.out(f"Error was throws: {e}")
+        Represents all apartments as dictionaries.
+
+        :return: list of dictionaries in the same format as `Apartment.as_dict` returns.
+        """
+        return [apartment.as_dict() for apartment in self]
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
@@ -0,0 +1,252 @@
+from concurrent.futures import ProcessPoolExecutor
+from page_parser import PageParser
+from typing import Iterable
+from utils import Any, Optional, get_process_context
+import apartments as aparts
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+
+class ArchivedPage:
+    """
+    Metadata of the search results page which was saved into the archive.
+    """
+    digest: str
+    url: Optional[str]
+    site: aparts.ApartmentsSite
+    configuration_key: Optional[str]
+    page: int
+    captured_at: float
+
+    def __init__(self,
+                 digest: str,
+                 url: Optional[str],
+                 site: aparts.ApartmentsSite,
+                 configuration_key: Optional[str],
+                 page: int,
+                 captured_at: float):
+        self.digest = digest
+        self.url = url
+        self.site = site
+        self.configuration_key = configuration_key
+        self.page = page
+        self.captured_at = captured_at
+
+    def __repr__(self):
+        return f"ArchivedPage({self.site.name}, {self.page}, {self.url}, {self.digest[:12]})"
+
+    def as_dict(self) -> dict[str, Optional[Any]]:
+        return {
+            "digest": self.digest,
+            "url": self.url,
+            "site": self.site.name,
+            "configuration": self.configuration_key,
+            "page": self.page,
+            "captured_at": self.captured_at
+        }
+
+
+class PageArchive:
+    """
+    Archive of the search results pages on the local disk, so they can be parsed again without the web site,
+    e.g. after a selector of `ApartmentsSite` was fixed.
+    Html of every page is compressed with gzip and saved under its SHA-256 digest, so the same page is stored once.
+    Metadata of every capture is kept in the SQLite index of the archive.
+    """
+    directory: str
+    _connection: sqlite3.Connection
+    _lock: threading.Lock
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self._connection = sqlite3.connect(os.path.join(directory, "index.sqlite3"), timeout=5,
+                                           check_same_thread=False)
+        self._lock = threading.Lock()
+
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode = WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "digest TEXT NOT NULL, url TEXT, site TEXT NOT NULL, configuration TEXT, page INTEGER NOT NULL, "
+                "captured_at REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS pages_captured_at ON pages (captured_at)")
+
+    def get_path(self, digest: str) -> str:
+        """
+        Gets path of the compressed html with the given digest.
+        """
+        return os.path.join(self.directory, "objects", digest[:2], digest[2:] + ".html.gz")
+
+    def save(self,
+             html: str,
+             site: aparts.ApartmentsSite,
+             url: Optional[str] = None,
+             configuration_key: Optional[str] = None,
+             page: int = 1,
+             captured_at: Optional[float] = None) -> str:
+        """
+        Saves html of the page. Already archived html isn't written again, only its capture is recorded.
+
+        :param html: html source of the page.
+        :param site: site from which the page was loaded.
+        :param url: url of the page.
+        :param configuration_key: key of the config which was applied, see `Configurations.get_key`.
+        :param page: number of the page in the search results starting from 1.
+        :param captured_at: unix timestamp of the capture, by default current time.
+        :return: digest of the html.
+        """
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.get_path(digest)
+
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            descriptor, temporary_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(gzip.compress(data, compresslevel=6))
+
+            os.replace(temporary_path, path)
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT INTO pages (digest, url, site, configuration, page, captured_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (digest, url, site.name, configuration_key, page, captured_at or time.time())
+            )
+        return digest
+
+    def load(self, digest: str) -> str:
+        """
+        Loads html of the archived page.
+
+        :param digest: digest which `save` returned.
+        :return: html source of the page.
+        """
+        return _read_html(self.get_path(digest))
+
+    def get_pages(self,
+                  since: Optional[float] = None,
+                  until: Optional[float] = None,
+                  site: Optional[aparts.ApartmentsSite] = None,
+                  configuration_key: Optional[str] = None) -> list[ArchivedPage]:
+        """
+        Gets captures which match all given conditions in the order they were captured.
+
+        :param since: unix timestamp, captures made before it are skipped.
+        :param until: unix timestamp, captures made after it are skipped.
+        :param site: site of the pages.
+        :param configuration_key: key of the config.
+        :return: list of captures.
+        """
+        conditions = list()
+        parameters = list()
+
+        for condition, value in (("captured_at >= ?", since), ("captured_at <= ?", until),
+                                 ("site = ?", site.name if site else None), ("configuration = ?", configuration_key)):
+            if value is not None:
+                conditions.append(condition)
+                parameters.append(value)
+
+        statement = "SELECT digest, url, site, configuration, page, captured_at FROM pages"
+
+        if conditions:
+            statement += " WHERE " + " AND ".join(conditions)
+
+        with self._lock:
+            rows = self._connection.execute(statement + " ORDER BY captured_at, rowid", parameters).fetchall()
+
+        return [ArchivedPage(digest, url, aparts.ApartmentsSite[site_name], configuration, page, captured_at)
+                for digest, url, site_name, configuration, page, captured_at in rows]
+
+    def replay(self,
+               pages: Optional[Iterable[ArchivedPage]] = None,
+               max_workers: Optional[int] = None) -> list[list[aparts.Apartment]]:
+        """
+        Parses archived pages again with the current selectors of the sites, without a browser.
+        Pages are parsed at the same time over the pool of worker processes, every distinct html is parsed once.
+
+        :param pages: captures to parse, by default all of them.
+        :param max_workers: maximum amount of worker processes, by default amount of CPUs.
+        If it is 1 pages are parsed in the current process.
+        :return: list of apartments of every capture in the same order.
+        """
+        pages = self.get_pages() if pages is None else list(pages)
+        tasks = list({(page.digest, page.site.name): (self.get_path(page.digest), page.site.name, page.url)
+                      for page in pages}.items())
+        workers = min(max_workers or os.cpu_count() or 1, len(tasks))
+
+        if workers <= 1:
+            results = [_parse_archived_page(*arguments) for _, arguments in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_process_context()) as executor:
+                chunk_size = max(1, len(tasks) // (workers * 4))
+                results = list(executor.map(_parse_archived_page, *zip(*[arguments for _, arguments in tasks]),
+                                            chunksize=chunk_size))
+
+        list_of_data = {key: result for (key, _), result in zip(tasks, results)}
+        return [[aparts.Apartment.from_dict(data, page.site) for data in list_of_data[(page.digest, page.site.name)]]
+                for page in pages]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT count(*) FROM pages").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+def _read_html(path: str) -> str:
+    with gzip.open(path, "rb") as file:
+        return file.read().decode("utf-8")
+
+
+def _parse_archived_page(path: str, site_name: str, url: Optional[str]) -> list[dict[str, Optional[Any]]]:
+    """
+    Private method which parses the archived page. It is run in the worker process.
+    """
+    return PageParser.parse(_read_html(path), aparts.ApartmentsSite[site_name], url)[0]
+
+
+archive_variable = "APARTS_FINDER_ARCHIVE"
+_page_archive: Optional[PageArchive] = None
+
+
+def get_page_archive() -> Optional[PageArchive]:
+    """
+    Gets archive of the pages shared by all parsers of the process.
+    Pages are archived only when `APARTS_FINDER_ARCHIVE` environment variable is a path of the archive's directory.
+
+    :return: `PageArchive` object or None if archiving is disabled.
+    """
+    global _page_archive
+
+    path = os.environ.get(archive_variable)
+
+    if not path:
+        return None
+
+    if _page_archive is None or _page_archive.directory != path:
+        _page_archive = PageArchive(path)
+    return _page_archive
+
+
+if __name__ == "__main__":
+    archive = PageArchive(sys.argv[1])
+    since = float(sys.argv[2]) if len(sys.argv) > 2 else None
+    archived_pages = archive.get_pages(since=since)
+    start = time.perf_counter()
+
+    for archived_page, list_of_apartments in zip(archived_pages, archive.replay(archived_pages)):
+        for apartment in list_of_apartments:
+            print(json.dumps({**apartment.as_dict(), "page": archived_page.as_dict()}, ensure_ascii=False))
+
+    print(f"Replayed {len(archived_pages)} pages in {time.perf_counter() - start:.2f}s", file=sys.stderr)
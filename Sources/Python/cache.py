@@ -0,0 +1,220 @@
+from typing import Callable
+from utils import Delegate, Optional
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+def get_default_cache_path(file_name: str) -> str:
+    """
+    Gets path of the cache file in the user's cache directory. Directory can be changed by
+    the `APARTS_FINDER_CACHE` environment variable.
+
+    :param file_name: name of the cache file.
+    :return: path as a string.
+    """
+    directory = os.environ.get("APARTS_FINDER_CACHE") or os.path.join(os.path.expanduser("~"), ".cache", "aparts_finder")
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, file_name)
+
+
+class ResultCache:
+    """
+    Cache of the requests' results stored in the local SQLite file.
+    Results are fresh for `ttl` seconds, after that they are served for `stale_ttl` seconds more,
+    while they are refreshed one by one by the background daemon thread, so a refresh never keeps the process alive.
+    Least recently used results are evicted when there are more than `max_entries` of them.
+    """
+    _stop = object()
+
+    _ttl: float
+    _stale_ttl: float
+    _max_entries: int
+    _delegate: Optional[Delegate]
+    _connection: sqlite3.Connection
+    _lock: threading.Lock
+    _refreshing: set[str]
+    _refreshes: queue.Queue
+    _thread: Optional[threading.Thread]
+    hits: int
+    misses: int
+
+    def __init__(self,
+                 path: str,
+                 ttl: float = 5 * 60,
+                 stale_ttl: float = 30 * 60,
+                 max_entries: int = 256,
+                 delegate: Optional[Delegate] = None):
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._max_entries = max_entries
+        self._delegate = delegate
+        self._connection = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refreshes = queue.Queue()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS results_accessed_at ON results (accessed_at)")
+
+    def set_delegate(self, delegate: Optional[Delegate]):
+        self._delegate = delegate
+
+    def get(self, key: str) -> Optional[tuple[str, bool]]:
+        """
+        Gets cached result. Expired results are removed.
+
+        :param key: key of the result.
+        :return: tuple of the result and flag whether it is stale, or None if there is no result.
+        """
+        now = time.time()
+
+        with self._lock, self._connection:
+            row = self._connection.execute("SELECT value, created_at FROM results WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                return None
+
+            value, created_at = row
+            age = now - created_at
+
+            if age >= self._ttl + self._stale_ttl:
+                self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+
+            self._connection.execute("UPDATE results SET accessed_at = ? WHERE key = ?", (now, key))
+            return value, age >= self._ttl
+
+    def put(self, key: str, value: str):
+        """
+        Caches result and evicts least recently used results if there are too many of them.
+
+        :param key: key of the result.
+        :param value: result.
+        """
+        now = time.time()
+
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO results (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            self._connection.execute(
+                "DELETE FROM results WHERE key IN "
+                "(SELECT key FROM results ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self._max_entries,)
+            )
+
+    def remove(self, key: str):
+        """
+        Removes cached result, e.g. when it turned out to be wrong.
+        """
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM results WHERE key = ?", (key,))
+
+    def get_or_compute(self,
+                       key: str,
+                       compute: Callable[[], Optional[str]],
+                       should_cache: Optional[Callable[[str], bool]] = None) -> Optional[str]:
+        """
+        Gets cached result or computes it. Stale result is returned immediately and refreshed in the background.
+        Results which are computed as None are not cached.
+
+        :param key: key of the result.
+        :param compute: function which makes the result.
+        :param should_cache: function which tells whether the computed result can be cached,
+        e.g. empty results of a crawl which silently failed are returned, but not cached.
+        :return: result.
+        """
+        cached = self.get(key)
+
+        if cached is None:
+            self.misses += 1
+
+            if self._delegate:
+                self._delegate.cache_was_missed(key, self.hits, self.misses)
+
+            return self._compute(key, compute, should_cache)
+
+        value, is_stale = cached
+        self.hits += 1
+
+        if self._delegate:
+            self._delegate.cache_was_hit(key, is_stale, self.hits, self.misses)
+
+        if is_stale:
+            self._refresh(key, compute, should_cache)
+        return value
+
+    def wait_for_refreshes(self):
+        """
+        Waits until all background refreshes are finished.
+        """
+        self._refreshes.join()
+
+    def close(self):
+        self.wait_for_refreshes()
+
+        with self._lock:
+            thread, self._thread = self._thread, None
+
+        if thread:
+            self._refreshes.put(self._stop)
+            thread.join()
+
+        self._connection.close()
+
+    def _compute(self,
+                 key: str,
+                 compute: Callable[[], Optional[str]],
+                 should_cache: Optional[Callable[[str], bool]]) -> Optional[str]:
+        value = compute()
+
+        if value is not None and (should_cache is None or should_cache(value)):
+            self.put(key, value)
+        return value
+
+    def _refresh(self, key: str, compute: Callable[[], Optional[str]], should_cache: Optional[Callable[[str], bool]]):
+        """
+        Computes result in the background. Only one refresh of the same key is run at the same time.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return
+
+            self._refreshing.add(key)
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run_refreshes, name="cache-refresh", daemon=True)
+                self._thread.start()
+
+        self._refreshes.put((key, compute, should_cache))
+
+    def _run_refreshes(self):
+        while True:
+            refresh = self._refreshes.get()
+
+            if refresh is self._stop:
+                self._refreshes.task_done()
+                return
+
+            key, compute, should_cache = refresh
+
+            try:
+                self._compute(key, compute, should_cache)
+            except Exception as e:
+                if self._delegate:
+                    self._delegate.error_was_thrown(e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+                self._refreshes.task_done()
@@ -0,0 +1,246 @@
+from array import array
+from typing import Iterable
+from utils import Any, Optional
+import apartments as aparts
+import enum
+import struct
+import sys
+
+
+MAGIC = b"APCF"
+SCHEMA_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHIIHHI")
+_COLUMN = struct.Struct("<IIQ")
+_NONE_INDEX = 0xFFFFFFFF
+_NONE_INTEGER = -(1 << 63)
+_IS_BIG_ENDIAN = sys.byteorder == "big"
+
+
+class ColumnType(enum.IntEnum):
+    """
+    Object represents type of the column's values in the buffer.
+    """
+    string = 1
+    integer = 2
+    string_list = 3
+
+
+SCHEMA: list[tuple[str, ColumnType]] = [
+    ("name", ColumnType.string),
+    ("url", ColumnType.string),
+    ("price", ColumnType.string),
+    ("price_value", ColumnType.integer),
+    ("currency", ColumnType.string),
+    ("period", ColumnType.string),
+    ("additional_info", ColumnType.string),
+    ("address", ColumnType.string),
+    ("alternate_urls", ColumnType.string_list),
+]
+
+
+class FormatError(Exception):
+    """
+    Error which is thrown when the buffer is not a result of the supported version.
+    """
+    pass
+
+
+class _StringTable:
+    """
+    Private table of the distinct strings of the buffer, every string is stored once and referenced by its index.
+    """
+    indices: dict[str, int]
+    strings: list[bytes]
+
+    def __init__(self):
+        self.indices = dict()
+        self.strings = list()
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NONE_INDEX
+
+        index = self.indices.get(value)
+
+        if index is None:
+            index = self.indices[value] = len(self.strings)
+            self.strings.append(value.encode("utf-8"))
+        return index
+
+
+def _to_bytes(values: array) -> bytes:
+    """
+    Private method which represents the array in little-endian order.
+    """
+    if _IS_BIG_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_bytes(typecode: str, data: memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+
+    if _IS_BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _pad(size: int) -> bytes:
+    return bytes(-size % 8)
+
+
+def encode(apartments: Iterable[aparts.Apartment], site: aparts.ApartmentsSite) -> bytes:
+    """
+    Encodes apartments into the columnar binary buffer, which is much smaller and faster to read than json.
+    Every property is stored as its own column and strings are stored once in the shared table,
+    so repeated addresses, currencies and periods cost 4 bytes per apartment.
+
+    Layout of the buffer, all numbers are little-endian and every section is aligned to 8 bytes:
+    header (magic "APCF", schema version, flags, amount of rows, amount of strings, amount of columns,
+    reserved, index of the site's name), lengths of the strings as uint32 followed by their utf-8 bytes,
+    then every column: index of its name, `ColumnType`, size of the payload in bytes and the payload itself.
+    String columns are uint32 indices of the strings, integer columns are int64 values, string list columns are
+    uint32 offsets of every row followed by the uint32 indices. Missing values are 0xFFFFFFFF and -2^63.
+    Decoders skip columns with unknown names or types, so columns can be added without changing the version.
+
+    :param apartments: apartments of the same site.
+    :param site: site of the apartments.
+    :return: buffer as bytes.
+    """
+    if isinstance(apartments, aparts.ApartmentBatch):
+        return _encode_columns(len(apartments), site, {
+            "name": apartments.names,
+            "url": apartments.urls,
+            "price": apartments.prices,
+            "price_value": [value if value >= 0 else None for value in apartments.price_values],
+            "currency": apartments.currencies,
+            "period": apartments.periods,
+            "additional_info": apartments.additional_infos,
+            "address": apartments.addresses,
+            "alternate_urls": apartments.alternate_urls,
+        })
+
+    apartments = list(apartments)
+    return _encode_columns(len(apartments), site, {
+        name: [getattr(apartment, name) for apartment in apartments] for name, _ in SCHEMA
+    })
+
+
+def _encode_columns(rows: int, site: aparts.ApartmentsSite, columns: dict[str, list[Optional[Any]]]) -> bytes:
+    """
+    Private method which encodes columns of the schema, see `encode`.
+    """
+    strings = _StringTable()
+    site_index = strings.add(site.name)
+    payloads = list()
+
+    for name, column_type in SCHEMA:
+        values = columns[name]
+
+        match column_type:
+            case ColumnType.string:
+                payload = _to_bytes(array("I", [strings.add(value) for value in values]))
+            case ColumnType.integer:
+                payload = _to_bytes(array("q", [_NONE_INTEGER if value is None else value for value in values]))
+            case ColumnType.string_list:
+                offsets = array("I", [0])
+                indices = array("I")
+
+                for value in values:
+                    indices.extend(strings.add(item) for item in value or ())
+                    offsets.append(len(indices))
+
+                payload = _to_bytes(offsets) + _to_bytes(indices)
+
+        payloads.append((strings.add(name), column_type, payload))
+
+    lengths = _to_bytes(array("I", [len(string) for string in strings.strings]))
+    blob = b"".join(strings.strings)
+    parts = [
+        _HEADER.pack(MAGIC, SCHEMA_VERSION, 0, rows, len(strings.strings), len(payloads), 0, site_index),
+        lengths, _pad(len(lengths)), blob, _pad(len(blob))
+    ]
+
+    for name_index, column_type, payload in payloads:
+        parts.extend([_COLUMN.pack(name_index, column_type, len(payload)), payload, _pad(len(payload))])
+
+    return b"".join(parts)
+
+
+def get_rows_count(buffer: Any) -> int:
+    """
+    Reads amount of apartments from the header of the buffer without decoding it.
+
+    :param buffer: bytes, bytearray or memoryview which `encode` made.
+    :return: amount of apartments.
+    """
+    return _read_header(memoryview(buffer).cast("B"))[3]
+
+
+def _read_header(view: memoryview) -> tuple:
+    """
+    Private method which reads and validates header of the buffer.
+    """
+    if len(view) < _HEADER.size:
+        raise FormatError("Buffer is too short")
+
+    header = _HEADER.unpack_from(view)
+    magic, version = header[:2]
+
+    if magic != MAGIC:
+        raise FormatError(f"Unknown magic {magic!r}")
+
+    if version != SCHEMA_VERSION:
+        raise FormatError(f"Unsupported schema version {version}, expected {SCHEMA_VERSION}")
+    return header
+
+
+def decode(buffer: Any) -> tuple[aparts.ApartmentsSite, list[dict[str, Optional[Any]]]]:
+    """
+    Decodes the buffer which `encode` made.
+
+    :param buffer: bytes, bytearray or memoryview, it isn't copied.
+    :return: tuple of the site and the list of apartments' dictionaries in the same format as `Apartment.as_dict` returns.
+    """
+    view = memoryview(buffer).cast("B")
+    _, _, _, rows, strings_count, columns_count, _, site_index = _read_header(view)
+
+    offset = _HEADER.size
+    lengths = _from_bytes("I", view[offset:offset + 4 * strings_count])
+    offset += 4 * strings_count
+    offset += -offset % 8
+    strings = list()
+
+    for length in lengths:
+        strings.append(str(view[offset:offset + length], "utf-8"))
+        offset += length
+
+    offset += -offset % 8
+    get_string = lambda index: None if index == _NONE_INDEX else strings[index]
+    columns = dict()
+
+    for _ in range(columns_count):
+        name_index, column_type, size = _COLUMN.unpack_from(view, offset)
+        offset += _COLUMN.size
+        payload = view[offset:offset + size]
+        offset += size + -size % 8
+
+        match column_type:
+            case ColumnType.string:
+                columns[strings[name_index]] = [get_string(index) for index in _from_bytes("I", payload)]
+            case ColumnType.integer:
+                columns[strings[name_index]] = [None if value == _NONE_INTEGER else value
+                                                for value in _from_bytes("q", payload)]
+            case ColumnType.string_list:
+                offsets = _from_bytes("I", payload[:4 * (rows + 1)])
+                indices = _from_bytes("I", payload[4 * (rows + 1):])
+                columns[strings[name_index]] = [[strings[index] for index in indices[offsets[row]:offsets[row + 1]]]
+                                                for row in range(rows)]
+
+    names = [name for name, _ in SCHEMA if name in columns]
+    records = [dict(zip(names, values)) for values in zip(*(columns[name] for name in names))] if names else \
+        [dict() for _ in range(rows)]
+    return aparts.ApartmentsSite[strings[site_index]], records
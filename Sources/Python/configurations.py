@@ -1,4 +1,5 @@
 from utils import Any, Optional
+import json
 
 
 class Configurations:
@@ -24,3 +25,28 @@ class Configurations:
 
     def __repr__(self):
         return f"Config:\n\t{self.price=}\n\t{self.location=}\n\t{self.rooms=}"
+
+    def canonical(self) -> dict[str, Optional[Any]]:
+        """
+        Represents current config in the canonical form, so equal configs are represented the same way
+        regardless of how they were written: empty ranges are equal, rooms are sorted and location is normalized.
+
+        :return: dictionary where key is a configuration's property and value is a canonical value.
+        """
+        price = None
+
+        if self.price is not None:
+            price = [self.price.start, self.price.stop] if self.price else []
+
+        location = " ".join(self.location.lower().split()) if self.location else None
+        rooms = sorted(set(self.rooms)) if self.rooms else None
+
+        return {"price": price, "location": location or None, "rooms": rooms}
+
+    def get_key(self) -> str:
+        """
+        Gets key which identifies current config, e.g. in caches.
+
+        :return: canonical form of the config as a json string.
+        """
+        return json.dumps(self.canonical(), sort_keys=True, separators=(",", ":"))
@@ -0,0 +1,252 @@
+from geo import get_building_key, normalize_address
+from utils import Delegate, Optional, tokenize
+import apartments as aparts
+import numpy as np
+import re
+import time
+import zlib
+
+
+_PRIME = (1 << 31) - 1
+_BAND_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_NUMBER = re.compile(r"\d+")
+_SYNONYMS = {"м2": "м²", "этаж": "эт", "комн": "к"}
+
+
+def make_shingles(apartment: aparts.Apartment) -> set[str]:
+    """
+    Splits apartment's name into pairs of adjacent words, so numbers of rooms, area and floors keep their meaning,
+    and adds words of the street and house numbers of the address.
+    Case, punctuation, units and abbreviations don't matter, words of the address can be in any order.
+
+    :param apartment: apartment.
+    :return: set of shingles, empty if apartment has neither name nor address.
+    """
+    words = [_SYNONYMS.get(word, word) for word in tokenize(apartment.name)]
+    shingles = {f"{first} {second}" for first, second in zip(words, words[1:])}
+    shingles.update(words[:1] if len(words) == 1 else [])
+    shingles.update(tokenize(normalize_address(apartment.address)))
+    shingles.update(f"№{number}" for number in _NUMBER.findall(apartment.address or ""))
+    return shingles
+
+
+class _DisjointSet:
+    """
+    Private union-find structure with path halving.
+    """
+    _parents: list[int]
+
+    def __init__(self, size: int):
+        self._parents = list(range(size))
+
+    def find(self, item: int) -> int:
+        parents = self._parents
+
+        while parents[item] != item:
+            parents[item] = parents[parents[item]]
+            item = parents[item]
+        return item
+
+    def union(self, first: int, second: int):
+        first, second = self.find(first), self.find(second)
+
+        if first != second:
+            self._parents[max(first, second)] = min(first, second)
+
+
+class Deduplicator:
+    """
+    Finds reposts of the same apartment with slightly different names and prices.
+    Every apartment is represented by the MinHash signature of its name's and address' words, signatures are split into bands
+    and apartments with an equal band become candidates. Candidates are confirmed by the estimated similarity,
+    the price tolerance and the building, so the whole run takes time linear in the amount of apartments.
+    Duplicates have to be in the same building, i.e. their streets and house numbers are equal
+    or one of them has no address. Apartments with the same url are always duplicates.
+    """
+    _threshold: float
+    _price_tolerance: float
+    _bands: int
+    _rows: int
+    _multipliers: np.ndarray
+    _increments: np.ndarray
+    _delegate: Optional[Delegate]
+
+    def __init__(self,
+                 threshold: float = 0.7,
+                 price_tolerance: float = 0.1,
+                 permutations: int = 128,
+                 bands: int = 32,
+                 seed: int = 1,
+                 delegate: Optional[Delegate] = None):
+        """
+        :param threshold: minimal estimated Jaccard similarity of the duplicates' words.
+        :param price_tolerance: maximal difference of the duplicates' prices relative to the higher one.
+        Missing price doesn't prevent apartments from being duplicates.
+        :param permutations: length of the signature, it has to be divisible by the amount of bands.
+        :param bands: amount of bands, more bands find more candidates with lower similarity.
+        :param seed: seed of the hash functions.
+        :param delegate: delegate which is notified about merged duplicates.
+        """
+        if permutations % bands:
+            raise ValueError(f"Amount of permutations {permutations} is not divisible by amount of bands {bands}")
+
+        random = np.random.default_rng(seed)
+        self._threshold = threshold
+        self._price_tolerance = price_tolerance
+        self._bands = bands
+        self._rows = permutations // bands
+        self._multipliers = random.integers(1, _PRIME, permutations, dtype=np.uint64)
+        self._increments = random.integers(0, _PRIME, permutations, dtype=np.uint64)
+        self._delegate = delegate
+
+    def make_signatures(self, apartments: list[aparts.Apartment]) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Computes MinHash signatures of the apartments.
+
+        :return: tuple of the signatures' matrix where every row is an apartment
+        and boolean array which tells whether apartment has any shingles. Rows without shingles are meaningless.
+        """
+        hashes = list()
+        counts = np.zeros(len(apartments), dtype=np.int64)
+
+        for index, apartment in enumerate(apartments):
+            shingles = make_shingles(apartment)
+            counts[index] = len(shingles)
+            hashes.extend(zlib.crc32(shingle.encode()) % _PRIME for shingle in shingles)
+
+        signatures = np.zeros((len(apartments), len(self._multipliers)), dtype=np.uint64)
+        has_shingles = counts > 0
+
+        if not hashes:
+            return signatures, has_shingles
+
+        hashes = np.array(hashes, dtype=np.uint64)
+        starts = (np.cumsum(counts) - counts)[has_shingles]
+
+        for column, (multiplier, increment) in enumerate(zip(self._multipliers, self._increments)):
+            permuted = (hashes * multiplier + increment) % np.uint64(_PRIME)
+            signatures[has_shingles, column] = np.minimum.reduceat(permuted, starts)
+
+        return signatures, has_shingles
+
+    def find_groups(self, apartments: list[aparts.Apartment]) -> list[list[int]]:
+        """
+        Groups duplicates of the apartments. Duplicates of the duplicate are in the same group.
+
+        :param apartments: list of apartments.
+        :return: list of groups in the order of their first apartments, every group is a sorted list of indices.
+        Apartment without duplicates is a group of itself.
+        """
+        signatures, has_shingles = self.make_signatures(apartments)
+        prices = np.array([-1 if apartment.price_value is None else apartment.price_value for apartment in apartments],
+                          dtype=np.int64)
+        buildings = self._get_buildings(apartments)
+        groups = _DisjointSet(len(apartments))
+        urls: dict[str, int] = dict()
+
+        for index, apartment in enumerate(apartments):
+            if apartment.url:
+                groups.union(urls.setdefault(apartment.url, index), index)
+
+        indices = np.flatnonzero(has_shingles)
+
+        for band in range(self._bands):
+            keys = np.zeros(len(indices), dtype=np.uint64)
+
+            for column in signatures[indices, band * self._rows:(band + 1) * self._rows].T:
+                keys = keys * _BAND_MULTIPLIER + column
+
+            firsts, others = self._get_candidates(keys, indices)
+            is_duplicate = self._confirm(signatures, prices, buildings, firsts, others)
+
+            for first, other in zip(firsts[is_duplicate].tolist(), others[is_duplicate].tolist()):
+                groups.union(first, other)
+
+        members: dict[int, list[int]] = dict()
+
+        for index in range(len(apartments)):
+            members.setdefault(groups.find(index), list()).append(index)
+        return list(members.values())
+
+    def deduplicate(self, apartments: list[aparts.Apartment]) -> list[aparts.Apartment]:
+        """
+        Merges duplicates into the canonical apartment, which is the first of them.
+        Canonical apartment keeps urls of the others in `alternate_urls`, its missing address
+        and additional info are taken from the others.
+
+        :param apartments: list of apartments, they are changed in place.
+        :return: list of canonical apartments in the order of the given ones.
+        """
+        start = time.perf_counter()
+        canonical_apartments = list()
+
+        for group in self.find_groups(apartments):
+            canonical = apartments[group[0]]
+
+            for index in group[1:]:
+                duplicate = apartments[index]
+
+                for url in [duplicate.url] + duplicate.alternate_urls:
+                    if url and url != canonical.url and url not in canonical.alternate_urls:
+                        canonical.alternate_urls.append(url)
+
+                canonical.address = canonical.address or duplicate.address
+                canonical.additional_info = canonical.additional_info or duplicate.additional_info
+
+            canonical_apartments.append(canonical)
+
+        if self._delegate:
+            self._delegate.duplicates_were_merged(len(apartments) - len(canonical_apartments), len(apartments),
+                                                  time.perf_counter() - start)
+
+        return canonical_apartments
+
+    @staticmethod
+    def _get_buildings(apartments: list[aparts.Apartment]) -> np.ndarray:
+        """
+        Private method which numbers buildings of the apartments, apartments without address are -1.
+        """
+        codes: dict[str, int] = dict()
+        buildings = np.full(len(apartments), -1, dtype=np.int64)
+
+        for index, apartment in enumerate(apartments):
+            key = get_building_key(apartment.address)
+
+            if key:
+                buildings[index] = codes.setdefault(key, len(codes))
+        return buildings
+
+    @staticmethod
+    def _get_candidates(keys: np.ndarray, indices: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Private method which pairs every apartment with the first apartment of the same band's bucket.
+
+        :return: tuple of the first apartments' indices and the other apartments' indices.
+        """
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        is_first = np.ones(len(order), dtype=bool)
+        is_first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        firsts = order[np.flatnonzero(is_first)[np.cumsum(is_first) - 1]]
+        others = ~is_first
+        return indices[firsts[others]], indices[order[others]]
+
+    def _confirm(self,
+                 signatures: np.ndarray,
+                 prices: np.ndarray,
+                 buildings: np.ndarray,
+                 firsts: np.ndarray,
+                 others: np.ndarray) -> np.ndarray:
+        """
+        Private method which checks whether candidates are similar enough, their prices are within the tolerance
+        and they are in the same building.
+
+        :return: boolean array where every value tells whether the pair of candidates are duplicates.
+        """
+        similarities = (signatures[firsts] == signatures[others]).mean(axis=1)
+        first_prices, other_prices = prices[firsts], prices[others]
+        tolerance = self._price_tolerance * np.maximum(first_prices, other_prices)
+        has_close_prices = (np.abs(first_prices - other_prices) <= tolerance) | (first_prices < 0) | (other_prices < 0)
+        first_buildings, other_buildings = buildings[firsts], buildings[others]
+        is_same_building = (first_buildings == other_buildings) | (first_buildings < 0) | (other_buildings < 0)
+        return (similarities >= self._threshold) & has_close_prices & is_same_building
@@ -0,0 +1,151 @@
+from selenium.webdriver.remote.webdriver import WebDriver
+from typing import Callable
+from utils import Any, Optional
+import apartments as aparts
+import enum
+import os
+import sys
+
+
+class DriverBackend(enum.Enum):
+    """
+    Object represents browsers which can be driven by the parser.
+    """
+    safari = "safari"
+    chrome = "chrome"
+    firefox = "firefox"
+
+    @classmethod
+    def default(cls) -> "DriverBackend":
+        """
+        Gets backend which is available on the current platform out of the box.
+
+        :return: Safari on macOS and Chrome on other platforms.
+        """
+        return cls.safari if sys.platform == "darwin" else cls.chrome
+
+
+class DriverFactory:
+    """
+    Creates web drivers on demand, so nothing is launched until a driver is really needed.
+    Browser's modules are imported only when the driver of this browser is created.
+    Custom `make` function replaces the backend, e.g. to inject a fake driver.
+
+    Drivers don't wait for images and styles when the page is loaded with the "eager" strategy.
+    Images are disabled and urls matching the blocked patterns are not loaded at all.
+    Chrome blocks the patterns through the DevTools protocol, other browsers only disable images.
+    """
+    backend_variable = "APARTS_FINDER_DRIVER"
+    headless_variable = "APARTS_FINDER_HEADLESS"
+    page_load_strategy_variable = "APARTS_FINDER_PAGE_LOAD_STRATEGY"
+    blocking_variable = "APARTS_FINDER_BLOCKING"
+
+    _backend: DriverBackend
+    _headless: bool
+    _make: Optional[Callable[[], WebDriver]]
+    _page_load_strategy: str
+    _blocked_urls: list[str]
+
+    def __init__(self,
+                 backend: Optional[DriverBackend] = None,
+                 headless: bool = True,
+                 make: Optional[Callable[[], WebDriver]] = None,
+                 page_load_strategy: str = "eager",
+                 blocked_urls: Optional[list[str]] = None):
+        """
+        :param page_load_strategy: "normal", "eager" or "none", see WebDriver's page load strategies.
+        :param blocked_urls: url patterns of resources which are not loaded, where "*" matches any characters.
+        If it is None or empty, only the page load strategy is applied and images are shown.
+        """
+        self._backend = backend or DriverBackend.default()
+        self._headless = headless
+        self._make = make
+        self._page_load_strategy = page_load_strategy
+        self._blocked_urls = blocked_urls or []
+
+    @classmethod
+    def from_environment(cls, site: Optional[aparts.ApartmentsSite] = None) -> "DriverFactory":
+        """
+        Makes factory configured by the environment variables.
+        `APARTS_FINDER_DRIVER` is a raw value of the `DriverBackend`,
+        `APARTS_FINDER_HEADLESS` turns headless mode off when it is "0",
+        `APARTS_FINDER_PAGE_LOAD_STRATEGY` replaces the "eager" strategy,
+        `APARTS_FINDER_BLOCKING` turns blocking of the site's resources off when it is "0".
+
+        :param site: site whose resources are blocked, if None nothing is blocked.
+        :return: `DriverFactory` object.
+        """
+        backend = os.environ.get(cls.backend_variable)
+        headless = os.environ.get(cls.headless_variable, "1") != "0"
+        page_load_strategy = os.environ.get(cls.page_load_strategy_variable, "eager")
+        is_blocking = os.environ.get(cls.blocking_variable, "1") != "0"
+        blocked_urls = site.get_blocked_urls() if site and is_blocking else None
+        return cls(DriverBackend(backend) if backend else None, headless,
+                   page_load_strategy=page_load_strategy, blocked_urls=blocked_urls)
+
+    def get_backend(self) -> DriverBackend:
+        return self._backend
+
+    def create(self) -> WebDriver:
+        """
+        Creates and launches a new web driver.
+
+        :return: `WebDriver` object.
+        """
+        if self._make:
+            return self._make()
+
+        options = self.make_options()
+
+        match self._backend:
+            case DriverBackend.safari:
+                from selenium.webdriver import Safari
+                return Safari(options=options)
+
+            case DriverBackend.chrome:
+                from selenium.webdriver import Chrome
+                web_driver = Chrome(options=options)
+
+                if self._blocked_urls:
+                    web_driver.execute_cdp_cmd("Network.enable", {})
+                    web_driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": self._blocked_urls})
+                return web_driver
+
+            case DriverBackend.firefox:
+                from selenium.webdriver import Firefox
+                return Firefox(options=options)
+
+    def make_options(self) -> Any:
+        """
+        Makes browser's options of the driver's profile.
+
+        :return: options object of the backend's browser.
+        """
+        match self._backend:
+            case DriverBackend.safari:
+                from selenium.webdriver import SafariOptions
+                options = SafariOptions()
+
+            case DriverBackend.chrome:
+                from selenium.webdriver import ChromeOptions
+                options = ChromeOptions()
+
+                if self._headless:
+                    options.add_argument("--headless=new")
+
+                if self._blocked_urls:
+                    options.add_argument("--blink-settings=imagesEnabled=false")
+                    options.add_experimental_option("prefs", {"profile.managed_default_content_settings.images": 2})
+
+            case DriverBackend.firefox:
+                from selenium.webdriver import FirefoxOptions
+                options = FirefoxOptions()
+
+                if self._headless:
+                    options.add_argument("-headless")
+
+                if self._blocked_urls:
+                    options.set_preference("permissions.default.image", 2)
+
+        options.page_load_strategy = self._page_load_strategy
+        return options
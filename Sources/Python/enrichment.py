@@ -0,0 +1,229 @@
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+from cache import ResultCache, get_default_cache_path
+from http_parser import decode_response, get_pool
+from page_parser import DetailsPageParser
+from utils import Any, Delegate, Optional
+import apartments as aparts
+import asyncio
+import functools
+import json
+import time
+import urllib3
+
+
+_RETRIED_STATUSES = {429, 500, 502, 503, 504}
+
+
+def format_details(details: dict[str, Any]) -> Optional[str]:
+    """
+    Converts details of the apartment's page into its additional info.
+
+    :param details: dictionary in the same format as `DetailsPageParser.parse` returns.
+    :return: parameters separated by semicolons, e.g. "Общая площадь: 45 м²; Этаж: 5 из 9",
+    followed by the description on the new line, or None if there are no details.
+    """
+    lines = list()
+    params = details.get("params") or {}
+
+    if params:
+        lines.append("; ".join(f"{name}: {value}" for name, value in params.items()))
+
+    if details.get("description"):
+        lines.append(details["description"])
+
+    return "\n".join(lines) or None
+
+
+class RateLimiter:
+    """
+    Spaces requests to the same host, so there are at most `requests_per_second` of them.
+    Requests to different hosts are not limited. Limiter is used from the single event loop.
+    """
+    _interval: float
+    _next_request: dict[str, float]
+
+    def __init__(self, requests_per_second: float):
+        self._interval = 1 / requests_per_second if requests_per_second > 0 else 0
+        self._next_request = dict()
+
+    async def wait(self, host: str):
+        """
+        Waits until the next request to the host is allowed.
+        """
+        now = time.monotonic()
+        start = max(now, self._next_request.get(host, now))
+        self._next_request[host] = start + self._interval
+
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+_details_cache: Optional[ResultCache] = None
+
+
+def get_details_cache() -> ResultCache:
+    """
+    Gets cache of the parsed apartments' pages shared by all enrichers of the process.
+    Pages are kept for a day, because details of the listing rarely change.
+
+    :return: `ResultCache` object.
+    """
+    global _details_cache
+
+    if _details_cache is None:
+        _details_cache = ResultCache(get_default_cache_path("details.sqlite3"),
+                                     ttl=24 * 60 * 60, stale_ttl=0, max_entries=10000)
+    return _details_cache
+
+
+class DetailsEnricher:
+    """
+    Fills additional info of the apartments from their own pages.
+    Pages are fetched at the same time over the http pool, at most `concurrency` of them at once,
+    and requests to the same host are rate limited. Failed requests are retried with exponential backoff.
+    Parsed pages are cached by url, so the same listing is not fetched again.
+    Rate limit bounds the latency: listings of a single host take about their amount
+    divided by `requests_per_second` seconds, concurrency only hides the time of every single request.
+    """
+    _site: aparts.ApartmentsSite
+    _concurrency: int
+    _requests_per_second: float
+    _retries: int
+    _backoff: float
+    _cache: Optional[ResultCache]
+    _pool: urllib3.PoolManager
+    _delegate: Optional[Delegate]
+
+    def __init__(self,
+                 site: aparts.ApartmentsSite,
+                 concurrency: int = 16,
+                 requests_per_second: Optional[float] = None,
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 cache: Optional[ResultCache] = None,
+                 pool: Optional[urllib3.PoolManager] = None,
+                 delegate: Optional[Delegate] = None):
+        """
+        :param site: site of the apartments.
+        :param concurrency: maximum amount of requests at the same time.
+        :param requests_per_second: maximum rate of requests to the same host, by default the rate of the site is used.
+        :param retries: amount of retries of the failed request.
+        :param backoff: delay before the first retry in seconds, it is doubled for every next retry.
+        :param cache: cache of the parsed pages, if None pages are not cached.
+        :param pool: http connection pool, by default the shared pool is used.
+        :param delegate: delegate which is notified about errors and enriched apartments.
+        """
+        self._site = site
+        self._concurrency = concurrency
+        self._requests_per_second = requests_per_second or site.get_requests_per_second()
+        self._retries = retries
+        self._backoff = backoff
+        self._cache = cache
+        self._pool = pool or get_pool()
+        self._delegate = delegate
+
+    def enrich(self, apartments: list[aparts.Apartment]) -> int:
+        """
+        Fills additional info of the apartments and waits until all of them are done.
+
+        :param apartments: list of apartments, they are changed in place.
+        :return: amount of apartments which were enriched.
+        """
+        return asyncio.run(self.enrich_async(apartments))
+
+    async def enrich_async(self, apartments: list[aparts.Apartment]) -> int:
+        """
+        Coroutine version of `enrich`. Every url is fetched once, even if several apartments share it.
+        """
+        start = time.perf_counter()
+        limiter = RateLimiter(self._requests_per_second)
+        semaphore = asyncio.Semaphore(self._concurrency)
+        details: dict[str, asyncio.Task] = dict()
+
+        with ThreadPoolExecutor(max_workers=self._concurrency) as executor:
+            for apartment in apartments:
+                if apartment.url and apartment.url not in details:
+                    details[apartment.url] = asyncio.ensure_future(
+                        self._get_details(apartment.url, limiter, semaphore, executor)
+                    )
+
+            await asyncio.gather(*details.values())
+
+        enriched_count = 0
+
+        for apartment in apartments:
+            info = format_details(details[apartment.url].result() or {}) if apartment.url else None
+
+            if info:
+                apartment.additional_info = info
+                enriched_count += 1
+
+        if self._delegate:
+            self._delegate.details_were_enriched(enriched_count, len(apartments), time.perf_counter() - start)
+
+        return enriched_count
+
+    async def _get_details(self,
+                           url: str,
+                           limiter: RateLimiter,
+                           semaphore: asyncio.Semaphore,
+                           executor: ThreadPoolExecutor) -> Optional[dict[str, Any]]:
+        """
+        Gets details of the apartment's page from the cache or from the web site.
+        Pages without details, e.g. captchas, are not cached.
+
+        :return: dictionary in the same format as `DetailsPageParser.parse` returns or None if page can't be fetched.
+        """
+        if self._cache:
+            cached = self._cache.get(url)
+
+            if cached:
+                return json.loads(cached[0])
+
+        async with semaphore:
+            html = await self._fetch(url, limiter, executor)
+
+        if html is None:
+            return None
+
+        details = DetailsPageParser.parse(html, self._site)
+
+        if self._cache and format_details(details) is not None:
+            self._cache.put(url, json.dumps(details))
+        return details
+
+    async def _fetch(self, url: str, limiter: RateLimiter, executor: ThreadPoolExecutor) -> Optional[str]:
+        """
+        Fetches html of the page, retrying connection errors and statuses which mean that the site is overloaded.
+
+        :return: html as a string or None if page can't be fetched.
+        """
+        loop = asyncio.get_running_loop()
+        request = functools.partial(self._pool.request, "GET", url, retries=False)
+        host = urlsplit(url).netloc
+        error = None
+
+        for attempt in range(self._retries + 1):
+            if attempt:
+                await asyncio.sleep(self._backoff * 2 ** (attempt - 1))
+
+            await limiter.wait(host)
+
+            try:
+                response = await loop.run_in_executor(executor, request)
+            except Exception as e:
+                error = e
+                continue
+
+            if response.status == 200:
+                return decode_response(response)
+
+            error = urllib3.exceptions.HTTPError(f"Unexpected status {response.status} for {url}")
+
+            if response.status not in _RETRIED_STATUSES:
+                break
+
+        if self._delegate:
+            self._delegate.error_was_thrown(error)
+        return None
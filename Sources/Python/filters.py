@@ -0,0 +1,150 @@
+from apartments import ApartmentBatch, parse_rooms
+from utils import Optional, normalize_text, tokenize
+import configurations as config
+import numpy as np
+
+
+class FilterEngine:
+    """
+    In-memory query engine over the parsed apartments. Every property is kept in a NumPy array
+    and sort orders are computed once, so a single broad crawl can answer many narrow configs
+    without touching the web site.
+    Missing prices and amount of rooms are represented by -1 and never match a filter.
+    If the gazetteer is given, locations which it knows are matched by the coordinates of the addresses,
+    other locations are matched by words.
+    """
+    _batch: ApartmentBatch
+    _prices: np.ndarray
+    _rooms: np.ndarray
+    _addresses: np.ndarray
+    _tokens: dict[str, np.ndarray]
+    _price_order: np.ndarray
+    _max_rooms: int
+    _locations: Optional["geo.LocationFilter"]
+
+    def __init__(self, batch: ApartmentBatch, gazetteer: Optional["geo.Gazetteer"] = None):
+        """
+        :param batch: parsed apartments.
+        :param gazetteer: gazetteer of the city, if None locations are matched only by words.
+        """
+        self._batch = batch
+        self._prices = np.array(batch.price_values, dtype=np.int64)
+        self._rooms = np.array([-1 if rooms is None else rooms for rooms in map(parse_rooms, batch.names)],
+                               dtype=np.int16)
+        self._addresses = np.array([normalize_text(address) for address in batch.addresses], dtype=np.str_)
+        self._tokens = self._make_tokens_index(batch.addresses)
+        self._max_rooms = max(batch.get_site().get_rooms())
+        self._locations = None
+
+        if gazetteer is not None:
+            import geo
+            self._locations = geo.LocationFilter(batch.addresses, gazetteer)
+
+        missing_last = np.where(self._prices < 0, np.iinfo(np.int64).max, self._prices)
+        self._price_order = np.argsort(missing_last, kind="stable")
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def mask(self, configuration: config.Configurations, substring: bool = False) -> np.ndarray:
+        """
+        Gets which apartments match the config: price is within the range including both bounds,
+        amount of rooms is one of the configured ones and address matches the location.
+
+        :param configuration: config to match.
+        :param substring: whether location is matched as a substring of the address,
+        by default every word of the location have to be a word of the address.
+        :return: boolean array where every value tells whether the apartment matches.
+        """
+        mask = np.ones(len(self), dtype=bool)
+
+        if configuration.price is not None:
+            lower, upper = configuration.price.start, configuration.price.stop
+            mask &= (self._prices >= max(lower, 0)) & (self._prices <= upper)
+
+        if configuration.rooms:
+            rooms = np.where(self._rooms >= self._max_rooms, self._max_rooms, self._rooms)
+            mask &= np.isin(rooms, np.array(configuration.rooms, dtype=np.int16))
+
+        if configuration.location:
+            mask &= self._match_location(configuration.location, substring)
+
+        return mask
+
+    def query(self,
+              configuration: config.Configurations,
+              order_by_price: Optional[bool] = None,
+              substring: bool = False) -> np.ndarray:
+        """
+        Gets indices of the apartments which match the config.
+
+        :param configuration: config to match.
+        :param order_by_price: True to sort from the cheapest, False to sort from the most expensive
+        and None to keep the order of the batch. Apartments without price are always the last ones.
+        :param substring: whether location is matched as a substring of the address.
+        :return: array of indices in the batch.
+        """
+        mask = self.mask(configuration, substring)
+
+        if order_by_price is None:
+            return np.flatnonzero(mask)
+
+        order = self._price_order[mask[self._price_order]]
+
+        if order_by_price:
+            return order
+
+        has_price = self._prices[order] >= 0
+        return np.concatenate([order[has_price][::-1], order[~has_price]])
+
+    def select(self,
+               configuration: config.Configurations,
+               order_by_price: Optional[bool] = None,
+               substring: bool = False) -> ApartmentBatch:
+        """
+        Gets apartments which match the config, see `query`.
+
+        :return: new batch with the matching apartments.
+        """
+        indices = self.query(configuration, order_by_price, substring)
+        return ApartmentBatch(self._batch.get_site(), (self._batch[int(index)] for index in indices))
+
+    def _match_location(self, location: str, substring: bool) -> np.ndarray:
+        if self._locations is not None:
+            mask = self._locations.match(location)
+
+            if mask is not None:
+                return mask
+
+        return self._match_substring(location) if substring else self._match_tokens(location)
+
+    def _match_tokens(self, location: str) -> np.ndarray:
+        mask = np.zeros(len(self), dtype=bool)
+        tokens = tokenize(location)
+
+        if not tokens or any(token not in self._tokens for token in tokens):
+            return mask
+
+        indices = self._tokens[tokens[0]]
+
+        for token in tokens[1:]:
+            indices = np.intersect1d(indices, self._tokens[token], assume_unique=True)
+
+        mask[indices] = True
+        return mask
+
+    def _match_substring(self, location: str) -> np.ndarray:
+        return np.char.find(self._addresses, normalize_text(location)) >= 0
+
+    @staticmethod
+    def _make_tokens_index(addresses: list[Optional[str]]) -> dict[str, np.ndarray]:
+        """
+        Makes inverted index where key is a word of the address and value is a sorted array of the apartments' indices.
+        """
+        postings: dict[str, list[int]] = dict()
+
+        for index, address in enumerate(addresses):
+            for token in set(tokenize(address)):
+                postings.setdefault(token, list()).append(index)
+
+        return {token: np.array(indices, dtype=np.int64) for token, indices in postings.items()}
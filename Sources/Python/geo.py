@@ -0,0 +1,415 @@
+from typing import Iterable
+from utils import Any, Optional, normalize_text
+import json
+import math
+import numpy as np
+import os
+import re
+
+
+GAZETTEER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "spb_gazetteer.json")
+
+_STREET_TYPES = {"улица", "проспект", "переулок", "набережная", "шоссе", "площадь", "бульвар", "линия", "аллея",
+                 "проезд", "дорога"}
+_ABBREVIATIONS = {
+    "ул": "улица", "пр": "проспект", "пр-т": "проспект", "пр-кт": "проспект", "просп": "проспект",
+    "пер": "переулок", "наб": "набережная", "ш": "шоссе", "пл": "площадь", "б-р": "бульвар", "бул": "бульвар",
+    "р": "реки", "наб-я": "набережная", "р-н": "район"
+}
+_CITY_PARTS = {"санкт-петербург", "г санкт-петербург", "спб", "г спб", "россия", "ленинградская область"}
+_HOUSE = re.compile(r"^(?:(?:д|дом|к|корп|корпус|лит|литера|стр|строение)\b|\d)")
+_METRO = re.compile(r"^(?:м|метро)\s+(.+)$")
+_WORD = re.compile(r"[\w-]+\.?")
+
+_KM_PER_DEGREE_LATITUDE = 111.2
+_REFERENCE_LATITUDE = 59.94
+
+
+def _expand(part: str) -> str:
+    """
+    Private method which replaces abbreviations of the address' part with the full words.
+    """
+    words = list()
+
+    for word in _WORD.findall(part):
+        stripped = word.rstrip(".")
+        words.append(_ABBREVIATIONS.get(stripped, stripped) if word.endswith(".") or stripped in _ABBREVIATIONS
+                     else stripped)
+    return " ".join(words)
+
+
+def _canonical_street(part: str) -> Optional[str]:
+    """
+    Private method which represents the street's name with its type at the end, e.g. "савушкина улица",
+    so "ул. Савушкина" and "Савушкина улица" are the same.
+
+    :return: canonical name or None if the part is not a street.
+    """
+    words = part.split()
+    types = [word for word in words if word in _STREET_TYPES]
+
+    if not types or len(words) == 1:
+        return None
+
+    return " ".join([word for word in words if word != types[0]] + [types[0]])
+
+
+def normalize_address(address: Optional[str]) -> str:
+    """
+    Normalizes address for geocoding: case and "ё" are ignored, abbreviations are expanded,
+    the city and the house number are removed, e.g. "Санкт-Петербург, Невский пр., 120" is "невский проспект".
+
+    :param address: address or None.
+    :return: normalized parts of the address separated by commas, empty if address is None.
+    """
+    parts = list()
+
+    for part in normalize_text(address).split(","):
+        part = _expand(part.strip())
+
+        if not part or part in _CITY_PARTS:
+            continue
+
+        if _HOUSE.match(part) and _canonical_street(part) is None:
+            continue
+
+        parts.append(part)
+    return ", ".join(parts)
+
+
+def get_building_key(address: Optional[str]) -> str:
+    """
+    Represents the building of the address, so differently written addresses of the same building are equal,
+    e.g. "ул. Савушкина, д. 12" and "Савушкина улица, 12" are "савушкина улица, 12".
+    The city and the district are ignored.
+
+    :param address: address or None.
+    :return: normalized street and house number, empty if address is None.
+    """
+    streets, houses = list(), list()
+
+    for part in normalize_text(address).split(","):
+        part = _expand(part.strip())
+
+        if not part or part in _CITY_PARTS or "район" in part.split():
+            continue
+
+        street = _canonical_street(part)
+
+        if _HOUSE.match(part) and street is None:
+            words = part.split()
+            houses.append(" ".join(words[1:] if words[0] in ("д", "дом") else words))
+        else:
+            streets.append(street or part)
+    return ", ".join(streets + houses)
+
+
+def project(latitude: Any, longitude: Any) -> tuple[Any, Any]:
+    """
+    Projects coordinates onto the plane in kilometers. Projection is precise enough within a city.
+
+    :param latitude: latitude in degrees, a number or a NumPy array.
+    :param longitude: longitude in degrees, a number or a NumPy array.
+    :return: tuple of x and y in kilometers.
+    """
+    scale = math.cos(math.radians(_REFERENCE_LATITUDE))
+    return longitude * _KM_PER_DEGREE_LATITUDE * scale, latitude * _KM_PER_DEGREE_LATITUDE
+
+
+class Place:
+    """
+    Object represents a point of the gazetteer: metro station, street or district.
+    District has no coordinates.
+    """
+    kind: str
+    name: str
+    latitude: Optional[float]
+    longitude: Optional[float]
+    district: Optional[str]
+
+    def __init__(self,
+                 kind: str,
+                 name: str,
+                 latitude: Optional[float] = None,
+                 longitude: Optional[float] = None,
+                 district: Optional[str] = None):
+        self.kind = kind
+        self.name = name
+        self.latitude = latitude
+        self.longitude = longitude
+        self.district = district
+
+    def __repr__(self):
+        return f"Place({self.kind}, {self.name}, {self.latitude}, {self.longitude}, {self.district})"
+
+
+class Gazetteer:
+    """
+    Local list of the city's metro stations and streets with their coordinates and districts.
+    Street is located at its middle point, because houses are not listed.
+    """
+    _metro: dict[str, Place]
+    _streets: dict[str, Place]
+    _districts: dict[str, Place]
+
+    def __init__(self, data: dict[str, Any]):
+        self._metro = {
+            normalize_text(station["name"]): Place("metro", station["name"], station["lat"], station["lon"],
+                                                   station.get("district"))
+            for station in data.get("metro", [])
+        }
+        self._streets = {
+            _canonical_street(_expand(normalize_text(street["name"]))): Place("street", street["name"], street["lat"],
+                                                                              street["lon"], street.get("district"))
+            for street in data.get("streets", [])
+        }
+        self._districts = {normalize_text(name): Place("district", name, district=name)
+                           for name in data.get("districts", [])}
+
+    @classmethod
+    def load(cls, path: str = GAZETTEER_PATH) -> "Gazetteer":
+        with open(path, encoding="utf-8") as file:
+            return cls(json.load(file))
+
+    def get_metro(self, name: str) -> Optional[Place]:
+        return self._metro.get(normalize_text(name))
+
+    def get_district(self, name: str) -> Optional[Place]:
+        name = normalize_text(name)
+        return self._districts.get(name.removesuffix(" район").removeprefix("район "))
+
+    def geocode(self, address: Optional[str]) -> Optional[Place]:
+        """
+        Locates the address by its street or by the metro station which is mentioned in it.
+
+        :param address: address as it is shown on the web site.
+        :return: place of the street or the station, or None if address is unknown.
+        """
+        parts = normalize_address(address).split(", ")
+
+        for part in parts:
+            street = _canonical_street(part)
+
+            if street in self._streets:
+                return self._streets[street]
+
+        for part in parts:
+            metro = _METRO.match(part)
+            station = self._metro.get(metro.group(1) if metro else part)
+
+            if station:
+                return station
+        return None
+
+    def find_district(self, address: Optional[str]) -> Optional[Place]:
+        """
+        Finds the district which is written in the address, e.g. "Приморский р-н, Богатырский пр., 12".
+
+        :param address: address as it is shown on the web site.
+        :return: place of the district or None if address doesn't mention a known district.
+        """
+        for part in normalize_address(address).split(", "):
+            if "район" in part.split():
+                district = self.get_district(part)
+
+                if district:
+                    return district
+        return None
+
+    def resolve(self, location: Optional[str]) -> Optional[Place]:
+        """
+        Finds the place which is meant by the free-text location, e.g. "Центральный район", "м. Маяковская"
+        or "Невский проспект".
+
+        :param location: location from the config.
+        :return: place or None if location is unknown.
+        """
+        if not location:
+            return None
+
+        return self.get_district(location) or self.geocode(location)
+
+
+_gazetteer: Optional[Gazetteer] = None
+
+
+def get_gazetteer() -> Gazetteer:
+    """
+    Gets bundled gazetteer of Saint Petersburg shared by the whole process.
+    """
+    global _gazetteer
+
+    if _gazetteer is None:
+        _gazetteer = Gazetteer.load()
+    return _gazetteer
+
+
+class GridIndex:
+    """
+    Spatial index of the points, which are put into the square cells of the plane.
+    Radius query checks only the cells which intersect the circle.
+    """
+    _cell_size: float
+    _xs: np.ndarray
+    _ys: np.ndarray
+    _cells: dict[tuple[int, int], np.ndarray]
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, cell_size: float = 1.0):
+        """
+        :param latitudes: latitudes of the points, NaN points are not indexed.
+        :param longitudes: longitudes of the points.
+        :param cell_size: side of the cell in kilometers.
+        """
+        self._cell_size = cell_size
+        self._xs, self._ys = project(np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64))
+        known = np.flatnonzero(~np.isnan(self._xs) & ~np.isnan(self._ys))
+        columns = np.floor(self._xs[known] / cell_size).astype(np.int64)
+        rows = np.floor(self._ys[known] / cell_size).astype(np.int64)
+        cells: dict[tuple[int, int], list[int]] = dict()
+
+        for index, column, row in zip(known.tolist(), columns.tolist(), rows.tolist()):
+            cells.setdefault((column, row), list()).append(index)
+
+        self._cells = {cell: np.array(indices, dtype=np.int64) for cell, indices in cells.items()}
+
+    def within(self, latitude: float, longitude: float, radius: float) -> np.ndarray:
+        """
+        Gets points within the radius of the given point.
+
+        :param radius: radius in kilometers.
+        :return: sorted array of the points' indices.
+        """
+        x, y = project(latitude, longitude)
+        first_column, last_column = math.floor((x - radius) / self._cell_size), math.floor((x + radius) / self._cell_size)
+        first_row, last_row = math.floor((y - radius) / self._cell_size), math.floor((y + radius) / self._cell_size)
+        candidates = [
+            self._cells[(column, row)]
+            for column in range(first_column, last_column + 1)
+            for row in range(first_row, last_row + 1)
+            if (column, row) in self._cells
+        ]
+
+        if not candidates:
+            return np.array([], dtype=np.int64)
+
+        indices = np.concatenate(candidates)
+        distances = np.hypot(self._xs[indices] - x, self._ys[indices] - y)
+        return np.sort(indices[distances <= radius])
+
+
+class LocationFilter:
+    """
+    Filters apartments by location without any external requests. Addresses are geocoded once by the gazetteer
+    and indexed by the grid, districts are indexed by an inverted index.
+    District which is written in the address is preferred to the district of its street.
+    """
+    _gazetteer: Gazetteer
+    _latitudes: np.ndarray
+    _longitudes: np.ndarray
+    _index: GridIndex
+    _districts: dict[str, np.ndarray]
+    _has_district: np.ndarray
+
+    def __init__(self, addresses: Iterable[Optional[str]], gazetteer: Optional[Gazetteer] = None):
+        """
+        :param addresses: addresses of the apartments in the order of the results.
+        :param gazetteer: gazetteer of the city, by default the bundled one is used.
+        """
+        self._gazetteer = gazetteer or get_gazetteer()
+        places: dict[str, tuple[Optional[Place], Optional[str]]] = dict()
+        latitudes, longitudes = list(), list()
+        districts: dict[str, list[int]] = dict()
+
+        for index, address in enumerate(addresses):
+            key = normalize_address(address)
+
+            if key not in places:
+                place = self._gazetteer.geocode(address) if key else None
+                district = self._gazetteer.find_district(address) if key else None
+                places[key] = place, district.name if district else place.district if place else None
+
+            place, district = places[key]
+            latitudes.append(place.latitude if place else math.nan)
+            longitudes.append(place.longitude if place else math.nan)
+
+            if district:
+                districts.setdefault(normalize_text(district), list()).append(index)
+
+        self._latitudes = np.array(latitudes, dtype=np.float64)
+        self._longitudes = np.array(longitudes, dtype=np.float64)
+        self._index = GridIndex(self._latitudes, self._longitudes)
+        self._districts = {district: np.array(indices, dtype=np.int64) for district, indices in districts.items()}
+        self._has_district = np.zeros(len(self._latitudes), dtype=bool)
+
+        for indices in self._districts.values():
+            self._has_district[indices] = True
+
+    def __len__(self) -> int:
+        return len(self._latitudes)
+
+    def get_coordinates(self, index: int) -> Optional[tuple[float, float]]:
+        """
+        Gets coordinates of the apartment.
+
+        :return: tuple of latitude and longitude or None if the address wasn't geocoded.
+        """
+        if math.isnan(self._latitudes[index]):
+            return None
+        return float(self._latitudes[index]), float(self._longitudes[index])
+
+    def near(self, latitude: float, longitude: float, radius: float) -> np.ndarray:
+        """
+        Gets which apartments are within the radius in kilometers of the point.
+
+        :return: boolean array where every value tells whether the apartment matches.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        mask[self._index.within(latitude, longitude, radius)] = True
+        return mask
+
+    def near_metro(self, station: str, radius: float = 1.5) -> np.ndarray:
+        """
+        Gets which apartments are within the radius in kilometers of the metro station.
+        Unknown station matches nothing.
+        """
+        place = self._gazetteer.get_metro(station)
+
+        if place is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.near(place.latitude, place.longitude, radius)
+
+    def in_district(self, district: str) -> np.ndarray:
+        """
+        Gets which apartments are inside the district.
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        place = self._gazetteer.get_district(district)
+
+        if place is not None:
+            mask[self._districts.get(normalize_text(place.name), np.array([], dtype=np.int64))] = True
+        return mask
+
+    def match(self, location: Optional[str], radius: float = 1.5, keep_unknown: bool = False) -> Optional[np.ndarray]:
+        """
+        Gets which apartments match the free-text location of the config:
+        apartments inside the district or within the radius of the metro station or the street.
+
+        :param location: location from the config.
+        :param radius: radius in kilometers.
+        :param keep_unknown: whether apartments which the gazetteer can't locate match as well,
+        i.e. apartments without a district for the district and without coordinates for other locations.
+        :return: boolean array or None if the location is unknown to the gazetteer.
+        """
+        place = self._gazetteer.resolve(location)
+
+        if place is None:
+            return None
+
+        if place.kind == "district":
+            mask = self.in_district(place.name)
+            unknown = ~self._has_district
+        else:
+            mask = self.near(place.latitude, place.longitude, radius)
+            unknown = np.isnan(self._latitudes)
+
+        return mask | unknown if keep_unknown else mask
@@ -0,0 +1,273 @@
+from archive import PageArchive
+from page_parser import PageParser
+from typing import Callable, Iterator
+from utils import Any, Delegate, Optional, with_query
+import configurations as config
+import apartments as aparts
+import urllib3
+
+
+_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 "
+                  "(KHTML, like Gecko) Version/15.1 Safari/605.1.15",
+    "Accept": "text/html,application/xhtml+xml",
+    "Accept-Language": "ru-RU,ru;q=0.9"
+}
+
+_pool: Optional[urllib3.PoolManager] = None
+
+
+def get_pool() -> urllib3.PoolManager:
+    """
+    Gets http connection pool shared by all parsers, so connections are reused between requests.
+
+    :return: `PoolManager` object.
+    """
+    global _pool
+
+    if _pool is None:
+        retries = urllib3.Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504])
+        _pool = urllib3.PoolManager(num_pools=4, maxsize=8, headers=_HEADERS, retries=retries,
+                                    timeout=urllib3.Timeout(connect=5, read=15))
+    return _pool
+
+
+def decode_response(response: urllib3.response.HTTPResponse) -> str:
+    """
+    Decodes body of the response with the charset from its headers.
+
+    :param response: response of the http request.
+    :return: body as a string.
+    """
+    content_type = response.headers.get("Content-Type", "")
+    charset = content_type.split("charset=")[-1] if "charset=" in content_type else "utf-8"
+    return response.data.decode(charset, errors="replace")
+
+
+class HttpSiteParser:
+    """
+    Filters and parses the apartments from the given web site without a browser.
+    Filters are applied through the search url, page's html is fetched with a plain http client.
+    Has the same interface as `network.SiteParser`.
+    If `base_url` is given it replaces site's url, so a mirror of the site can be parsed.
+    If `archive` is given html of every fetched page is saved into it.
+    """
+    _configuration: config.Configurations
+    _site: aparts.ApartmentsSite
+    _delegate: Optional[Delegate]
+    _pool: urllib3.PoolManager
+    _url: Optional[str]
+    _archive: Optional[PageArchive]
+    _pages_seen: int
+    _is_interrupted: bool
+
+    def __init__(self,
+                 configuration: config.Configurations,
+                 site: aparts.ApartmentsSite,
+                 delegate: Optional[Delegate] = None,
+                 pool: Optional[urllib3.PoolManager] = None,
+                 base_url: Optional[str] = None,
+                 archive: Optional[PageArchive] = None):
+        self._configuration = configuration
+        self._site = site
+        self._delegate = delegate
+        self._pool = pool or get_pool()
+        self._base_url = base_url
+        self._url = None
+        self._archive = archive
+        self._pages_seen = 0
+        self._is_interrupted = False
+
+    @property
+    def is_interrupted(self) -> bool:
+        """
+        Whether the last pagination stopped because a page couldn't be fetched, not because the last page was reached.
+        """
+        return self._is_interrupted
+
+    def set_config(self) -> bool:
+        """
+        Makes search url from the given config.
+
+        :return: True if configurations were set without errors, otherwise False
+        """
+        try:
+            url = self._site.get_search_url(self._configuration.price)
+
+            if self._base_url:
+                url = url.replace(self._site.value, self._base_url, 1)
+            self._url = url
+
+            if self._delegate:
+                self._delegate.web_site_was_configured(url)
+                self._delegate.configuration_was_completed()
+
+            return True
+
+        except Exception as e:
+            if self._delegate:
+                self._delegate.error_was_thrown(e)
+
+            return False
+
+    def sort_by_newest(self):
+        """
+        Sorts search results from the newest to the oldest.
+        Method have to be called after setting the configuration.
+        """
+        name, value = self._site.get_newest_first_parameter()
+        self._url = with_query(self._url, {name: value})
+
+    def get_apartments(self, max_pages: Optional[int] = None, max_items: Optional[int] = None) -> list[aparts.Apartment]:
+        """
+        Gets list of apartments from all pages of the search results.
+        Method have to be called after setting the configuration.
+
+        :param max_pages: maximum amount of pages to parse, if None all pages are parsed.
+        :param max_items: maximum amount of apartments to parse, if None all apartments are parsed.
+        :return: list of apartments.
+        """
+        list_of_apartments = list(self.iter_apartments(max_pages, max_items))
+
+        if self._delegate:
+            self._delegate.all_apartments_were_parsed(list_of_apartments, self._pages_seen)
+
+        return list_of_apartments
+
+    def iter_apartments(self,
+                        max_pages: Optional[int] = None,
+                        max_items: Optional[int] = None,
+                        should_stop: Optional[Callable[[aparts.Apartment], bool]] = None) -> Iterator[aparts.Apartment]:
+        """
+        Lazily gets apartments page by page.
+        Rooms are filtered on the client side, because they are not a part of the search url.
+
+        :param max_pages: maximum amount of pages to parse, if None all pages are parsed.
+        :param max_items: maximum amount of apartments to yield, if None all apartments are yielded.
+        :param should_stop: predicate which is called for every apartment before it is yielded.
+        If it returns True iteration stops and the apartment is not yielded.
+        :return: iterator over apartments.
+        """
+        if self._delegate:
+            self._delegate.starting_parsing_apartments()
+
+        if max_items is not None and max_items <= 0:
+            return
+
+        items_count = 0
+
+        for list_of_apartments in self.iter_pages(max_pages):
+            for apartment in list_of_apartments:
+                if should_stop and should_stop(apartment):
+                    return
+
+                yield apartment
+                items_count += 1
+
+                if max_items is not None and items_count >= max_items:
+                    return
+
+    def iter_pages(self, max_pages: Optional[int] = None) -> Iterator[list[aparts.Apartment]]:
+        """
+        Lazily gets apartments of the search results page by page.
+        Rooms are filtered on the client side, so pages can be shorter than on the web site.
+        If a page can't be fetched iteration stops and `is_interrupted` is True.
+
+        :param max_pages: maximum amount of pages to parse, if None all pages are parsed.
+        :return: iterator over lists of apartments, where each list represents a single page.
+        """
+        for list_of_data in self._iter_data_pages(max_pages):
+            list_of_apartments = list()
+
+            for data in list_of_data:
+                if not self._matches_rooms(data):
+                    continue
+
+                apartment = aparts.Apartment.from_dict(data, self._site)
+                list_of_apartments.append(apartment)
+
+                if self._delegate:
+                    self._delegate.apartment_was_parsed(apartment)
+
+            yield list_of_apartments
+
+    def _iter_data_pages(self, max_pages: Optional[int] = None) -> Iterator[list[dict[str, Optional[Any]]]]:
+        """
+        Lazily fetches and parses pages of the search results.
+
+        :param max_pages: maximum amount of pages to parse, if None all pages are parsed.
+        :return: iterator over lists of apartments' dictionaries, where each list represents a single page.
+        """
+        self._pages_seen = 0
+        self._is_interrupted = False
+        url = self._url
+
+        while url and (max_pages is None or self._pages_seen < max_pages):
+            html = self._fetch(url)
+
+            if html is None:
+                self._is_interrupted = True
+                return
+
+            if self._archive is not None:
+                self._archive_page(html, url)
+
+            list_of_data, next_page_url = PageParser.parse(html, self._site, url)
+
+            if not list_of_data:
+                self._is_interrupted = self._pages_seen > 0
+                return
+
+            self._pages_seen += 1
+
+            if self._delegate:
+                self._delegate.page_was_parsed(self._pages_seen, len(list_of_data))
+
+            yield list_of_data
+            url = next_page_url
+
+    def _archive_page(self, html: str, url: str):
+        """
+        Saves html of the fetched page into the archive. Page which can't be saved is skipped,
+        it isn't an error of parsing.
+        """
+        try:
+            self._archive.save(html, self._site, url, self._configuration.get_key(), self._pages_seen + 1)
+        except Exception as e:
+            if self._delegate:
+                self._delegate.page_was_not_archived(self._pages_seen + 1, e)
+
+    def _fetch(self, url: str) -> Optional[str]:
+        """
+        Fetches html of the page.
+
+        :param url: url of the page.
+        :return: html as a string or None if page can't be fetched.
+        """
+        try:
+            response = self._pool.request("GET", url)
+
+            if response.status != 200:
+                raise urllib3.exceptions.HTTPError(f"Unexpected status {response.status} for {url}")
+
+            return decode_response(response)
+        except Exception as e:
+            if self._delegate:
+                self._delegate.error_was_thrown(e)
+            return None
+
+    def _matches_rooms(self, data: dict[str, Optional[Any]]) -> bool:
+        """
+        Checks whether apartment has one of the configured amount of rooms.
+        Apartments with 5 and more rooms match the last rooms' switch of the site.
+        """
+        if not self._configuration.rooms:
+            return True
+
+        rooms = aparts.parse_rooms(data.get("name"))
+
+        if rooms is None:
+            return False
+
+        max_rooms = max(self._site.get_rooms())
+        return min(rooms, max_rooms) in self._configuration.rooms
@@ -0,0 +1,176 @@
+from utils import Any, Delegate, Optional
+import apartments as aparts
+import hashlib
+import sqlite3
+import time
+
+
+def content_hash(apartment: aparts.Apartment) -> str:
+    """
+    Gets hash of the apartment's content which is visible in the search results.
+
+    :param apartment: apartment which should be hashed.
+    :return: hash as a hex string.
+    """
+    content = "\0".join(str(value or "") for value in [apartment.name, apartment.price, apartment.address])
+    return hashlib.blake2b(content.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ListingIndex:
+    """
+    Persistent index of the seen listings stored in the local SQLite file.
+    Listings are grouped by scopes, e.g. a site and a config, so removed listings are tracked per search.
+    """
+    _connection: sqlite3.Connection
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, timeout=5)
+
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS listings ("
+                "scope TEXT NOT NULL, url TEXT NOT NULL, hash TEXT NOT NULL, "
+                "first_seen REAL NOT NULL, last_seen REAL NOT NULL, PRIMARY KEY (scope, url))"
+            )
+
+    def get_hash(self, scope: str, url: str) -> Optional[str]:
+        """
+        Gets content hash of the known listing.
+
+        :return: hash as a hex string or None if listing is unknown.
+        """
+        row = self._connection.execute("SELECT hash FROM listings WHERE scope = ? AND url = ?", (scope, url)).fetchone()
+        return row[0] if row else None
+
+    def get_urls(self, scope: str) -> set[str]:
+        return {row[0] for row in self._connection.execute("SELECT url FROM listings WHERE scope = ?", (scope,))}
+
+    def update(self, scope: str, hashes: dict[str, str], seen_urls: set[str]):
+        """
+        Saves hashes of the new and changed listings and marks all seen listings in a single transaction.
+
+        :param scope: scope of the listings.
+        :param hashes: dictionary where key is an url of the new or changed listing and value is its hash.
+        :param seen_urls: urls of all listings which were seen.
+        """
+        now = time.time()
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO listings (scope, url, hash, first_seen, last_seen) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (scope, url) DO UPDATE SET hash = excluded.hash, last_seen = excluded.last_seen",
+                [(scope, url, content, now, now) for url, content in hashes.items()]
+            )
+            self._connection.executemany(
+                "UPDATE listings SET last_seen = ? WHERE scope = ? AND url = ?",
+                [(now, scope, url) for url in seen_urls - hashes.keys()]
+            )
+
+    def remove(self, scope: str, urls: set[str]):
+        with self._connection:
+            self._connection.executemany("DELETE FROM listings WHERE scope = ? AND url = ?",
+                                         [(scope, url) for url in urls])
+
+    def close(self):
+        self._connection.close()
+
+
+class CrawlReport:
+    """
+    Result of the incremental crawl. Removed listings are known only if the crawl was complete,
+    i.e. it wasn't limited and every page was loaded.
+    """
+    new: list[aparts.Apartment]
+    changed: list[aparts.Apartment]
+    removed: list[str]
+    known_count: int
+    is_complete: bool
+
+    def __init__(self):
+        self.new = list()
+        self.changed = list()
+        self.removed = list()
+        self.known_count = 0
+        self.is_complete = False
+
+    def __repr__(self):
+        return f"CrawlReport(new={len(self.new)}, changed={len(self.changed)}, removed={len(self.removed)}, " \
+               f"known={self.known_count}, is_complete={self.is_complete})"
+
+
+class IncrementalCrawler:
+    """
+    Crawls search results from the newest to the oldest and reports only listings which were changed since
+    the last crawl. Pagination stops after `stop_after_known` consecutive known listings, so recurring crawls
+    cost time in proportion to the amount of changes.
+    Parser is either `network.SiteParser` or `http_parser.HttpSiteParser` with already applied configuration.
+    """
+    _parser: Any
+    _index: ListingIndex
+    _scope: str
+    _stop_after_known: Optional[int]
+    _delegate: Optional[Delegate]
+
+    def __init__(self,
+                 parser: Any,
+                 index: ListingIndex,
+                 scope: str,
+                 stop_after_known: Optional[int] = 20,
+                 delegate: Optional[Delegate] = None):
+        self._parser = parser
+        self._index = index
+        self._scope = scope
+        self._stop_after_known = stop_after_known
+        self._delegate = delegate
+
+    def crawl(self, max_pages: Optional[int] = None) -> CrawlReport:
+        """
+        Crawls search results and updates the index.
+
+        :param max_pages: maximum amount of pages to parse, if None all pages are parsed.
+        :return: `CrawlReport` object.
+        """
+        report = CrawlReport()
+        hashes = dict()
+        seen_urls = set()
+        consecutive_known = 0
+        is_stopped = False
+
+        def should_stop(apartment: aparts.Apartment) -> bool:
+            nonlocal consecutive_known, is_stopped
+
+            if not apartment.url or apartment.url in seen_urls:
+                return False
+
+            seen_urls.add(apartment.url)
+            content = content_hash(apartment)
+            known_content = self._index.get_hash(self._scope, apartment.url)
+
+            if known_content == content:
+                report.known_count += 1
+                consecutive_known += 1
+                is_stopped = self._stop_after_known is not None and consecutive_known >= self._stop_after_known
+                return is_stopped
+
+            consecutive_known = 0
+            hashes[apartment.url] = content
+            (report.new if known_content is None else report.changed).append(apartment)
+            return False
+
+        self._parser.sort_by_newest()
+
+        for _ in self._parser.iter_apartments(max_pages=max_pages, should_stop=should_stop):
+            pass
+
+        report.is_complete = not is_stopped and max_pages is None and not self._parser.is_interrupted
+        self._index.update(self._scope, hashes, seen_urls)
+
+        if report.is_complete:
+            removed = self._index.get_urls(self._scope) - seen_urls
+            self._index.remove(self._scope, removed)
+            report.removed = sorted(removed)
+
+        if self._delegate:
+            self._delegate.incremental_crawl_was_finished(report)
+
+        return report
@@ -0,0 +1,207 @@
+from cache import get_default_cache_path
+from typing import Iterable
+from utils import Any, Optional, normalize_text
+import apartments as aparts
+import sqlite3
+import time
+
+
+_LISTING_COLUMNS = ("url", "site", "name", "price", "price_value", "currency", "period", "rooms",
+                    "address", "additional_info", "first_seen", "last_seen", "previous_price", "price_changed_at")
+
+
+class ListingStore:
+    """
+    Persistent store of the parsed listings in the local SQLite file in WAL mode.
+    Listings are upserted by url and every change of the price is saved into the price history.
+    Prices, amount of rooms, addresses and times of price changes are indexed, so the store can be queried
+    without loading it into memory. Addresses are indexed in the normalized form and matched by prefix.
+    """
+    _connection: sqlite3.Connection
+
+    def __init__(self, path: str):
+        self._connection = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode = WAL")
+        self._connection.execute("PRAGMA synchronous = NORMAL")
+
+        with self._connection:
+            self._connection.executescript(
+                "CREATE TABLE IF NOT EXISTS listings ("
+                "url TEXT PRIMARY KEY, site TEXT NOT NULL, name TEXT, price TEXT, price_value INTEGER, "
+                "currency TEXT, period TEXT, rooms INTEGER, address TEXT, address_key TEXT, additional_info TEXT, "
+                "first_seen REAL NOT NULL, last_seen REAL NOT NULL, previous_price INTEGER, price_changed_at REAL);"
+                "CREATE TABLE IF NOT EXISTS price_history ("
+                "url TEXT NOT NULL, price_value INTEGER, seen_at REAL NOT NULL);"
+                "CREATE INDEX IF NOT EXISTS listings_price ON listings (price_value);"
+                "CREATE INDEX IF NOT EXISTS listings_rooms ON listings (rooms, price_value);"
+                "CREATE INDEX IF NOT EXISTS listings_address ON listings (address_key);"
+                "CREATE INDEX IF NOT EXISTS listings_price_change ON listings (price_changed_at);"
+                "CREATE INDEX IF NOT EXISTS price_history_url ON price_history (url, seen_at);"
+            )
+
+    def save(self, apartments: Iterable[aparts.Apartment], seen_at: Optional[float] = None) -> int:
+        """
+        Saves listings of the single crawl in one transaction.
+        Price is saved into the history when the listing is new or its price differs from the stored one.
+
+        :param apartments: parsed apartments, apartments without url are skipped.
+        :param seen_at: time of the crawl as a unix timestamp, by default current time.
+        :return: amount of saved listings.
+        """
+        seen_at = seen_at or time.time()
+        rows = list({
+            apartment.url: (apartment.url, apartment.get_site().name, apartment.name, apartment.price,
+                            apartment.price_value, apartment.currency, apartment.period,
+                            aparts.parse_rooms(apartment.name), apartment.address,
+                            normalize_text(apartment.address) or None, apartment.additional_info, seen_at)
+            for apartment in apartments if apartment.url
+        }.values())
+
+        with self._connection:
+            self._connection.executemany(
+                "INSERT INTO price_history (url, price_value, seen_at) SELECT ?, ?, ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM listings WHERE url = ? AND price_value IS ?)",
+                [(row[0], row[4], seen_at, row[0], row[4]) for row in rows]
+            )
+            self._connection.executemany(
+                "INSERT INTO listings (url, site, name, price, price_value, currency, period, rooms, address, "
+                "address_key, additional_info, first_seen, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?12, ?12) "
+                "ON CONFLICT (url) DO UPDATE SET "
+                "name = excluded.name, price = excluded.price, currency = excluded.currency, "
+                "period = excluded.period, rooms = excluded.rooms, address = excluded.address, "
+                "address_key = excluded.address_key, "
+                "additional_info = coalesce(excluded.additional_info, listings.additional_info), "
+                "last_seen = excluded.last_seen, "
+                "previous_price = CASE WHEN listings.price_value IS excluded.price_value "
+                "THEN listings.previous_price ELSE listings.price_value END, "
+                "price_changed_at = CASE WHEN listings.price_value IS excluded.price_value "
+                "THEN listings.price_changed_at ELSE excluded.last_seen END, "
+                "price_value = excluded.price_value",
+                rows
+            )
+        return len(rows)
+
+    def query(self,
+              min_price: Optional[int] = None,
+              max_price: Optional[int] = None,
+              rooms: Optional[list[int]] = None,
+              address: Optional[str] = None,
+              dropped_since: Optional[float] = None,
+              limit: Optional[int] = None) -> list[dict[str, Optional[Any]]]:
+        """
+        Gets stored listings which match all given conditions, cheapest first.
+
+        :param min_price: minimal price.
+        :param max_price: maximal price.
+        :param rooms: amounts of rooms, where 0 is a studio.
+        :param address: beginning of the address, case and "ё" are ignored.
+        :param dropped_since: unix timestamp, if it is given only listings whose price was lowered after it match.
+        :param limit: maximum amount of listings.
+        :return: list of listings' dictionaries with the same keys as the table's columns.
+        """
+        statement, parameters = self._make_query(min_price, max_price, rooms, address, dropped_since, limit)
+        return [dict(zip(_LISTING_COLUMNS, row)) for row in self._connection.execute(statement, parameters)]
+
+    def explain(self, **conditions) -> list[str]:
+        """
+        Gets SQLite's plan of the query with the given conditions, which shows the indexes it uses.
+
+        :param conditions: keyword arguments of `query`.
+        :return: list of the plan's steps.
+        """
+        statement, parameters = self._make_query(**conditions)
+        return [row[-1] for row in self._connection.execute("EXPLAIN QUERY PLAN " + statement, parameters)]
+
+    @staticmethod
+    def _make_query(min_price: Optional[int] = None,
+                    max_price: Optional[int] = None,
+                    rooms: Optional[list[int]] = None,
+                    address: Optional[str] = None,
+                    dropped_since: Optional[float] = None,
+                    limit: Optional[int] = None) -> tuple[str, list[Any]]:
+        """
+        Private method which makes SQL statement of `query`.
+
+        :return: tuple of the statement and its parameters.
+        """
+        conditions = list()
+        parameters = list()
+
+        if min_price is not None:
+            conditions.append("price_value >= ?")
+            parameters.append(min_price)
+
+        if max_price is not None:
+            conditions.append("price_value <= ?")
+            parameters.append(max_price)
+
+        if rooms:
+            conditions.append(f"rooms IN ({', '.join('?' * len(rooms))})")
+            parameters.extend(rooms)
+
+        if address:
+            key = normalize_text(address)
+            conditions.append("address_key >= ? AND address_key < ?")
+            parameters.extend([key, key + "\U0010ffff"])
+
+        if dropped_since is not None:
+            conditions.append("price_changed_at >= ? AND price_value < previous_price")
+            parameters.append(dropped_since)
+
+        statement = f"SELECT {', '.join(_LISTING_COLUMNS)} FROM listings"
+
+        if conditions:
+            statement += " WHERE " + " AND ".join(conditions)
+
+        statement += " ORDER BY price_value"
+
+        if limit is not None:
+            statement += " LIMIT ?"
+            parameters.append(limit)
+
+        return statement, parameters
+
+    def get_price_history(self, url: str) -> list[tuple[float, Optional[int]]]:
+        """
+        Gets all prices of the listing.
+
+        :return: list of tuples, where the first value is a unix timestamp and the second one is a price.
+        """
+        return list(self._connection.execute(
+            "SELECT seen_at, price_value FROM price_history WHERE url = ? ORDER BY seen_at", (url,)
+        ))
+
+    def get_all_price_history(self, since: Optional[float] = None) -> list[tuple[str, float, Optional[int]]]:
+        """
+        Gets prices of all listings, e.g. for the market analytics.
+
+        :param since: unix timestamp, prices which were seen before it are skipped.
+        :return: list of tuples of the url, unix timestamp and price, ordered by url and time.
+        """
+        return list(self._connection.execute(
+            "SELECT url, seen_at, price_value FROM price_history WHERE seen_at >= ? ORDER BY url, seen_at",
+            (since or 0,)
+        ))
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT count(*) FROM listings").fetchone()[0]
+
+    def close(self):
+        self._connection.close()
+
+
+_listing_store: Optional[ListingStore] = None
+
+
+def get_listing_store() -> ListingStore:
+    """
+    Gets store of the listings shared by all requests of the process.
+
+    :return: `ListingStore` object.
+    """
+    global _listing_store
+
+    if _listing_store is None:
+        _listing_store = ListingStore(get_default_cache_path("listings.sqlite3"))
+    return _listing_store
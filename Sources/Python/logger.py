@@ -1,11 +1,29 @@
 from datetime import datetime
+import atexit
+import enum
+import os
+import queue
+import threading
+import time
 import utils
 
 
+class Level(enum.IntEnum):
+    """
+    Object represents importance of the log's record.
+    """
+    debug = 10
+    info = 20
+    warning = 30
+    error = 40
+
+
 class _Logger:
     """
     Abstract base class which should be inherited to represent a new Logger system
     """
+    level: Level = Level.info
+
     @staticmethod
     def out(data: utils.Any):
         """
@@ -15,15 +33,53 @@ class _Logger:
         """
         pass
 
+    @classmethod
+    def is_enabled(cls, level: Level) -> bool:
+        """
+        Checks whether records of the given level are logged.
+        """
+        return level >= cls.level
+
+    @classmethod
+    def log(cls, level: Level, message: str, *args):
+        """
+        Logs the message if its level is enabled.
+        Message is formatted with `str.format` only when it is logged, so disabled records cost nothing.
+
+        :param level: level of the record.
+        :param message: message or format string.
+        :param args: positional arguments of the format string.
+        """
+        if level >= cls.level:
+            cls.out(message.format(*args) if args else message)
+
     @staticmethod
     def take_time_stamp() -> str:
         """
         Gets time current time stamp in the following format: 01-12-2021 10:37:40.
-        Method can be used in logging system.
+        Method can be used in logging system. Stamp is formatted once per second.
 
         :return: current date and time as a sting
         """
-        return datetime.now().strftime("%d-%M-%Y %H:%M:%S")
+        return _format_time(time.time())
+
+
+_time_stamp: tuple[int, str] = (-1, "")
+
+
+def _format_time(seconds: float) -> str:
+    """
+    Private method which formats the time, the last formatted second is reused.
+    """
+    global _time_stamp
+
+    second = int(seconds)
+    cached_second, stamp = _time_stamp
+
+    if second != cached_second:
+        stamp = datetime.fromtimestamp(second).strftime("%d-%m-%Y %H:%M:%S")
+        _time_stamp = (second, stamp)
+    return stamp
 
 
 class StandardCLLogger(_Logger):
@@ -34,3 +90,182 @@ class StandardCLLogger(_Logger):
     def out(data: utils.Any):
         current_time = _Logger.take_time_stamp()
         print(f"[{current_time}]: {data}")
+
+
+class SilentLogger(_Logger):
+    """
+    Logger which drops all logs
+    """
+    level = Level.error + 1
+
+    @staticmethod
+    def out(data: utils.Any):
+        pass
+
+
+class AsyncFileLogger(_Logger):
+    """
+    Logger which writes logs into the rotating file from the background thread.
+    Records are formatted by the caller, so they keep the values of the arguments at the moment of logging,
+    and put into the bounded queue. The writer adds time stamps and writes them in batches.
+    If the queue is full the record is dropped instead of blocking the caller, dropped records are counted.
+    """
+    _stop = object()
+
+    path: str
+    level: Level
+    dropped: int
+    _max_bytes: int
+    _backup_count: int
+    _batch_size: int
+    _queue: queue.Queue
+    _thread: threading.Thread
+
+    def __init__(self,
+                 path: str,
+                 level: Level = Level.info,
+                 max_bytes: int = 1024 * 1024,
+                 backup_count: int = 3,
+                 queue_size: int = 10000,
+                 batch_size: int = 256):
+        """
+        :param path: path of the log's file.
+        :param level: minimal level of the logged records.
+        :param max_bytes: size of the file after which it is rotated.
+        :param backup_count: amount of the rotated files which are kept as `path.1`, `path.2` and so on.
+        :param queue_size: maximum amount of records waiting for the writer.
+        :param batch_size: maximum amount of records written at once.
+        """
+        self.path = path
+        self.level = level
+        self.dropped = 0
+        self._max_bytes = max_bytes
+        self._backup_count = backup_count
+        self._batch_size = batch_size
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._write_records, name="AsyncFileLogger", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def is_enabled(self, level: Level) -> bool:
+        return level >= self.level
+
+    def out(self, data: utils.Any):
+        self.log(Level.info, "{}", data)
+
+    def log(self, level: Level, message: str, *args):
+        if level < self.level:
+            return
+
+        try:
+            text = message.format(*args) if args else message
+        except Exception as e:
+            text = f"{message} {args} (formatting failed: {e})"
+
+        try:
+            self._queue.put_nowait((time.time(), level, text))
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """
+        Waits until all queued records are written.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Writes queued records and stops the writer.
+        """
+        if not self._thread.is_alive():
+            return
+
+        self._queue.put(self._stop)
+        self._thread.join()
+
+    def _write_records(self):
+        file = open(self.path, "a", encoding="utf-8")
+
+        try:
+            while True:
+                records = [self._queue.get()]
+
+                while len(records) < self._batch_size:
+                    try:
+                        records.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                is_stopped = records[-1] is self._stop
+                lines = [self._format(record) for record in records if record is not self._stop]
+
+                if lines:
+                    if file.tell() >= self._max_bytes:
+                        file.close()
+                        self._rotate()
+                        file = open(self.path, "a", encoding="utf-8")
+
+                    file.write("".join(lines))
+                    file.flush()
+
+                for _ in records:
+                    self._queue.task_done()
+
+                if is_stopped:
+                    return
+        finally:
+            file.close()
+
+    @staticmethod
+    def _format(record: tuple) -> str:
+        created, level, text = record
+        return f"[{_format_time(created)}] {level.name.upper()}: {text}\n"
+
+    def _rotate(self):
+        """
+        Renames the file to `path.1`, the previous rotated files are shifted, the oldest one is removed.
+        """
+        for index in range(self._backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+
+        if self._backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+log_variable = "APARTS_FINDER_LOG"
+log_level_variable = "APARTS_FINDER_LOG_LEVEL"
+_default_logger = None
+
+
+def get_default_logger() -> utils.Logger:
+    """
+    Gets logger of the requests configured by the environment variables.
+    `APARTS_FINDER_LOG` is a path of the log's file, if it is not set logs are printed into the terminal.
+    `APARTS_FINDER_LOG_LEVEL` is a name of the minimal `Level`, by default it is "info".
+    Unknown name of the level raises `ValueError`.
+
+    :return: shared `AsyncFileLogger` or `StandardCLLogger`.
+    """
+    global _default_logger
+
+    if _default_logger is None:
+        path = os.environ.get(log_variable)
+        level_name = os.environ.get(log_level_variable, Level.info.name)
+
+        try:
+            level = Level[level_name.lower()]
+        except KeyError:
+            raise ValueError(f"Unknown log level {level_name!r} in {log_level_variable}, "
+                             f"expected one of {', '.join(level.name for level in Level)}") from None
+
+        if path:
+            _default_logger = AsyncFileLogger(path, level)
+        else:
+            StandardCLLogger.level = level
+            _default_logger = StandardCLLogger
+    return _default_logger
@@ -1,26 +1,56 @@
-from selenium import webdriver
-from selenium.webdriver.safari.webdriver import WebDriver
+from selenium.webdriver.remote.webdriver import WebDriver
 from selenium.webdriver.common.by import By
-from logger import StandardCLLogger
-from utils import Any, Logger, Optional
+from logger import Level, SilentLogger, get_default_logger
+from drivers import DriverFactory
+from session_pool import Session, get_session_pool
+from waits import Waiter, probe
+from cache import ResultCache, get_default_cache_path
+from http_parser import HttpSiteParser
+from enrichment import DetailsEnricher, get_details_cache
+from listing_store import get_listing_store
+from tracing import Tracer
+from archive import PageArchive, get_page_archive
+from typing import Callable, Iterator
+from utils import Any, Logger, Optional, get_process_context, with_query
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from urllib.parse import urlsplit
 import configurations as config
+import contextlib
 import apartments as aparts
+import columnar
+import enum
 import json
 import time
 
 
+class Backend(enum.Enum):
+    """
+    Object represents ways of getting apartments from the web site.
+    """
+    browser = "browser"
+    http = "http"
+
+
 class ParserDelegate:
     """
     Object helps in logging different events while parsing the apartments.
     """
     _logger: Optional[Logger]
+    _tracer: Optional[Tracer]
 
-    def __init__(self, logger: Optional[Logger] = None):
+    def __init__(self, logger: Optional[Logger] = None, tracer: Optional[Tracer] = None):
         self._logger = logger
+        self._tracer = tracer
 
     def get_logger(self) -> Logger:
         return self._logger
 
+    def get_tracer(self) -> Optional[Tracer]:
+        """
+        Gets tracer which collects timings of the parsing phases, if None nothing is measured.
+        """
+        return self._tracer
+
     def web_driver_was_configured(self, web_driver: WebDriver):
         self._logger.out(f"Web driver was configured with: {web_driver}")
 
@@ -36,89 +66,367 @@ class ParserDelegate:
     def configuration_was_completed(self):
         self._logger.out("Configuration was completed")
 
+    def search_url_was_restored(self, url: str):
+        self._logger.out(f"Search url was restored: {url}")
+
+    def search_url_was_invalidated(self, url: str):
+        self._logger.out(f"Search url doesn't match the configuration anymore: {url}")
+
     def starting_parsing_apartments(self):
         self._logger.out("Starting parsing apartments")
 
     def apartment_was_parsed(self, apartment: aparts.Apartment):
-        self._logger.out(f"Apartment was parsed: {apartment}".encode("ascii", "replace"))
+        self._logger.log(Level.debug, "Apartment was parsed: {}", apartment)
+
+    def page_was_parsed(self, page: int, apartments_count: int):
+        self._logger.out(f"Page {page} was parsed with {apartments_count} apartments")
+
+    def all_apartments_were_parsed(self, apartments: list[aparts.Apartment], pages: int):
+        self._logger.out(f"All apartments were parsed.\nApartments parsed: {len(apartments)}\nPages seen: {pages}")
+        self._logger.log(Level.debug, "Parsed apartments: {}", apartments)
+
+    def job_was_completed(self, job: "Job", apartments_count: int, elapsed: float):
+        self._logger.out(f"{job} was completed in {elapsed:.2f}s with {apartments_count} apartments")
+
+    def job_was_failed(self, job: "Job", error: Exception, elapsed: float):
+        self._logger.out(f"{job} was failed in {elapsed:.2f}s: {error}")
+
+    def cache_was_hit(self, key: str, is_stale: bool, hits: int, misses: int):
+        state = "stale" if is_stale else "fresh"
+        self._logger.out(f"Cache was hit with {state} result of {key}, hits: {hits}, misses: {misses}")
+
+    def cache_was_missed(self, key: str, hits: int, misses: int):
+        self._logger.out(f"Cache was missed for {key}, hits: {hits}, misses: {misses}")
 
-    def all_apartments_were_parsed(self, apartments: aparts.Apartment, pages: int):
-        self._logger.out(f"All apartments were parsed.\nApartments parsed: {apartments}\nPages seen: {pages}".encode("ascii", "replace"))
+    def details_were_enriched(self, enriched_count: int, apartments_count: int, elapsed: float):
+        self._logger.out(f"Details of {enriched_count} from {apartments_count} apartments were enriched in {elapsed:.2f}s")
+
+    def duplicates_were_merged(self, merged_count: int, apartments_count: int, elapsed: float):
+        self._logger.out(f"{merged_count} duplicates from {apartments_count} apartments were merged in {elapsed:.2f}s")
+
+    def incremental_crawl_was_finished(self, report: "CrawlReport"):
+        self._logger.out(f"Incremental crawl was finished: {report}")
+
+    def page_was_not_archived(self, page: int, error: Exception):
+        self._logger.log(Level.warning, "Page {} wasn't archived: {}", page, error)
+
+    def trace_was_exported(self, path: str):
+        self._logger.out(f"Trace was exported to {path}")
 
     def parser_was_deallocated(self):
         self._logger.out("Parser was deallocated")
 
     def error_was_thrown(self, error: Exception):
-        self._logger.out(f"Error occur: {error}")
+        self._logger.log(Level.error, "Error occur: {}", error)
+
+
+class JobDelegate(ParserDelegate):
+    """
+    Collects errors of the job, e.g. the one which is run in the worker process, other events are not logged.
+    """
+    errors: list[Exception]
+
+    def __init__(self):
+        super().__init__(logger=SilentLogger)
+        self.errors = list()
+
+    def error_was_thrown(self, error: Exception):
+        self.errors.append(error)
+
+
+class Job:
+    """
+    Single search of the batch request: configuration which should be applied to the site.
+    `base_url` replaces site's url for the http backend, so a mirror of the site can be parsed.
+    """
+    configuration: config.Configurations
+    site: aparts.ApartmentsSite
+    backend: Backend
+    base_url: Optional[str]
+
+    def __init__(self,
+                 configuration: config.Configurations,
+                 site: aparts.ApartmentsSite,
+                 backend: Backend = Backend.browser,
+                 base_url: Optional[str] = None):
+        self.configuration = configuration
+        self.site = site
+        self.backend = backend
+        self.base_url = base_url
+
+    def __repr__(self):
+        return f"Job({self.site.name}, {self.backend.value}, price={self.configuration.price}, " \
+               f"rooms={self.configuration.rooms}, location={self.configuration.location})"
+
+
+_NO_SPAN = contextlib.nullcontext()
 
 
 class SiteParser:
     """
     Configures, filters and parses the apartments from the given web site.
+    Phases of parsing are timed if the delegate has a tracer.
     """
     _configuration: config.Configurations
     _site: aparts.ApartmentsSite
-    _driver: WebDriver
-    _delegate: Optional[ParserDelegate]
+    _web_driver: Optional[WebDriver] = None
+    _driver_factory: DriverFactory
+    _owns_driver: bool = False
+    _session: Optional[Session] = None
+    _waiter: Optional[Waiter] = None
+    _delegate: Optional[ParserDelegate] = None
+    _tracer: Optional[Tracer] = None
+    _url_cache: Optional[ResultCache] = None
+    _archive: Optional[PageArchive] = None
+    _batch_extraction: bool
+    _pages_seen: int
+    _is_interrupted: bool = False
 
     def __init__(self,
                  configuration: config.Configurations,
                  site: aparts.ApartmentsSite,
                  delegate: Optional[ParserDelegate] = None,
-                 web_driver: WebDriver = webdriver.Safari()):
+                 web_driver: Optional[WebDriver] = None,
+                 batch_extraction: bool = True,
+                 driver_factory: Optional[DriverFactory] = None,
+                 session: Optional[Session] = None,
+                 url_cache: Optional[ResultCache] = None,
+                 archive: Optional[PageArchive] = None):
+        """
+        :param url_cache: cache of the search results' urls which were made by applying the configurations.
+        If it is given, filters of the known configuration are not configured on the web site again.
+        :param archive: archive where html of every parsed page is saved, so it can be parsed again without the site.
+        """
         self._configuration = configuration
         self._site = site
         self._delegate = delegate
-        self._setup_driver(web_driver)
+        self._tracer = delegate.get_tracer() if delegate else None
+        self._batch_extraction = batch_extraction
+        self._pages_seen = 0
+        self._driver_factory = driver_factory or DriverFactory.from_environment(site)
+
+        self._session = session
+        self._url_cache = url_cache
+        self._archive = archive
+
+        if session is not None:
+            self._setup_driver(session.driver)
+        elif web_driver is not None:
+            self._setup_driver(web_driver)
+
+    @property
+    def _driver(self) -> WebDriver:
+        """
+        Web driver of the parser. It is created by the driver factory on the first access,
+        unless it was given on initialization.
+        """
+        if self._web_driver is None:
+            self._setup_driver(self._driver_factory.create())
+            self._owns_driver = True
+
+        return self._web_driver
+
+    def _get_waiter(self) -> Waiter:
+        """
+        Gets waiter of the web driver, creating the driver if needed.
+        """
+        if self._waiter is None:
+            _ = self._driver
+
+        return self._waiter
 
     def _setup_driver(self, web_driver: WebDriver):
-        self._driver = web_driver
-        self._driver.set_window_size(1024, 768)
-        self._driver.implicitly_wait(15)
+        self._web_driver = web_driver
+
+        if self._tracer:
+            self._tracer.instrument(web_driver)
+
+        self._web_driver.set_window_size(1024, 768)
+        self._web_driver.implicitly_wait(0)
+        self._waiter = Waiter(web_driver, self._site.get_timeouts())
 
         if self._delegate:
             self._delegate.web_driver_was_configured(web_driver)
 
+    @property
+    def is_interrupted(self) -> bool:
+        """
+        Whether the last pagination stopped because a page couldn't be loaded, not because the last page was reached.
+        """
+        return self._is_interrupted
+
+    def _span(self, name: str, **args) -> contextlib.AbstractContextManager:
+        """
+        Measures time of the parsing phase, if there is no tracer nothing is measured.
+        """
+        return self._tracer.span(name, **args) if self._tracer else _NO_SPAN
+
     def __del__(self):
-        self._driver.close()
+        if self._web_driver is None or self._session is not None:
+            return
+
+        if self._owns_driver:
+            self._web_driver.quit()
+        else:
+            self._web_driver.close()
 
         if self._delegate:
             self._delegate.parser_was_deallocated()
 
-    def get_apartments(self) -> list[aparts.Apartment]:
+    def get_apartments(self, max_pages: Optional[int] = None, max_items: Optional[int] = None) -> list[aparts.Apartment]:
         """
-        Gets list of apartments.
+        Gets list of apartments from all pages of the search results.
         Method have to be called before setting the configuration, other wise behavior is unexpected.
 
+        :param max_pages: maximum amount of pages to parse, if None all pages are parsed.
+        :param max_items: maximum amount of apartments to parse, if None all apartments are parsed.
         :return: list of apartments.
         """
+        list_of_apartments = list(self.iter_apartments(max_pages, max_items))
+
+        if self._delegate:
+            self._delegate.all_apartments_were_parsed(list_of_apartments, self._pages_seen)
+
+        return list_of_apartments
+
+    def iter_apartments(self,
+                        max_pages: Optional[int] = None,
+                        max_items: Optional[int] = None,
+                        should_stop: Optional[Callable[[aparts.Apartment], bool]] = None) -> Iterator[aparts.Apartment]:
+        """
+        Lazily gets apartments page by page. Next page is loaded while the current one is being consumed.
+        Method have to be called before setting the configuration, other wise behavior is unexpected.
+
+        :param max_pages: maximum amount of pages to parse, if None all pages are parsed.
+        :param max_items: maximum amount of apartments to yield, if None all apartments are yielded.
+        :param should_stop: predicate which is called for every apartment before it is yielded.
+        If it returns True iteration stops and the apartment is not yielded.
+        :return: iterator over apartments.
+        """
         if self._delegate:
             self._delegate.starting_parsing_apartments()
 
-        list_of_web_elements = self._get_list_of_web_elements()
+        items_count = 0
+
+        if max_items is not None and max_items <= 0:
+            return
+
+        for list_of_apartments in self.iter_pages(max_pages):
+            for apartment in list_of_apartments:
+                if should_stop and should_stop(apartment):
+                    return
+
+                yield apartment
+                items_count += 1
+
+                if max_items is not None and items_count >= max_items:
+                    return
+
+    def iter_pages(self, max_pages: Optional[int] = None) -> Iterator[list[aparts.Apartment]]:
+        """
+        Lazily parses pages of the search results starting from the current one.
+        While the parsed page is being consumed, the next page is loaded in the background.
+        Web driver is never used by two threads at the same time.
+        If a page can't be loaded or a page after the first one has no apartments, e.g. it is a captcha,
+        iteration stops and `is_interrupted` is True.
+
+        :param max_pages: maximum amount of pages to parse, if None all pages are parsed.
+        :return: iterator over lists of apartments, where each list represents a single page.
+        """
+        self._pages_seen = 0
+        self._is_interrupted = False
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            while max_pages is None or self._pages_seen < max_pages:
+                with self._span("page", page=self._pages_seen + 1):
+                    list_of_web_elements = self._get_list_of_web_elements()
 
-        if not list_of_web_elements:
+                    if not list_of_web_elements:
+                        self._is_interrupted = self._is_interrupted or self._pages_seen > 0
+                        return
+
+                    if self._archive is not None:
+                        self._archive_page(self._pages_seen + 1)
+
+                    is_last_page = max_pages is not None and self._pages_seen + 1 >= max_pages
+                    next_page_url = None if is_last_page else self._get_next_page_url()
+                    list_of_apartments = self._get_list_of_apartments(list_of_web_elements)
+                    del list_of_web_elements
+
+                self._pages_seen += 1
+
+                if self._delegate:
+                    self._delegate.page_was_parsed(self._pages_seen, len(list_of_apartments))
+
+                prefetch = executor.submit(self._load_page, next_page_url) if next_page_url else None
+
+                try:
+                    yield list_of_apartments
+                finally:
+                    if prefetch:
+                        wait([prefetch])
+
+                if not prefetch:
+                    return
+
+                if prefetch.exception():
+                    self._is_interrupted = True
+
+                    if self._delegate:
+                        self._delegate.error_was_thrown(prefetch.exception())
+                    return
+
+    def _archive_page(self, page: int):
+        """
+        Saves html of the current page into the archive. Page which can't be saved is skipped,
+        it isn't an error of parsing.
+
+        :param page: number of the page starting from 1.
+        """
+        try:
+            with self._span("archive", page=page):
+                self._archive.save(self._driver.page_source, self._site, self._driver.current_url,
+                                   self._configuration.get_key(), page)
+        except Exception as e:
             if self._delegate:
-                self._delegate.all_apartments_were_parsed(list_of_web_elements, 1)
-            return []
+                self._delegate.page_was_not_archived(page, e)
 
-        list_of_apartments = self._get_list_of_apartments(list_of_web_elements)
+    def _load_page(self, url: str):
+        """
+        Loads the page of the search results in the background.
+        """
+        with self._span("prefetch", url=url):
+            self._driver.get(url)
 
-        if self._delegate:
-            self._delegate.all_apartments_were_parsed(list_of_apartments, 1)
+    def _get_next_page_url(self) -> Optional[str]:
+        """
+        Gets url of the next page of the search results.
 
-        return list_of_apartments
+        :return: url as a string or None if current page is the last one.
+        """
+        try:
+            link = probe(self._driver, By.XPATH, self._site.get_next_page())
+            return link.get_attribute("href") if link else None
+        except Exception as e:
+            self._is_interrupted = True
+
+            if self._delegate:
+                self._delegate.error_was_thrown(e)
+            return None
 
     def _get_list_of_web_elements(self) -> list:
         """
         Gets list of web elements where each element represents a single apartment's element.
+        Waits for elements to appear, if there are no elements in time the page is considered empty.
 
         :return: list of web elements.
         """
         try:
-            list_of_web_elements = self._driver.find_elements(By.CLASS_NAME, self._site.get_list_of_apartments())
+            list_of_web_elements = self._get_waiter().elements_present(By.CLASS_NAME, self._site.get_list_of_apartments())
             return list_of_web_elements
         except Exception as e:
+            self._is_interrupted = True
+
             if self._delegate:
                 self._delegate.error_was_thrown(e)
             return []
@@ -127,14 +435,32 @@ class SiteParser:
         """
         Gets list of apartments from the given web elements.
 
+        If batch extraction is enabled all apartments are extracted in a single web driver's round trip,
+        otherwise every field of every apartment is requested separately.
+
         :param list_of_web_elements: list of web elements. Each element represents an apartment.
         :return: list of apartments which were parsed from the web elements.
         """
+        logger = self._delegate.get_logger() if self._delegate else None
+
+        if self._batch_extraction:
+            try:
+                with self._span("extract_all", count=len(list_of_web_elements)):
+                    list_of_apartments = aparts.Apartment.extract_all(self._driver, list_of_web_elements, self._site)
+
+                if self._delegate:
+                    for apartment in list_of_apartments:
+                        self._delegate.apartment_was_parsed(apartment)
+                return list_of_apartments
+            except Exception as e:
+                if self._delegate:
+                    self._delegate.error_was_thrown(e)
+
         list_of_apartments = list()
 
         for element in list_of_web_elements:
-            logger = self._delegate.get_logger() if self._delegate else None
-            apartment = aparts.Apartment(element, self._site, logger)
+            with self._span("apartment"):
+                apartment = aparts.Apartment(element, self._site, logger)
             list_of_apartments.append(apartment)
 
             if self._delegate:
@@ -144,15 +470,31 @@ class SiteParser:
     def set_config(self) -> bool:
         """
         Applies given config to the web site.
+        If the search url of the same config is cached, it is loaded instead of configuring filters.
+        Otherwise, the url of the filtered results is cached when the config is applied.
 
         :return: True if configurations were set without errors, otherwise False
         """
         try:
+            if self._restore_search_url():
+                if self._delegate:
+                    self._delegate.configuration_was_completed()
+
+                return True
+
             self._set_website()
-            self._set_rooms()
-            self._set_price()
 
-            self.apply_config()
+            with self._span("set_rooms"):
+                self._set_rooms()
+
+            with self._span("set_price"):
+                self._set_price()
+
+            with self._span("apply_config"):
+                is_applied = self.apply_config()
+
+            if is_applied and self._url_cache:
+                self._url_cache.put(self._get_search_url_key(), self._driver.current_url)
 
             if self._delegate:
                 self._delegate.configuration_was_completed()
@@ -165,12 +507,53 @@ class SiteParser:
 
             return False
 
+    def _get_search_url_key(self) -> str:
+        return f"{self._site.name}:{self._configuration.get_key()}"
+
+    def _restore_search_url(self) -> bool:
+        """
+        Loads cached search url of the configuration. Url which was redirected to another page
+        or which has no search results anymore is removed from the cache.
+
+        :return: True if the filtered search results were loaded, otherwise False.
+        """
+        cached = self._url_cache.get(self._get_search_url_key()) if self._url_cache else None
+
+        if cached is None:
+            return False
+
+        url = cached[0]
+
+        with self._span("navigation", url=url):
+            self._driver.get(url)
+
+        results = probe(self._driver, By.CLASS_NAME, self._site.get_list_of_apartments())
+
+        if results is not None and urlsplit(self._driver.current_url).path == urlsplit(url).path:
+            if self._delegate:
+                self._delegate.search_url_was_restored(url)
+            return True
+
+        self._url_cache.remove(self._get_search_url_key())
+
+        if self._delegate:
+            self._delegate.search_url_was_invalidated(url)
+
+        if self._session is not None:
+            self._driver.get(self._session.category_url)
+        return False
+
     def _set_website(self):
         """
         Configures given web site and necessary category.
+        Warm session has already loaded the category, so nothing is done.
         """
-        self._driver.get(self._site.value)
-        self._set_category()
+        if self._session is None:
+            with self._span("navigation", url=self._site.value):
+                self._driver.get(self._site.value)
+
+            with self._span("set_category"):
+                self._set_category()
 
         if self._delegate:
             self._delegate.web_site_was_configured(self._site.value)
@@ -180,7 +563,7 @@ class SiteParser:
         Configures long renting on the web site.
         """
         needed_category_path = self._site.get_category()
-        needed_category = self._driver.find_element(By.XPATH, needed_category_path)
+        needed_category = self._get_waiter().element_clickable(By.XPATH, needed_category_path)
         needed_category.click()
 
     def _set_rooms(self):
@@ -192,7 +575,7 @@ class SiteParser:
 
         if len(self._configuration.rooms) == 0:
             radio_button_path = self._site.get_rooms()[0]
-            radio_button = self._driver.find_element(By.XPATH, radio_button_path)
+            radio_button = self._get_waiter().element_clickable(By.XPATH, radio_button_path)
             radio_button.click()
 
             if self._delegate:
@@ -201,7 +584,7 @@ class SiteParser:
 
         for number_of_rooms in self._configuration.rooms:
             radio_button_path = self._site.get_rooms()[number_of_rooms]
-            radio_button = self._driver.find_element(By.XPATH, radio_button_path)
+            radio_button = self._get_waiter().element_clickable(By.XPATH, radio_button_path)
             radio_button.click()
 
         if self._delegate:
@@ -215,31 +598,52 @@ class SiteParser:
             return
 
         lower_bound_path, upper_bound_path = self._site.get_price()
-        lower_bound = self._driver.find_element(By.XPATH, lower_bound_path)
+        lower_bound = self._get_waiter().element_present(By.XPATH, lower_bound_path)
         lower_bound.send_keys(str(self._configuration.price.start))
-        upper_bound = self._driver.find_element(By.XPATH, upper_bound_path)
+        upper_bound = self._get_waiter().element_present(By.XPATH, upper_bound_path)
         upper_bound.send_keys(str(self._configuration.price.stop))
 
         if self._delegate:
             self._delegate.price_was_set(self._configuration.price)
 
-    def apply_config(self):
+    def sort_by_newest(self):
+        """
+        Sorts search results from the newest to the oldest.
+        Method have to be called after setting the configuration.
+        """
+        name, value = self._site.get_newest_first_parameter()
+
+        with self._span("sort_by_newest"):
+            self._driver.get(with_query(self._driver.current_url, {name: value}))
+
+    def apply_config(self) -> bool:
         """
-        Applies configuration on the web site.
+        Applies configuration on the web site and waits until the old results are replaced by the filtered ones.
+
+        :return: True if the results were refreshed in time, otherwise False.
         """
+        results_class = self._site.get_list_of_apartments()
+        old_result = probe(self._driver, By.CLASS_NAME, results_class)
+
         apply_button = self._site.get_apply_button()
-        button = self._driver.find_element(By.XPATH, apply_button)
+        button = self._get_waiter().element_clickable(By.XPATH, apply_button)
         button.click()
 
-        time.sleep(5)
+        is_refreshed = self._get_waiter().results_refreshed(old_result, By.CLASS_NAME, results_class)
+
+        if not is_refreshed and self._delegate:
+            self._delegate.error_was_thrown(TimeoutError("Search results weren't refreshed after applying config"))
 
-    def deinit(self, timeout: float):
+        return is_refreshed
+
+    def deinit(self, timeout: float = 0):
         """
         Deinites the instance of current object and loges it.
 
-        :param timeout: time of timeout before deinitializing.
+        :param timeout: time of timeout before deinitializing, by default nothing is awaited.
         """
-        time.sleep(timeout)
+        if timeout > 0:
+            time.sleep(timeout)
         del self
 
 
@@ -277,25 +681,408 @@ def _make_config(json_data: str) -> config.Configurations:
     return configuration
 
 
-def request(json_data: str) -> str:
+def _run_job(job: Job) -> tuple[list[dict[str, Optional[Any]]], float, Optional[Exception]]:
+    """
+    Private method which gets apartments of the single job filtered by the configured location.
+    It is run in the worker process, so the parser owns its own web driver, which is quit when the job is done.
+
+    :param job: job to run.
+    :return: tuple of apartments' dictionaries, time spent on the job in seconds
+    and the error if nothing was parsed because of it.
+    """
+    start = time.perf_counter()
+    delegate = JobDelegate()
+    list_of_data = list()
+
+    try:
+        match job.backend:
+            case Backend.browser:
+                parser = SiteParser(job.configuration, job.site, delegate=delegate, archive=get_page_archive())
+            case Backend.http:
+                parser = HttpSiteParser(job.configuration, job.site, delegate=delegate, base_url=job.base_url,
+                                        archive=get_page_archive())
+
+        if parser.set_config():
+            list_of_apartments = _filter_by_location(parser.get_apartments(), job.configuration.location)
+            list_of_data = [apartment.as_dict() for apartment in list_of_apartments]
+    except Exception as e:
+        delegate.error_was_thrown(e)
+
+    error = delegate.errors[-1] if not list_of_data and delegate.errors else None
+    return list_of_data, time.perf_counter() - start, error
+
+
+def run_jobs(jobs: list[Job],
+             max_workers: int = 4,
+             delegate: Optional[ParserDelegate] = None,
+             deduplicate: bool = False) -> list[dict[str, Optional[Any]]]:
+    """
+    Runs jobs at the same time over the bounded pool of worker processes.
+    Failed jobs are reported to the delegate and skipped.
+
+    :param jobs: list of jobs.
+    :param max_workers: maximum amount of jobs which are run at the same time.
+    :param delegate: delegate which is notified about every completed or failed job.
+    :param deduplicate: whether reposts of the same apartment from all jobs are merged, see `Deduplicator`.
+    :return: merged list of apartments' dictionaries without duplicates, in the order of jobs.
+    """
+    results: list[list[dict[str, Optional[Any]]]] = [list() for _ in jobs]
+    workers = max(1, min(max_workers, len(jobs)))
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_process_context()) as executor:
+        futures = {executor.submit(_run_job, job): index for index, job in enumerate(jobs)}
+
+        for future in as_completed(futures):
+            index = futures[future]
+
+            try:
+                list_of_data, elapsed, error = future.result()
+            except Exception as e:
+                list_of_data, elapsed, error = list(), 0.0, e
+
+            if error is not None:
+                if delegate:
+                    delegate.job_was_failed(jobs[index], error, elapsed)
+                continue
+
+            results[index] = list_of_data
+
+            if delegate:
+                delegate.job_was_completed(jobs[index], len(list_of_data), elapsed)
+
+    merged = list()
+    sites = list()
+    seen = set()
+
+    for job, list_of_data in zip(jobs, results):
+        for data in list_of_data:
+            key = data["url"] or tuple((name, str(value)) for name, value in data.items())
+
+            if key not in seen:
+                seen.add(key)
+                merged.append(data)
+                sites.append(job.site)
+
+    if deduplicate:
+        import dedup
+        apartments = [aparts.Apartment.from_dict(data, site) for data, site in zip(merged, sites)]
+        merged = [apartment.as_dict() for apartment in dedup.Deduplicator(delegate=delegate).deduplicate(apartments)]
+
+    return merged
+
+
+def batch_request(json_data: str,
+                  max_workers: int = 4,
+                  backend: str = Backend.browser.value,
+                  deduplicate: bool = False) -> str:
+    """
+    Makes network requests for every combination of the given configs and sites at the same time.
+
+    :param json_data: json string with "configurations" list of configs in the same format as `request` takes
+    and optional "sites" list of `ApartmentsSite` names, by default all sites are used.
+    :param max_workers: maximum amount of worker processes, each of them owns its own web driver.
+    :param backend: raw value of the `Backend`.
+    :param deduplicate: whether reposts of the same apartment are merged into one with alternate urls.
+    :return: json string which represents merged list of apartments without duplicates.
+    """
+    data = _convert_json_to_dict(json_data)
+    sites = [aparts.ApartmentsSite[name] for name in data.get("sites", [])] or list(aparts.ApartmentsSite)
+    jobs = [
+        Job(config.Configurations(configuration), site, Backend(backend))
+        for configuration in data.get("configurations", [])
+        for site in sites
+    ]
+
+    list_of_data = run_jobs(jobs, max_workers, ParserDelegate(logger=get_default_logger()), deduplicate)
+    return json.dumps(list_of_data)
+
+
+def _get_apartments(configuration: config.Configurations,
+                    site: aparts.ApartmentsSite,
+                    backend: Backend,
+                    delegate: Optional[ParserDelegate],
+                    with_details: bool = False,
+                    save_listings: bool = False,
+                    deduplicate: bool = False) -> Optional[list[aparts.Apartment]]:
+    """
+    Private method which gets apartments from the site.
+
+    :param with_details: whether additional info of the apartments is filled from their own pages.
+    :param save_listings: whether apartments are saved into the shared listing store.
+    :param deduplicate: whether reposts of the same apartment are merged into one with alternate urls.
+    :return: list of apartments or None if configuration wasn't applied.
+    """
+    list_of_apartments = None
+
+    match backend:
+        case Backend.browser:
+            with get_session_pool(site).session() as session:
+                parser = SiteParser(configuration, site, delegate=delegate, session=session,
+                                    url_cache=get_search_url_cache(), archive=get_page_archive())
+
+                if parser.set_config():
+                    list_of_apartments = parser.get_apartments()
+                else:
+                    session.invalidate()
+
+        case Backend.http:
+            parser = HttpSiteParser(configuration, site, delegate=delegate, archive=get_page_archive())
+
+            if parser.set_config():
+                list_of_apartments = parser.get_apartments()
+
+    if list_of_apartments is None:
+        return None
+
+    list_of_apartments = _filter_by_location(list_of_apartments, configuration.location)
+
+    if deduplicate:
+        import dedup
+        list_of_apartments = dedup.Deduplicator(delegate=delegate).deduplicate(list_of_apartments)
+
+    if with_details:
+        DetailsEnricher(site, cache=get_details_cache(), delegate=delegate).enrich(list_of_apartments)
+
+    if save_listings:
+        get_listing_store().save(list_of_apartments)
+
+    return list_of_apartments
+
+
+def _filter_by_location(apartments: list[aparts.Apartment], location: Optional[str]) -> list[aparts.Apartment]:
+    """
+    Private method which drops the apartments which are located away from the configured location.
+    Location which is unknown to the bundled gazetteer doesn't filter anything and apartments
+    which the gazetteer can't locate are kept, because it lists only the main streets of the city.
+    """
+    if not location or not apartments:
+        return apartments
+
+    import geo
+    mask = geo.LocationFilter(apartment.address for apartment in apartments).match(location, keep_unknown=True)
+
+    if mask is None:
+        return apartments
+    return [apartment for apartment, matches in zip(apartments, mask) if matches]
+
+
+_result_cache: Optional[ResultCache] = None
+_search_url_cache: Optional[ResultCache] = None
+
+
+def get_result_cache() -> ResultCache:
+    """
+    Gets cache of the requests' results shared by all requests of the process.
+
+    :return: `ResultCache` object.
+    """
+    global _result_cache
+
+    if _result_cache is None:
+        _result_cache = ResultCache(get_default_cache_path("results.sqlite3"))
+    return _result_cache
+
+
+def get_search_url_cache() -> ResultCache:
+    """
+    Gets cache of the search urls of the applied configurations shared by all parsers of the process.
+    Urls are kept for a week, they are rebuilt earlier when the web site changes them.
+
+    :return: `ResultCache` object.
+    """
+    global _search_url_cache
+
+    if _search_url_cache is None:
+        _search_url_cache = ResultCache(get_default_cache_path("search_urls.sqlite3"),
+                                        ttl=7 * 24 * 60 * 60, stale_ttl=0, max_entries=1024)
+    return _search_url_cache
+
+
+def _make_request(json_data: str,
+                  backend: str,
+                  use_cache: bool,
+                  with_details: bool,
+                  save_listings: bool,
+                  deduplicate: bool,
+                  convert: Callable[[list[aparts.Apartment]], Any],
+                  result_format: str,
+                  should_cache: Callable[[Any], bool]) -> Optional[Any]:
+    """
+    Private method which makes network request and converts apartments into the result of the given format,
+    results of every format are cached separately.
+
+    :param convert: function which converts apartments into the result.
+    :param result_format: name of the result's format which is a part of the cache key.
+    :param should_cache: function which tells whether the result can be cached.
+    :return: result or None if configuration wasn't applied.
+    """
+    configuration = _make_config(json_data)
+    tracer = Tracer.from_environment()
+    parser_delegate = ParserDelegate(logger=get_default_logger(), tracer=tracer)
+    site = aparts.ApartmentsSite.avito
+
+    def compute() -> Optional[Any]:
+        list_of_apartments = _get_apartments(configuration, site, Backend(backend), parser_delegate, with_details,
+                                             save_listings, deduplicate)
+        return None if list_of_apartments is None else convert(list_of_apartments)
+
+    try:
+        if not use_cache:
+            return compute()
+
+        cache = get_result_cache()
+        cache.set_delegate(parser_delegate)
+        key = f"{site.name}:{configuration.get_key()}" + (":details" if with_details else "") + \
+            (":deduplicated" if deduplicate else "") + result_format
+        return cache.get_or_compute(key, compute, should_cache)
+    finally:
+        if tracer:
+            tracer.close()
+            parser_delegate.trace_was_exported(tracer.export())
+
+
+def request(json_data: str,
+            backend: str = Backend.browser.value,
+            use_cache: bool = True,
+            with_details: bool = False,
+            save_listings: bool = False,
+            deduplicate: bool = False) -> str:
     """
     Makes network request and gets apartments filtered by the given config.
 
     :param json_data: config as a json string.
-    :return: json string which represents list of apartments.
+    :param backend: raw value of the `Backend`. Browser backend configures filters on the web site
+    using warm sessions of the shared pool, http backend fetches search results directly and is much faster.
+    :param use_cache: whether recent results of the same config can be returned without a network request.
+    Empty results are not cached, because a crawl which timed out has no apartments as well.
+    :param with_details: whether additional info of the apartments is filled from their own pages.
+    All pages are on the site's host, which is rate limited, so every page which isn't cached adds
+    1 / `ApartmentsSite.get_requests_per_second()` seconds, e.g. 50 new listings of avito take about 25 seconds.
+    :param save_listings: whether parsed apartments are saved into the listing store with their price history.
+    Cached results are not saved again.
+    :param deduplicate: whether reposts of the same apartment with slightly different names and prices
+    are merged into one, which keeps urls of the others in "alternate_urls".
+    :return: json string which represents list of apartments, empty string if configuration wasn't applied.
     """
-    configuration = _make_config(json_data)
-    parser_delegate = ParserDelegate(logger=StandardCLLogger)
-    parser = SiteParser(configuration, aparts.ApartmentsSite.avito, delegate=parser_delegate)
+    json_result = _make_request(json_data, backend, use_cache, with_details, save_listings, deduplicate,
+                                _convert_apartments_to_json, "", lambda result: result != "[]")
+    return json_result or ""
 
-    json_data = ""
 
-    if parser.set_config():
-        apartments = parser.get_apartments()
-        json_data = _convert_apartments_to_json(apartments)
+def request_binary(json_data: str,
+                   backend: str = Backend.browser.value,
+                   use_cache: bool = True,
+                   with_details: bool = False,
+                   save_listings: bool = False,
+                   deduplicate: bool = False) -> bytes:
+    """
+    Makes the same network request as `request`, but apartments are encoded straight into the columnar binary buffer,
+    see `columnar.encode`, without json. Buffer supports the buffer protocol, so it can be read without copying it
+    into a string. Buffers are cached separately from json results.
 
-    parser.deinit(2.5)
-    return json_data
+    :return: buffer which `columnar.decode` decodes into the list of apartments.
+    :raises RuntimeError: if configuration wasn't applied, so it isn't mistaken for a search without results.
+    """
+    site = aparts.ApartmentsSite.avito
+    buffer = _make_request(json_data, backend, use_cache, with_details, save_listings, deduplicate,
+                           lambda list_of_apartments: columnar.encode(list_of_apartments, site), ":columnar",
+                           lambda result: columnar.get_rows_count(result) > 0)
+
+    if buffer is None:
+        raise RuntimeError(f"Configuration wasn't applied to {site.value}")
+    return buffer
+
+
+def _convert_apartment_to_ndjson(apartment: aparts.Apartment) -> str:
+    """
+    Private method which converts apartment's object into a single line of NDJSON.
+
+    :param apartment: apartment.
+    :return: json object followed by the new line.
+    """
+    return json.dumps(apartment.as_dict()) + "\n"
+
+
+def iter_job_pages(job: Job, delegate: Optional[ParserDelegate] = None) -> Iterator[list[aparts.Apartment]]:
+    """
+    Lazily gets apartments of the job page by page, every page is filtered by the configured location.
+    Browser backend uses a warm session of the shared pool, which is returned to the pool
+    when iteration is finished or closed.
+
+    :param job: job to run.
+    :param delegate: optional delegate of the parser.
+    :return: iterator over lists of apartments, where each list represents a single page.
+    """
+    location = job.configuration.location
+
+    match job.backend:
+        case Backend.browser:
+            with get_session_pool(job.site).session() as session:
+                parser = SiteParser(job.configuration, job.site, delegate=delegate, session=session,
+                                    url_cache=get_search_url_cache(), archive=get_page_archive())
+
+                if not parser.set_config():
+                    session.invalidate()
+                    return
+
+                for list_of_apartments in parser.iter_pages():
+                    yield _filter_by_location(list_of_apartments, location)
+
+        case Backend.http:
+            parser = HttpSiteParser(job.configuration, job.site, delegate=delegate, base_url=job.base_url,
+                                    archive=get_page_archive())
+
+            if parser.set_config():
+                for list_of_apartments in parser.iter_pages():
+                    yield _filter_by_location(list_of_apartments, location)
+
+
+def stream_job(job: Job, callback: Callable[[str], Any], delegate: Optional[ParserDelegate] = None) -> int:
+    """
+    Gets apartments of the job and passes them to the callback as soon as every page is parsed.
+
+    :param job: job to run.
+    :param callback: function which is called once per page with NDJSON records of all apartments of the page.
+    :param delegate: optional delegate of the parser.
+    :return: amount of passed apartments.
+    """
+    apartments_count = 0
+
+    for list_of_apartments in iter_job_pages(job, delegate):
+        if list_of_apartments:
+            callback("".join(map(_convert_apartment_to_ndjson, list_of_apartments)))
+            apartments_count += len(list_of_apartments)
+
+    return apartments_count
+
+
+def iter_request(json_data: str, backend: str = Backend.browser.value) -> Iterator[str]:
+    """
+    Makes network request and lazily gets apartments filtered by the given config as soon as they are parsed.
+    Results are not cached.
+
+    :param json_data: config as a json string.
+    :param backend: raw value of the `Backend`.
+    :return: iterator over NDJSON records, one line per apartment.
+    """
+    job = Job(_make_config(json_data), aparts.ApartmentsSite.avito, Backend(backend))
+
+    for list_of_apartments in iter_job_pages(job, ParserDelegate(logger=get_default_logger())):
+        yield from map(_convert_apartment_to_ndjson, list_of_apartments)
+
+
+def stream_request(json_data: str, callback: Callable[[str], Any], backend: str = Backend.browser.value) -> int:
+    """
+    Makes network request and passes apartments filtered by the given config to the callback page by page.
+    Results are not cached.
+
+    :param json_data: config as a json string.
+    :param callback: function which is called once per page with NDJSON records of all apartments of the page.
+    :param backend: raw value of the `Backend`.
+    :return: amount of passed apartments.
+    """
+    job = Job(_make_config(json_data), aparts.ApartmentsSite.avito, Backend(backend))
+    return stream_job(job, callback, ParserDelegate(logger=get_default_logger()))
 
 
 if __name__ == "__main__":
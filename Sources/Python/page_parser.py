@@ -0,0 +1,207 @@
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+from utils import Any, Optional
+import apartments as aparts
+
+
+_VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr"
+}
+
+
+class _Field:
+    """
+    Field of the apartment which is being read from the currently opened element.
+    """
+    key: str
+    depth: int
+    text: list[str]
+
+    def __init__(self, key: str, depth: int):
+        self.key = key
+        self.depth = depth
+        self.text = list()
+
+
+class PageParser(HTMLParser):
+    """
+    Parses apartments from the html source of the search results page without a browser.
+    Uses the same html classes as the browser based parsing, see `ApartmentsSite.get_apartments_fields`.
+    """
+    _site: aparts.ApartmentsSite
+    _base_url: str
+    _depth: int
+    _card: Optional[dict[str, Optional[Any]]]
+    _card_depth: int
+    _fields: list[_Field]
+    list_of_data: list[dict[str, Optional[Any]]]
+    next_page_url: Optional[str]
+
+    def __init__(self, site: aparts.ApartmentsSite, base_url: Optional[str] = None):
+        super().__init__(convert_charrefs=True)
+        self._site = site
+        self._base_url = base_url or site.value
+        self._depth = 0
+        self._card = None
+        self._card_depth = 0
+        self._fields = list()
+        self.list_of_data = list()
+        self.next_page_url = None
+
+    @classmethod
+    def parse(cls,
+              html: str,
+              site: aparts.ApartmentsSite,
+              base_url: Optional[str] = None) -> tuple[list[dict[str, Optional[Any]]], Optional[str]]:
+        """
+        Parses the whole page at once.
+
+        :param html: html source of the page.
+        :param site: site from which the page was loaded.
+        :param base_url: url of the page, it is used to resolve relative links.
+        :return: tuple where the first value is a list of apartments' dictionaries in the same format
+        as `Apartment.as_dict` returns and the second value is an url of the next page or None.
+        """
+        parser = cls(site, base_url)
+        parser.feed(html)
+        parser.close()
+        return parser.list_of_data, parser.next_page_url
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]):
+        attributes = dict(attrs)
+        classes = (attributes.get("class") or "").split()
+        is_void = tag in _VOID_ELEMENTS
+
+        if not is_void:
+            self._depth += 1
+
+        self._handle_next_page(attributes)
+
+        if self._card is None:
+            if self._site.get_list_of_apartments() in classes and not is_void:
+                self._card = {"name": None, "url": None, "price": None, "additional_info": None, "address": None}
+                self._card_depth = self._depth
+            return
+
+        for key, class_name, attribute in self._site.get_apartments_fields():
+            if class_name not in classes or self._card[key] is not None:
+                continue
+            if attribute:
+                self._card[key] = self._read_attribute(attributes, attribute)
+            elif not is_void and all(field.key != key for field in self._fields):
+                self._fields.append(_Field(key, self._depth))
+
+    def handle_endtag(self, tag: str):
+        if tag in _VOID_ELEMENTS:
+            return
+
+        for field in [field for field in self._fields if field.depth == self._depth]:
+            self._card[field.key] = " ".join("".join(field.text).split())
+            self._fields.remove(field)
+
+        if self._card is not None and self._depth == self._card_depth:
+            self.list_of_data.append(self._card)
+            self._card = None
+            self._fields.clear()
+
+        self._depth -= 1
+
+    def handle_data(self, data: str):
+        for field in self._fields:
+            field.text.append(data)
+
+    def _handle_next_page(self, attributes: dict[str, Optional[str]]):
+        """
+        Remembers url of the next page if the element is a link to it.
+        """
+        name, value = self._site.get_next_page_attribute()
+
+        if self.next_page_url is None and attributes.get(name) == value and attributes.get("href"):
+            self.next_page_url = urljoin(self._base_url, attributes["href"])
+
+    def _read_attribute(self, attributes: dict[str, Optional[str]], attribute: str) -> Optional[str]:
+        """
+        Reads attribute of the element the same way as the browser does, links are resolved to the absolute urls.
+        """
+        value = attributes.get(attribute)
+
+        if value is not None and attribute == "href":
+            return urljoin(self._base_url, value)
+        return value
+
+
+class DetailsPageParser(HTMLParser):
+    """
+    Parses details from the html source of the apartment's own page.
+    Blocks of the page are found by the attributes from `ApartmentsSite.get_details_fields`.
+    """
+    _site: aparts.ApartmentsSite
+    _depth: int
+    _block: Optional[_Field]
+    _item: Optional[_Field]
+    params: dict[str, str]
+    description: Optional[str]
+
+    def __init__(self, site: aparts.ApartmentsSite):
+        super().__init__(convert_charrefs=True)
+        self._site = site
+        self._depth = 0
+        self._block = None
+        self._item = None
+        self.params = dict()
+        self.description = None
+
+    @classmethod
+    def parse(cls, html: str, site: aparts.ApartmentsSite) -> dict[str, Any]:
+        """
+        Parses the whole page at once.
+
+        :param html: html source of the page.
+        :param site: site from which the page was loaded.
+        :return: dictionary with "params", which is a dictionary of the apartment's parameters, e.g. area and floor,
+        where key is a name of the parameter as it is shown on the web site, and "description" or None.
+        """
+        parser = cls(site)
+        parser.feed(html)
+        parser.close()
+        return {"params": parser.params, "description": parser.description}
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, Optional[str]]]):
+        if tag in _VOID_ELEMENTS:
+            return
+
+        self._depth += 1
+
+        if self._block is None:
+            attributes = dict(attrs)
+
+            for key, name, value in self._site.get_details_fields():
+                if attributes.get(name) == value:
+                    self._block = _Field(key, self._depth)
+        elif self._block.key == "params" and tag == "li" and self._item is None:
+            self._item = _Field("param", self._depth)
+
+    def handle_endtag(self, tag: str):
+        if tag in _VOID_ELEMENTS:
+            return
+
+        if self._item is not None and self._item.depth == self._depth:
+            name, _, value = " ".join(" ".join(self._item.text).split()).partition(":")
+
+            if value:
+                self.params[name.strip()] = value.strip()
+            self._item = None
+
+        if self._block is not None and self._block.depth == self._depth:
+            if self._block.key == "description":
+                self.description = " ".join(" ".join(self._block.text).split()) or None
+            self._block = None
+
+        self._depth -= 1
+
+    def handle_data(self, data: str):
+        if self._item is not None:
+            self._item.text.append(data)
+        elif self._block is not None:
+            self._block.text.append(data)
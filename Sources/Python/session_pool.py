@@ -0,0 +1,230 @@
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.common.by import By
+from contextlib import contextmanager
+from drivers import DriverFactory
+from waits import Waiter
+from typing import Iterator
+from utils import Optional
+import apartments as aparts
+import atexit
+import threading
+import time
+
+
+class Session:
+    """
+    Web driver which has already loaded the site and its category, so it can be reused by parsers.
+    """
+    driver: WebDriver
+    category_url: str
+    created_at: float
+    uses: int
+    is_broken: bool
+
+    def __init__(self, driver: WebDriver, category_url: str):
+        self.driver = driver
+        self.category_url = category_url
+        self.created_at = time.monotonic()
+        self.uses = 0
+        self.is_broken = False
+
+    def get_age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    def invalidate(self):
+        """
+        Marks session as broken, so it is not handed out again.
+        """
+        self.is_broken = True
+
+
+class SessionPool:
+    """
+    Bounded pool of warm web driver sessions of a single site.
+    Sessions are reset to the site's category page between uses and recycled when they break or get too old.
+    """
+    _site: aparts.ApartmentsSite
+    _factory: DriverFactory
+    _max_size: int
+    _max_age: float
+    _idle: list[Session]
+    _size: int
+    _is_closed: bool
+    _condition: threading.Condition
+
+    def __init__(self,
+                 site: aparts.ApartmentsSite,
+                 factory: Optional[DriverFactory] = None,
+                 max_size: int = 2,
+                 max_age: float = 30 * 60):
+        self._site = site
+        self._factory = factory or DriverFactory.from_environment(site)
+        self._max_size = max_size
+        self._max_age = max_age
+        self._idle = list()
+        self._size = 0
+        self._is_closed = False
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def session(self, timeout: Optional[float] = None) -> Iterator[Session]:
+        """
+        Hands out a warm session for the time of the `with` block.
+        If the block raises an exception, the session is recycled.
+
+        :param timeout: maximum time to wait for a free session, if None waits forever.
+        """
+        session = self.acquire(timeout)
+
+        try:
+            yield session
+        except Exception:
+            session.invalidate()
+            raise
+        finally:
+            self.release(session)
+
+    def acquire(self, timeout: Optional[float] = None) -> Session:
+        """
+        Takes a warm session from the pool or creates a new one if pool is not full yet.
+
+        :param timeout: maximum time to wait for a free session, if None waits forever.
+        :return: `Session` object.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self._max_size and not self._is_closed:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError(f"No free session of {self._site.value} in {timeout} seconds")
+                    self._condition.wait(remaining)
+
+                if self._is_closed:
+                    raise RuntimeError("Session pool is closed")
+
+                session = self._idle.pop() if self._idle else None
+
+                if session is None:
+                    self._size += 1
+
+            if session is None:
+                return self._open_session()
+
+            if self._reset(session):
+                session.uses += 1
+                return session
+
+            self._discard(session)
+
+    def release(self, session: Session):
+        """
+        Returns session back to the pool. Broken, old or orphaned sessions are closed instead.
+
+        :param session: session which was taken from the pool.
+        """
+        with self._condition:
+            is_reusable = not session.is_broken and session.get_age() < self._max_age and not self._is_closed
+
+            if is_reusable:
+                self._idle.append(session)
+                self._condition.notify()
+                return
+
+        self._discard(session)
+
+    def close(self):
+        """
+        Closes all idle sessions. Sessions which are in use are closed when they are released.
+        """
+        with self._condition:
+            self._is_closed = True
+            idle, self._idle = self._idle, list()
+            self._condition.notify_all()
+
+        for session in idle:
+            self._discard(session)
+
+    def _open_session(self) -> Session:
+        """
+        Launches a new driver and loads the site's category, which is clicked as soon as it is rendered.
+        Slot in the pool have to be reserved before calling this method.
+        """
+        driver = None
+
+        try:
+            driver = self._factory.create()
+            driver.implicitly_wait(0)
+            driver.get(self._site.value)
+            Waiter(driver, self._site.get_timeouts()).element_clickable(By.XPATH, self._site.get_category()).click()
+            session = Session(driver, driver.current_url)
+            session.uses += 1
+            return session
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+
+            if driver is not None:
+                driver.quit()
+            raise
+
+    def _reset(self, session: Session) -> bool:
+        """
+        Returns session to the category page without any filters, cookies are kept.
+
+        :return: True if session was reset, False if it is broken or too old.
+        """
+        if session.is_broken or session.get_age() >= self._max_age:
+            return False
+
+        try:
+            session.driver.get(session.category_url)
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, session: Session):
+        """
+        Quits session's driver and frees its slot in the pool.
+        """
+        with self._condition:
+            self._size -= 1
+            self._condition.notify()
+
+        try:
+            session.driver.quit()
+        except Exception:
+            pass
+
+
+_pools: dict[aparts.ApartmentsSite, SessionPool] = dict()
+_pools_lock = threading.Lock()
+
+
+def get_session_pool(site: aparts.ApartmentsSite) -> SessionPool:
+    """
+    Gets pool of the site shared by all requests of the process. Pools are closed when the interpreter exits.
+
+    :param site: site of the pool.
+    :return: `SessionPool` object.
+    """
+    with _pools_lock:
+        if site not in _pools:
+            _pools[site] = SessionPool(site)
+        return _pools[site]
+
+
+@atexit.register
+def close_session_pools():
+    """
+    Closes all shared pools.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,181 @@
+import os
+import tempfile
+import time
+import unittest
+import numpy as np
+from analytics import DAY, MarketSnapshot, PriceHistory, group_percentiles
+from apartments import Apartment, ApartmentBatch, ApartmentsSite
+from listing_store import ListingStore
+
+
+def make_apartment(name, price, address, url=None) -> Apartment:
+    return Apartment.from_dict({"name": name, "url": url, "price": price, "address": address}, ApartmentsSite.avito)
+
+
+class GroupPercentilesTestCase(unittest.TestCase):
+    def test_matches_numpy_percentile(self):
+        random = np.random.default_rng(3)
+        keys = random.integers(0, 20, 5000)
+        values = random.normal(40000, 8000, 5000)
+        values[::17] = np.nan
+        percentiles = (0, 10, 25, 50, 75, 90, 100)
+
+        unique_keys, counts, matrix = group_percentiles(keys, values, percentiles)
+
+        for key, count, row in zip(unique_keys, counts, matrix):
+            group = values[(keys == key) & ~np.isnan(values)]
+            self.assertEqual(count, len(group))
+            np.testing.assert_allclose(row, np.percentile(group, percentiles))
+
+    def test_empty(self):
+        keys, counts, matrix = group_percentiles(np.array([1]), np.array([np.nan]), (50,))
+
+        self.assertEqual((len(keys), len(counts), matrix.shape), (0, 0, (0, 1)))
+
+    def test_percentiles_can_be_generator(self):
+        keys, values = np.array([1, 1, 2]), np.array([10.0, 20.0, 30.0])
+        _, _, matrix = group_percentiles(keys, values, (percentile for percentile in (0, 100)))
+
+        self.assertEqual(matrix.tolist(), [[10.0, 20.0], [30.0, 30.0]])
+
+
+class MarketSnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.apartments = [
+            make_apartment("1-к. квартира, 38 м², 5/12 эт.", "25 000 ₽ в месяц", "Невский пр., 120"),
+            make_apartment("1-к. квартира, 40 м², 2/5 эт.", "27 000 ₽ в месяц", "Литейный проспект, 10"),
+            make_apartment("1-к. квартира, 35 м², 3/9 эт.", "29 000 ₽ в месяц", "ул. Савушкина, 12"),
+            make_apartment("1-к. квартира, 36 м², 3/9 эт.", "31 000 ₽ в месяц", "ул. Савушкина, 14"),
+            make_apartment("1-к. квартира, 37 м², 3/9 эт.", "33 000 ₽ в месяц", "Невский пр., 3"),
+            make_apartment("1-к. квартира, 39 м², 3/9 эт.", "9 000 ₽ в месяц", "Невский пр., 5"),
+            make_apartment("2-к. квартира, 54 м², 3/9 эт.", "40 000 ₽ в месяц", "Московский пр., 200"),
+            make_apartment("2-к. квартира, 60 м², 3/9 эт.", None, None),
+            make_apartment("Квартира-студия, 24,5 м², 1/5 эт.", "20 000 ₽ в месяц", "Адрес, которого нет"),
+            make_apartment("Дом", "50 000 ₽ в месяц", None),
+        ]
+        self.snapshot = MarketSnapshot.from_apartments(self.apartments)
+
+    def test_properties_are_parsed(self):
+        self.assertEqual(self.snapshot.rooms.tolist(), [1, 1, 1, 1, 1, 1, 2, 2, 0, -1])
+        self.assertEqual(self.snapshot.areas[8], 24.5)
+        self.assertTrue(np.isnan(self.snapshot.prices[7]))
+        self.assertEqual(self.snapshot.get_price_per_square_meter()[6], 40000 / 54)
+
+    def test_percentiles_by_rooms(self):
+        table = self.snapshot.get_percentiles_by_rooms((50, 100))
+
+        self.assertEqual(list(table), [0, 1, 2])
+        self.assertEqual(table[1], {"count": 6, "p50": 28000.0, "p100": 33000.0})
+        self.assertEqual(table[2], {"count": 1, "p50": 40000.0, "p100": 40000.0})
+
+    def test_percentiles_by_district(self):
+        table = self.snapshot.get_percentiles_by_district((50,))
+
+        self.assertEqual(table["Центральный"], {"count": 4, "p50": 26000.0})
+        self.assertEqual(table["Приморский"], {"count": 2, "p50": 30000.0})
+        self.assertEqual(table["Московский"], {"count": 1, "p50": 40000.0})
+
+    def test_district_written_in_address_is_preferred(self):
+        apartments = [
+            make_apartment("1-к. квартира, 35 м², 3/9 эт.", "29 000 ₽ в месяц", "Выборгский р-н, ул. Савушкина, 12"),
+            make_apartment("1-к. квартира, 36 м², 3/9 эт.", "31 000 ₽ в месяц", "ул. Савушкина, 14"),
+        ]
+        table = MarketSnapshot.from_apartments(apartments).get_percentiles_by_district((50,))
+
+        self.assertEqual(table["Выборгский"], {"count": 1, "p50": 29000.0})
+        self.assertEqual(table["Приморский"], {"count": 1, "p50": 31000.0})
+
+    def test_cheap_outliers(self):
+        self.assertEqual(np.flatnonzero(self.snapshot.get_cheap_outliers()).tolist(), [5])
+        self.assertFalse(self.snapshot.get_cheap_outliers(min_group_size=7).any())
+        self.assertFalse(self.snapshot.get_cheap_outliers(by_district=True).any())
+
+    def test_groups_without_prices_have_no_outliers(self):
+        prices = [30000, 31000, 32000, 33000, 34000, 5000, None]
+        larger_key = MarketSnapshot(prices, [1, 1, 1, 1, 1, 1, 3], [None] * 7, [None] * 7)
+        smaller_key = MarketSnapshot(prices, [1, 1, 1, 1, 1, 1, 0], [None] * 7, [None] * 7)
+
+        self.assertEqual(np.flatnonzero(larger_key.get_cheap_outliers()).tolist(), [5])
+        self.assertEqual(np.flatnonzero(smaller_key.get_cheap_outliers()).tolist(), [5])
+
+    def test_batch_and_store_give_the_same_snapshot(self):
+        batch = MarketSnapshot.from_apartments(ApartmentBatch(ApartmentsSite.avito, self.apartments))
+
+        with tempfile.TemporaryDirectory() as directory:
+            store = ListingStore(os.path.join(directory, "listings.sqlite3"))
+            store.save([make_apartment(apartment.name, apartment.price, apartment.address, str(index))
+                        for index, apartment in enumerate(self.apartments)])
+            stored = MarketSnapshot.from_listing_store(store)
+            store.close()
+
+        self.assertEqual(batch.get_percentiles_by_rooms(), self.snapshot.get_percentiles_by_rooms())
+        self.assertEqual(stored.get_percentiles_by_rooms(), self.snapshot.get_percentiles_by_rooms())
+
+    def test_large_snapshot_is_fast(self):
+        random = np.random.default_rng(5)
+        count = 300000
+        snapshot = MarketSnapshot(random.normal(40000, 9000, count), random.integers(0, 5, count),
+                                  random.uniform(20, 120, count), [None] * count)
+        snapshot.districts = random.integers(-1, 14, count).astype(np.int32)
+        snapshot.district_names = [str(index) for index in range(14)]
+        start = time.perf_counter()
+
+        snapshot.get_percentiles_by_rooms()
+        snapshot.get_percentiles_by_district(per_square_meter=True)
+        snapshot.get_cheap_outliers(by_district=True)
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+
+
+class PriceHistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.history = PriceHistory([
+            ("b", 3 * DAY, 30000),
+            ("a", 0, 20000),
+            ("a", 2 * DAY, 18000),
+            ("b", 0, 32000),
+            ("c", 5 * DAY + 10, None),
+            ("a", 5 * DAY, 17000),
+        ])
+
+    def test_listing(self):
+        times, prices = self.history.get_listing("a")
+
+        self.assertEqual(times.tolist(), [0, 2 * DAY, 5 * DAY])
+        self.assertEqual(prices.tolist(), [20000, 18000, 17000])
+        self.assertEqual(len(self.history.get_listing("unknown")[0]), 0)
+
+    def test_changes(self):
+        changes = self.history.get_changes()
+
+        self.assertEqual(self.history.urls, ["b", "a", "c"])
+        self.assertEqual(changes["observations"].tolist(), [2, 3, 1])
+        np.testing.assert_allclose(changes["change"][:2], [30000 / 32000 - 1, 17000 / 20000 - 1])
+        self.assertTrue(np.isnan(changes["change"][2]))
+
+    def test_price_over_time(self):
+        starts, counts, medians = self.history.get_price_over_time()
+
+        self.assertEqual(starts.tolist(), [0, 2 * DAY, 3 * DAY, 5 * DAY])
+        self.assertEqual(counts.tolist(), [2, 1, 1, 1])
+        self.assertEqual(medians[:, 0].tolist(), [26000, 18000, 30000, 17000])
+
+    def test_rolling_trend(self):
+        trend = self.history.get_rolling_trend(window=3)
+
+        self.assertEqual(trend["rolling"].tolist(), [26000, 22000, 24000, 23500])
+        self.assertTrue(np.isnan(trend["slope"][0]))
+        self.assertEqual(trend["slope"][1], -4000)
+        self.assertEqual(trend["slope"][3], -6500)
+
+    def test_history_of_crawls(self):
+        first = [make_apartment("1-к", "20 000 ₽", None, "a")]
+        second = [make_apartment("1-к", "19 000 ₽", None, "a"), make_apartment("2-к", "30 000 ₽", None, "b")]
+        history = PriceHistory.from_crawls([(0, first), (DAY, second)])
+
+        self.assertEqual(history.get_listing("a")[1].tolist(), [20000, 19000])
+        self.assertEqual(len(history), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from apartments import Apartment, ApartmentBatch, ApartmentsSite, parse_price
+from fakes import FakeWebDriver
+from selenium.webdriver.common.by import By
+
+
+def make_driver(number_of_cards: int, with_address: bool = True) -> FakeWebDriver:
+    site = ApartmentsSite.avito
+    driver = FakeWebDriver(site.get_list_of_apartments())
+
+    for index in range(number_of_cards):
+        children = {
+            site.get_apartments_name(): driver.make_element(title=f"{index + 1}-к. квартира",
+                                                            href=f"https://www.avito.ru/{index}"),
+            site.get_apartments_price(): driver.make_element(f"{20000 + index} ₽ в месяц")
+        }
+
+        if with_address:
+            children[site.get_apartments_address()] = driver.make_element(f"Невский пр., {index}")
+        driver.add_card(children)
+    return driver
+
+
+class ApartmentTestCase(unittest.TestCase):
+    def test_batch_extraction_matches_per_element_parsing(self):
+        site = ApartmentsSite.avito
+
+        for with_address in [True, False]:
+            driver = make_driver(5, with_address)
+            per_element = [Apartment(card, site).as_dict() for card in driver.cards]
+            batch = [apartment.as_dict() for apartment in Apartment.extract_all(driver, driver.cards, site)]
+
+            self.assertEqual(batch, per_element)
+
+    def test_batch_extraction_round_trips_do_not_depend_on_cards(self):
+        site = ApartmentsSite.avito
+
+        for number_of_cards in [1, 10, 50]:
+            driver = make_driver(number_of_cards)
+            Apartment.extract_all(driver, driver.find_elements(By.CLASS_NAME, site.get_list_of_apartments()), site)
+
+            self.assertEqual(driver.round_trips(), 2)
+
+    def test_missing_fields_are_probed_without_waiting(self):
+        driver = make_driver(3, with_address=False)
+        apartments = [Apartment(card, ApartmentsSite.avito) for card in driver.cards]
+
+        self.assertTrue(all(apartment.address is None for apartment in apartments))
+        self.assertEqual(driver.calls["find_element"], 0)
+        self.assertEqual(driver.calls["find_elements"], 12)
+
+    def test_batch_extraction_of_empty_page(self):
+        driver = make_driver(0)
+
+        self.assertEqual(Apartment.extract_all(driver, [], ApartmentsSite.avito), [])
+        self.assertEqual(driver.round_trips(), 0)
+
+    def test_web_element_is_not_kept(self):
+        driver = make_driver(1)
+        apartment = Apartment(driver.cards[0], ApartmentsSite.avito)
+
+        self.assertFalse(hasattr(apartment, "__dict__"))
+        self.assertNotIn(driver.cards[0], [getattr(apartment, name) for name in Apartment.__slots__])
+
+    def test_price_parsing(self):
+        self.assertEqual(parse_price("25\u00a0000 ₽ в месяц"), (25000, "RUB", "month"))
+        self.assertEqual(parse_price("2 500 ₽ за сутки"), (2500, "RUB", "day"))
+        self.assertEqual(parse_price("Цена не указана"), (None, None, None))
+        self.assertEqual(parse_price(None), (None, None, None))
+
+    def test_batch_keeps_all_properties(self):
+        driver = make_driver(4)
+        apartments = [Apartment(card, ApartmentsSite.avito) for card in driver.cards]
+        apartments[1].set_price(None)
+        apartments[2].alternate_urls = ["https://www.avito.ru/repost"]
+        batch = ApartmentBatch(ApartmentsSite.avito, iter(apartments))
+
+        self.assertEqual(len(batch), 4)
+        self.assertEqual(batch.price_values.tolist(), [20000, -1, 20002, 20003])
+        self.assertEqual(batch.as_dicts(), [apartment.as_dict() for apartment in apartments])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from apartments import Apartment, ApartmentsSite
+from archive import PageArchive
+from configurations import Configurations
+from fakes import FIXTURES, FakeWebDriver, FixturesServer
+from http_parser import HttpSiteParser
+from network import JobDelegate, SiteParser
+from page_parser import PageParser
+
+
+def read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as file:
+        return file.read()
+
+
+class PageArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.archive = PageArchive(self.directory.name)
+        self.pages = [read_fixture("avito_page_1.html"), read_fixture("avito_page_2.html")]
+
+    def tearDown(self):
+        self.archive.close()
+        self.directory.cleanup()
+
+    def count_objects(self) -> int:
+        return sum(len(files) for _, _, files in os.walk(os.path.join(self.directory.name, "objects")))
+
+    def test_same_html_is_stored_once(self):
+        first = self.archive.save(self.pages[0], ApartmentsSite.avito, "page:1", captured_at=100)
+        second = self.archive.save(self.pages[0], ApartmentsSite.avito, "page:1", captured_at=200)
+        self.archive.save(self.pages[1], ApartmentsSite.avito, "page:2", page=2, captured_at=200)
+
+        self.assertEqual(first, second)
+        self.assertEqual(len(self.archive), 3)
+        self.assertEqual(self.count_objects(), 2)
+        self.assertEqual(self.archive.load(first), self.pages[0])
+        self.assertLess(os.path.getsize(self.archive.get_path(first)), len(self.pages[0].encode()))
+
+    def test_pages_are_filtered_by_metadata(self):
+        key = Configurations({"rooms": [1]}).get_key()
+        self.archive.save(self.pages[0], ApartmentsSite.avito, configuration_key=key, captured_at=100)
+        self.archive.save(self.pages[1], ApartmentsSite.avito, page=2, captured_at=200)
+
+        self.assertEqual([page.page for page in self.archive.get_pages(since=150)], [2])
+        self.assertEqual([page.page for page in self.archive.get_pages(until=150)], [1])
+        self.assertEqual([page.configuration_key for page in self.archive.get_pages(configuration_key=key)], [key])
+        self.assertEqual(len(self.archive.get_pages(site=ApartmentsSite.avito)), 2)
+
+    def test_replay_parses_pages_again(self):
+        for index in range(6):
+            self.archive.save(self.pages[index % 2], ApartmentsSite.avito, page=index % 2 + 1)
+
+        expected = [PageParser.parse(self.pages[index % 2], ApartmentsSite.avito)[0] for index in range(6)]
+
+        for max_workers in (1, 2):
+            replayed = self.archive.replay(max_workers=max_workers)
+            self.assertEqual([[apartment.as_dict() for apartment in page] for page in replayed],
+                             [[Apartment.from_dict(data, ApartmentsSite.avito).as_dict() for data in page]
+                              for page in expected])
+
+    def test_site_parser_archives_every_page(self):
+        driver = FakeWebDriver.from_html(self.pages, ApartmentsSite.avito)
+        configuration = Configurations({})
+        parser = SiteParser(configuration, ApartmentsSite.avito, web_driver=driver, archive=self.archive)
+        apartments = parser.get_apartments()
+        pages = self.archive.get_pages()
+
+        self.assertEqual([(page.page, page.url, page.configuration_key) for page in pages],
+                         [(1, "page:0", configuration.get_key()), (2, "page:1", configuration.get_key())])
+        replayed = [apartment for page in self.archive.replay(pages, max_workers=1) for apartment in page]
+        self.assertEqual([apartment.name for apartment in replayed], [apartment.name for apartment in apartments])
+
+    def test_http_parser_archives_every_page(self):
+        server = FixturesServer()
+
+        try:
+            parser = HttpSiteParser(Configurations({}), ApartmentsSite.avito, base_url=server.base_url,
+                                    archive=self.archive)
+            parser.set_config()
+            apartments = parser.get_apartments()
+        finally:
+            server.close()
+
+        pages = self.archive.get_pages()
+        replayed = [apartment for page in self.archive.replay(pages, max_workers=1) for apartment in page]
+
+        self.assertEqual([page.page for page in pages], [1, 2])
+        self.assertTrue(pages[0].url.startswith(server.base_url))
+        self.assertEqual([apartment.as_dict() for apartment in replayed],
+                         [apartment.as_dict() for apartment in apartments])
+
+    def test_archive_failures_are_not_parsing_errors(self):
+        server = FixturesServer()
+        delegate = JobDelegate()
+        self.archive.close()
+
+        try:
+            parser = HttpSiteParser(Configurations({}), ApartmentsSite.avito, delegate=delegate,
+                                    base_url=server.base_url, archive=self.archive)
+            parser.set_config()
+            apartments = parser.get_apartments()
+        finally:
+            server.close()
+
+        self.assertEqual(len(apartments), 6)
+        self.assertEqual(delegate.errors, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,193 @@
+"""
+Offline benchmarks of the parser over the recorded search results pages and the fake web driver.
+
+Usage from the `Sources/Python` directory:
+    python tests/benchmarks.py --latency 0.002 --output bench.json
+    python tests/benchmarks.py --compare bench.json
+
+Results are written as json, so runs of different commits can be compared.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from apartments import Apartment, ApartmentsSite
+from configurations import Configurations
+from fakes import FIXTURES, FakeWebDriver
+from typing import Callable
+from utils import Any, Optional
+import network
+
+
+SCHEMA_VERSION = 1
+
+
+def _read_fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as file:
+        return file.read()
+
+
+def _measure(repeats: int, prepare: Callable[[], Any], run: Callable[[Any], Optional[FakeWebDriver]]) -> dict[str, Any]:
+    """
+    Runs the benchmark several times. Preparation is not measured.
+
+    :param prepare: function which makes the input of the single run.
+    :param run: function which is measured, it returns the fake driver whose calls should be reported.
+    :return: dictionary with timings in seconds and web driver's calls of the last run.
+    """
+    durations = list()
+    driver = None
+
+    for _ in range(repeats):
+        value = prepare()
+        start = time.perf_counter()
+        driver = run(value)
+        durations.append(time.perf_counter() - start)
+
+    calls = dict(driver.calls) if driver else {}
+    return {
+        "min_s": min(durations),
+        "median_s": statistics.median(durations),
+        "mean_s": statistics.fmean(durations),
+        "round_trips": sum(calls.values()),
+        "calls": calls
+    }
+
+
+class SiteParserRunner:
+    """
+    Parses all pages of the fake driver with the site parser.
+    """
+    driver: FakeWebDriver
+    parser: network.SiteParser
+
+    def __init__(self, driver: FakeWebDriver, batch_extraction: bool):
+        self.driver = driver
+        self.parser = network.SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=driver,
+                                         batch_extraction=batch_extraction)
+
+    def run(self) -> list[Apartment]:
+        return self.parser.get_apartments()
+
+    def run_and_get_driver(self) -> FakeWebDriver:
+        self.run()
+        return self.driver
+
+
+def run_benchmarks(repeats: int = 5, latency: float = 0, pages: int = 3) -> dict[str, dict[str, Any]]:
+    """
+    Runs all benchmarks.
+
+    :param repeats: amount of runs of every benchmark.
+    :param latency: delay of every web driver's call in seconds.
+    :param pages: amount of search results pages served to the parser.
+    :return: dictionary where key is a name of the benchmark and value is its results.
+    """
+    site = ApartmentsSite.avito
+    html = [_read_fixture("avito_page_large.html")] * pages
+    make_driver = lambda: FakeWebDriver.from_html(html, site, latency)
+    apartments = SiteParserRunner(make_driver(), True).run() * 20
+
+    def parse_elements(driver: FakeWebDriver) -> FakeWebDriver:
+        for card in driver.cards:
+            Apartment(card, site)
+        return driver
+
+    def extract_all(driver: FakeWebDriver) -> FakeWebDriver:
+        Apartment.extract_all(driver, driver.cards, site)
+        return driver
+
+    def set_config(driver: FakeWebDriver) -> FakeWebDriver:
+        configuration = Configurations({"rooms": [1, 2], "price": [20000, 40000]})
+        network.SiteParser(configuration, site, web_driver=driver).set_config()
+        return driver
+
+    return {
+        "apartment.parse_element": _measure(repeats, make_driver, parse_elements),
+        "apartment.extract_all": _measure(repeats, make_driver, extract_all),
+        "site_parser.get_apartments": _measure(repeats, lambda: SiteParserRunner(make_driver(), True),
+                                               SiteParserRunner.run_and_get_driver),
+        "site_parser.get_apartments.per_element": _measure(repeats, lambda: SiteParserRunner(make_driver(), False),
+                                                           SiteParserRunner.run_and_get_driver),
+        "site_parser.set_config": _measure(repeats, make_driver, set_config),
+        "json.convert_apartments": _measure(repeats, lambda: apartments,
+                                            lambda value: network._convert_apartments_to_json(value) and None),
+        "json.ndjson": _measure(repeats, lambda: apartments,
+                                lambda value: "".join(map(network._convert_apartment_to_ndjson, value)) and None)
+    }
+
+
+def _get_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except Exception:
+        return None
+
+
+def make_report(results: dict[str, dict[str, Any]], repeats: int, latency: float) -> dict[str, Any]:
+    return {
+        "schema": SCHEMA_VERSION,
+        "commit": _get_commit(),
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "repeats": repeats,
+        "latency_s": latency,
+        "results": results
+    }
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> str:
+    """
+    Compares two reports.
+
+    :return: table where every row shows how the median time and the amount of round trips have changed.
+    """
+    lines = [f"{'benchmark':<42} {'median':>12} {'change':>8} {'round trips':>18}"]
+
+    for name, result in current["results"].items():
+        previous = baseline["results"].get(name)
+
+        if previous is None:
+            lines.append(f"{name:<42} {result['median_s'] * 1000:>10.3f}ms {'new':>8}")
+            continue
+
+        change = result["median_s"] / previous["median_s"] if previous["median_s"] else float("inf")
+        trips = f"{previous['round_trips']} -> {result['round_trips']}"
+        lines.append(f"{name:<42} {result['median_s'] * 1000:>10.3f}ms {change:>7.2f}x {trips:>18}")
+    return "\n".join(lines)
+
+
+def main():
+    arguments = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arguments.add_argument("--repeats", type=int, default=5)
+    arguments.add_argument("--latency", type=float, default=0, help="delay of every web driver's call in seconds")
+    arguments.add_argument("--pages", type=int, default=3)
+    arguments.add_argument("--output", help="path of the json report")
+    arguments.add_argument("--compare", help="path of the json report to compare with")
+    options = arguments.parse_args()
+
+    report = make_report(run_benchmarks(options.repeats, options.latency, options.pages),
+                         options.repeats, options.latency)
+
+    if options.output:
+        with open(options.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    if options.compare:
+        with open(options.compare) as file:
+            print(compare(json.load(file), report))
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
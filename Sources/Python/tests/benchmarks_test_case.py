@@ -0,0 +1,24 @@
+import unittest
+
+from benchmarks import compare, make_report, run_benchmarks
+
+
+class BenchmarksTestCase(unittest.TestCase):
+    def test_round_trips_are_reported(self):
+        results = run_benchmarks(repeats=1, pages=2)
+
+        self.assertEqual(results["apartment.extract_all"]["round_trips"], 1)
+        self.assertGreater(results["site_parser.get_apartments.per_element"]["round_trips"],
+                           results["site_parser.get_apartments"]["round_trips"])
+        self.assertEqual(results["json.ndjson"]["calls"], {})
+
+    def test_compare_reports(self):
+        report = make_report(run_benchmarks(repeats=1, pages=1), repeats=1, latency=0)
+        table = compare(report, report)
+
+        self.assertIn("1.00x", table)
+        self.assertIn("site_parser.set_config", table)
+
+
+if __name__ == '__main__':
+    unittest.main()
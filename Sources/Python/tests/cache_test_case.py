@@ -0,0 +1,94 @@
+import os
+import tempfile
+import time
+import unittest
+from cache import ResultCache
+
+
+class ResultCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.sqlite3")
+        self.computed = list()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def compute(self, value: str):
+        def compute():
+            self.computed.append(value)
+            return value
+        return compute
+
+    def test_fresh_results_are_cached(self):
+        cache = ResultCache(self.path, ttl=60)
+
+        self.assertEqual(cache.get_or_compute("key", self.compute("1")), "1")
+        self.assertEqual(cache.get_or_compute("key", self.compute("2")), "1")
+        self.assertEqual(self.computed, ["1"])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        cache.close()
+
+        self.assertEqual(ResultCache(self.path, ttl=60).get("key"), ("1", False))
+
+    def test_stale_results_are_revalidated(self):
+        cache = ResultCache(self.path, ttl=0.05, stale_ttl=60)
+        cache.get_or_compute("key", self.compute("1"))
+        time.sleep(0.06)
+
+        self.assertEqual(cache.get_or_compute("key", self.compute("2")), "1")
+        cache.wait_for_refreshes()
+        self.assertEqual(cache.get("key"), ("2", False))
+
+    def test_refreshes_do_not_keep_process_alive(self):
+        cache = ResultCache(self.path, ttl=0.05, stale_ttl=60)
+        cache.get_or_compute("key", self.compute("1"))
+        time.sleep(0.06)
+        cache.get_or_compute("key", self.compute("2"))
+
+        self.assertTrue(cache._thread.daemon)
+        cache.close()
+        self.assertEqual(cache._refreshes.unfinished_tasks, 0)
+
+    def test_expired_results_are_computed(self):
+        cache = ResultCache(self.path, ttl=0.01, stale_ttl=0.01)
+        cache.get_or_compute("key", self.compute("1"))
+        time.sleep(0.03)
+
+        self.assertEqual(cache.get_or_compute("key", self.compute("2")), "2")
+        self.assertEqual(cache.misses, 2)
+
+    def test_least_recently_used_results_are_evicted(self):
+        cache = ResultCache(self.path, max_entries=2)
+        cache.put("1", "1")
+        cache.put("2", "2")
+        time.sleep(0.01)
+        cache.get("1")
+        cache.put("3", "3")
+
+        self.assertIsNotNone(cache.get("1"))
+        self.assertIsNone(cache.get("2"))
+        self.assertIsNotNone(cache.get("3"))
+
+    def test_empty_results_are_not_cached(self):
+        cache = ResultCache(self.path)
+        cache.get_or_compute("key", lambda: None)
+
+        self.assertIsNone(cache.get("key"))
+
+    def test_results_are_cached_only_if_allowed(self):
+        cache = ResultCache(self.path, ttl=0.05, stale_ttl=60)
+        should_cache = lambda value: value != "[]"
+
+        self.assertEqual(cache.get_or_compute("key", self.compute("[]"), should_cache), "[]")
+        self.assertIsNone(cache.get("key"))
+
+        cache.get_or_compute("key", self.compute("1"), should_cache)
+        time.sleep(0.06)
+        cache.get_or_compute("key", self.compute("[]"), should_cache)
+        cache.wait_for_refreshes()
+        self.assertEqual(cache.get("key")[0], "1")
+
+
+if __name__ == '__main__':
+    unittest.main()
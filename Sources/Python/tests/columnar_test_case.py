@@ -0,0 +1,99 @@
+import json
+import struct
+import time
+import unittest
+from apartments import Apartment, ApartmentBatch, ApartmentsSite
+from columnar import MAGIC, SCHEMA_VERSION, FormatError, decode, encode, get_rows_count
+
+
+def make_apartments(count: int) -> list[Apartment]:
+    streets = ["ул. Савушкина", "Невский пр.", "Московский пр.", "ул. Марата"]
+    apartments = list()
+
+    for index in range(count):
+        apartment = Apartment.from_dict({
+            "name": f"{index % 4 + 1}-к. квартира, {30 + index % 90} м², {index % 9 + 1}/12 эт.",
+            "url": f"https://www.avito.ru/sankt-peterburg/kvartiry/{index}",
+            "price": None if index % 10 == 0 else f"{20000 + index} ₽ в месяц",
+            "additional_info": None if index % 3 else "Рядом метро",
+            "address": None if index % 7 == 0 else f"{streets[index % len(streets)]}, {index % 20 + 1}"
+        }, ApartmentsSite.avito)
+
+        if index % 5 == 0:
+            apartment.alternate_urls = [f"https://www.avito.ru/{index}/a", f"https://www.avito.ru/{index}/b"]
+        apartments.append(apartment)
+    return apartments
+
+
+class ColumnarTestCase(unittest.TestCase):
+    def test_round_trip(self):
+        apartments = make_apartments(100)
+        site, records = decode(encode(apartments, ApartmentsSite.avito))
+
+        self.assertEqual(site, ApartmentsSite.avito)
+        self.assertEqual(records, [apartment.as_dict() for apartment in apartments])
+
+    def test_empty_result(self):
+        self.assertEqual(decode(encode([], ApartmentsSite.avito)), (ApartmentsSite.avito, []))
+        self.assertEqual(get_rows_count(encode([], ApartmentsSite.avito)), 0)
+        self.assertEqual(get_rows_count(encode(make_apartments(7), ApartmentsSite.avito)), 7)
+
+    def test_batch_is_encoded_from_its_columns(self):
+        apartments = make_apartments(50)
+        buffer = encode(ApartmentBatch(ApartmentsSite.avito, apartments), ApartmentsSite.avito)
+        self.assertEqual(buffer, encode(apartments, ApartmentsSite.avito))
+
+    def test_buffer_is_decoded_without_copy(self):
+        buffer = bytearray(encode(make_apartments(10), ApartmentsSite.avito))
+        _, records = decode(memoryview(buffer))
+
+        self.assertEqual(len(records), 10)
+
+    def test_header_and_alignment(self):
+        buffer = encode(make_apartments(3), ApartmentsSite.avito)
+        magic, version = struct.unpack_from("<4sH", buffer)
+
+        self.assertEqual((magic, version), (MAGIC, SCHEMA_VERSION))
+        self.assertEqual(len(buffer) % 8, 0)
+
+    def test_unsupported_buffer(self):
+        buffer = bytearray(encode(make_apartments(3), ApartmentsSite.avito))
+
+        with self.assertRaises(FormatError):
+            decode(b"JSON" + bytes(buffer[4:]))
+
+        struct.pack_into("<H", buffer, 4, SCHEMA_VERSION + 1)
+
+        with self.assertRaises(FormatError):
+            decode(buffer)
+
+    def test_unknown_column_is_skipped(self):
+        buffer = bytearray(encode(make_apartments(3), ApartmentsSite.avito))
+        columns_offset = struct.calcsize("<4sHHIIH")
+        columns_count = struct.unpack_from("<H", buffer, columns_offset)[0]
+        struct.pack_into("<H", buffer, columns_offset, columns_count + 1)
+        buffer += struct.pack("<IIQ", 0, 99, 8) + bytes(8)
+
+        _, records = decode(buffer)
+        self.assertEqual(records[0]["url"], make_apartments(1)[0].url)
+
+    def test_buffer_is_smaller_and_faster_than_json(self):
+        apartments = make_apartments(20000)
+        buffer = encode(apartments, ApartmentsSite.avito)
+        json_data = json.dumps([apartment.as_dict() for apartment in apartments])
+
+        self.assertLess(len(buffer), len(json_data.encode()) * 0.6)
+
+        start = time.perf_counter()
+        decode(buffer)
+        decoding_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        json.loads(json_data)
+        parsing_time = time.perf_counter() - start
+
+        self.assertLess(decoding_time, parsing_time * 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,6 +34,18 @@ class ConfigurationTestCase(unittest.TestCase):
         self.assertEqual(config_4.price, None)
         self.assertEqual(config_4.rooms, None)
 
+    def test_key(self):
+        config_1 = Configurations({"rooms": [2, 1], "price": [12000, 24000], "location": "Saint  Petersburg"})
+        config_2 = Configurations({"location": "saint petersburg", "price": [12000, 24000], "rooms": [1, 2, 2]})
+        config_3 = Configurations({"price": [5, 5], "rooms": []})
+        config_4 = Configurations({"price": [24000, 12000]})
+        config_5 = Configurations({"price": [0, 24000]})
+
+        self.assertEqual(config_1.get_key(), config_2.get_key())
+        self.assertEqual(config_3.get_key(), config_4.get_key())
+        self.assertNotEqual(config_4.get_key(), config_5.get_key())
+        self.assertNotEqual(config_4.get_key(), Configurations({}).get_key())
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+import time
+from apartments import Apartment, ApartmentsSite
+from dedup import Deduplicator, make_shingles
+
+
+def make_apartment(name, price, address, url) -> Apartment:
+    return Apartment.from_dict({"name": name, "url": url, "price": price, "address": address}, ApartmentsSite.avito)
+
+
+def make_listings(count: int) -> list[Apartment]:
+    streets = ["ул. Савушкина", "Невский пр.", "Московский пр.", "ул. Марата", "Литейный пр.", "ул. Дыбенко"]
+    return [
+        make_apartment(f"{index % 4 + 1}-к. квартира, {30 + index % 97} м², {index % 9 + 1}/{index % 7 + 10} эт.",
+                       f"{20000 + index * 37 % 90000} ₽ в месяц",
+                       f"{streets[index % len(streets)]}, {index // len(streets) + 1}",
+                       f"https://www.avito.ru/{index}")
+        for index in range(count)
+    ]
+
+
+class DeduplicatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.apartments = [
+            make_apartment("2-к. квартира, 54 м², 3/9 эт.", "38 500 ₽ в месяц", "ул. Савушкина, 12", "a"),
+            make_apartment("1-к. квартира, 38 м², 5/12 эт.", "25 000 ₽ в месяц", "Невский пр., 120", "b"),
+            make_apartment("2-к квартира 54 м2, 3/9 этаж", "37 000 ₽ в месяц", "Савушкина улица, 12", "c"),
+            make_apartment("2-к. квартира, 54 м², 3/9 эт.", "60 000 ₽ в месяц", "ул. Савушкина, 12", "d"),
+            make_apartment("1-к. квартира, 38 м², 5/12 эт.", None, "Невский проспект, 120", "e"),
+            make_apartment("3-к. квартира, 78 м², 2/5 эт.", "65 000 ₽ в месяц", "Московский пр., 200", "f"),
+            make_apartment("1-к. квартира, 38 м², 5/12 эт.", "25 000 ₽ в месяц", "Невский пр., 120", "b"),
+        ]
+
+    def test_shingles_ignore_abbreviations(self):
+        self.assertEqual(make_shingles(self.apartments[1]), make_shingles(self.apartments[4]))
+        self.assertEqual(make_shingles(make_apartment(None, None, None, "x")), set())
+
+    def test_groups(self):
+        groups = Deduplicator().find_groups(self.apartments)
+
+        self.assertEqual(groups, [[0, 2], [1, 4, 6], [3], [5]])
+
+    def test_canonical_apartment_keeps_alternate_urls(self):
+        apartments = Deduplicator().deduplicate(self.apartments)
+
+        self.assertEqual([apartment.url for apartment in apartments], ["a", "b", "d", "f"])
+        self.assertEqual(apartments[0].alternate_urls, ["c"])
+        self.assertEqual(apartments[1].alternate_urls, ["e"])
+        self.assertEqual(apartments[1].as_dict()["alternate_urls"], ["e"])
+
+    def test_neighbouring_buildings_are_not_merged(self):
+        apartments = [
+            make_apartment("2-к. квартира, 54 м², 5/9 эт.", "40 000 ₽ в месяц", "ул. Савушкина, 12", "a"),
+            make_apartment("2-к. квартира, 54 м², 5/9 эт.", "40 000 ₽ в месяц", "ул. Савушкина, 14", "b"),
+            make_apartment("2-к. квартира, 54 м², 5/9 эт.", "40 000 ₽ в месяц", "Савушкина улица, д. 12", "c"),
+        ]
+
+        self.assertEqual(Deduplicator().find_groups(apartments), [[0, 2], [1]])
+
+    def test_price_tolerance(self):
+        groups = Deduplicator(price_tolerance=0.5).find_groups(self.apartments)
+
+        self.assertIn([0, 2, 3], groups)
+
+    def test_distinct_listings_are_kept(self):
+        apartments = make_listings(3000)
+        groups = Deduplicator().find_groups(apartments)
+
+        self.assertEqual(len(groups), len(apartments))
+
+    def test_time_is_linear(self):
+        deduplicator = Deduplicator()
+        elapsed = list()
+
+        for count in (2000, 8000):
+            start = time.perf_counter()
+            deduplicator.find_groups(make_listings(count))
+            elapsed.append(time.perf_counter() - start)
+
+        self.assertLess(elapsed[1], elapsed[0] * 4 * 2.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
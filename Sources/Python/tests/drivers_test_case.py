@@ -0,0 +1,73 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+from apartments import ApartmentsSite
+from drivers import DriverBackend, DriverFactory
+from fakes import FixturesServer
+from selenium.webdriver.common.by import By
+
+
+CHROME = next(filter(None, map(shutil.which, ["google-chrome", "chromium", "chromium-browser", "chrome"])), None)
+
+
+class DriverFactoryTestCase(unittest.TestCase):
+    def test_site_resources_are_blocked_by_default(self):
+        with mock.patch.dict(os.environ, {DriverFactory.backend_variable: "chrome"}):
+            factory = DriverFactory.from_environment(ApartmentsSite.avito)
+        capabilities = factory.make_options().to_capabilities()
+
+        self.assertEqual(capabilities["pageLoadStrategy"], "eager")
+        self.assertIn("--headless=new", capabilities["goog:chromeOptions"]["args"])
+        self.assertEqual(capabilities["goog:chromeOptions"]["prefs"],
+                         {"profile.managed_default_content_settings.images": 2})
+
+    def test_blocking_can_be_turned_off(self):
+        environment = {
+            DriverFactory.backend_variable: "firefox",
+            DriverFactory.blocking_variable: "0",
+            DriverFactory.page_load_strategy_variable: "normal"
+        }
+
+        with mock.patch.dict(os.environ, environment):
+            options = DriverFactory.from_environment(ApartmentsSite.avito).make_options()
+
+        self.assertEqual(options.page_load_strategy, "normal")
+        self.assertNotIn("permissions.default.image", options.preferences)
+
+    def test_firefox_disables_images(self):
+        options = DriverFactory(DriverBackend.firefox, blocked_urls=ApartmentsSite.avito.get_blocked_urls()).make_options()
+        self.assertEqual(options.preferences["permissions.default.image"], 2)
+
+
+@unittest.skipUnless(CHROME, "Chrome is not installed")
+class HeadlessProfileTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FixturesServer()
+
+    def tearDown(self):
+        self.server.close()
+
+    def load_heavy_page(self, factory: DriverFactory) -> list[str]:
+        self.server.requested_assets.clear()
+        web_driver = factory.create()
+
+        try:
+            web_driver.get(self.server.heavy_page_url)
+            cards = web_driver.find_elements(By.CLASS_NAME, ApartmentsSite.avito.get_list_of_apartments())
+            self.assertEqual(len(cards), 20)
+        finally:
+            web_driver.quit()
+        return list(self.server.requested_assets)
+
+    def test_heavy_assets_are_not_loaded(self):
+        full = self.load_heavy_page(DriverFactory(DriverBackend.chrome, page_load_strategy="normal"))
+        blocked = self.load_heavy_page(DriverFactory(DriverBackend.chrome,
+                                                     blocked_urls=ApartmentsSite.avito.get_blocked_urls()))
+
+        self.assertGreaterEqual(len(full), 20)
+        self.assertEqual(blocked, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
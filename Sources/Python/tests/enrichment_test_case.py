@@ -0,0 +1,153 @@
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from apartments import Apartment, ApartmentsSite
+from cache import ResultCache
+from enrichment import DetailsEnricher, RateLimiter, format_details
+from fakes import FIXTURES
+from page_parser import DetailsPageParser
+
+
+with open(os.path.join(FIXTURES, "avito_item.html"), encoding="utf-8") as file:
+    ITEM_HTML = file.read()
+
+
+class Response:
+    def __init__(self, status: int, data: bytes):
+        self.status = status
+        self.data = data
+        self.headers = {"Content-Type": "text/html; charset=utf-8"}
+
+
+class FakePool:
+    """
+    Http pool which serves the same apartment's page with the given latency.
+    Statuses are returned for the first requests of every url before the page.
+    """
+    def __init__(self, latency: float = 0, statuses: list[int] = None, html: str = ITEM_HTML):
+        self.latency = latency
+        self.statuses = statuses or []
+        self.html = html
+        self.requests = list()
+        self._lock = threading.Lock()
+
+    def request(self, method: str, url: str, **kwargs) -> Response:
+        with self._lock:
+            attempt = sum(1 for requested, _ in self.requests if requested == url)
+            self.requests.append((url, time.monotonic()))
+
+        time.sleep(self.latency)
+
+        if attempt < len(self.statuses):
+            return Response(self.statuses[attempt], b"")
+        return Response(200, self.html.encode("utf-8"))
+
+
+def make_apartments(count: int, host: str = "www.avito.ru") -> list[Apartment]:
+    return [Apartment.from_dict({"url": f"https://{host}/item_{index}"}, ApartmentsSite.avito) for index in range(count)]
+
+
+class DetailsPageParserTestCase(unittest.TestCase):
+    def test_details_are_parsed(self):
+        details = DetailsPageParser.parse(ITEM_HTML, ApartmentsSite.avito)
+
+        self.assertEqual(details["params"], {
+            "Количество комнат": "2",
+            "Общая площадь": "54 м²",
+            "Этаж": "3 из 9",
+            "Балкон или лоджия": "балкон"
+        })
+        self.assertEqual(details["description"], "Светлая квартира рядом с метро. Есть вся мебель и техника.")
+
+    def test_details_are_formatted(self):
+        details = {"params": {"Общая площадь": "54 м²", "Этаж": "3 из 9"}, "description": "Рядом с метро."}
+
+        self.assertEqual(format_details(details), "Общая площадь: 54 м²; Этаж: 3 из 9\nРядом с метро.")
+        self.assertIsNone(format_details({"params": {}, "description": None}))
+
+
+class DetailsEnricherTestCase(unittest.TestCase):
+    def test_pages_are_fetched_at_the_same_time(self):
+        pool = FakePool(latency=0.1)
+        apartments = make_apartments(30)
+        enricher = DetailsEnricher(ApartmentsSite.avito, concurrency=30, requests_per_second=1000, pool=pool)
+
+        start = time.perf_counter()
+        self.assertEqual(enricher.enrich(apartments), 30)
+
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertTrue(apartments[0].additional_info.startswith("Количество комнат: 2; Общая площадь: 54 м²"))
+
+    def test_requests_to_the_same_host_are_rate_limited(self):
+        pool = FakePool()
+        enricher = DetailsEnricher(ApartmentsSite.avito, requests_per_second=20, pool=pool)
+        enricher.enrich(make_apartments(5) + make_apartments(5, host="mirror.avito.ru"))
+
+        times = sorted(requested for url, requested in pool.requests if "www." in url)
+        self.assertGreaterEqual(times[-1] - times[0], 4 * 0.05 * 0.9)
+
+        mirror_times = sorted(requested for url, requested in pool.requests if "mirror." in url)
+        self.assertLess(abs(mirror_times[0] - times[0]), 0.04)
+
+    def test_failed_requests_are_retried(self):
+        pool = FakePool(statuses=[503, 429])
+        apartments = make_apartments(2)
+        enricher = DetailsEnricher(ApartmentsSite.avito, requests_per_second=1000, backoff=0.01, pool=pool)
+
+        self.assertEqual(enricher.enrich(apartments), 2)
+        self.assertEqual(len(pool.requests), 6)
+
+    def test_missing_page_is_not_retried(self):
+        pool = FakePool(statuses=[404])
+        apartments = make_apartments(1)
+        enricher = DetailsEnricher(ApartmentsSite.avito, requests_per_second=1000, backoff=0.01, pool=pool)
+
+        self.assertEqual(enricher.enrich(apartments), 0)
+        self.assertEqual(len(pool.requests), 1)
+        self.assertIsNone(apartments[0].additional_info)
+
+    def test_pages_are_cached_and_shared(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(os.path.join(directory, "details.sqlite3"))
+            pool = FakePool()
+            enricher = DetailsEnricher(ApartmentsSite.avito, requests_per_second=1000, cache=cache, pool=pool)
+
+            self.assertEqual(enricher.enrich(make_apartments(3) + make_apartments(3)), 6)
+            self.assertEqual(enricher.enrich(make_apartments(3)), 3)
+            self.assertEqual(len(pool.requests), 3)
+            cache.close()
+
+    def test_pages_without_details_are_not_cached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(os.path.join(directory, "details.sqlite3"))
+            pool = FakePool(html="<html><body><h2>Доступ ограничен</h2></body></html>")
+            enricher = DetailsEnricher(ApartmentsSite.avito, requests_per_second=1000, cache=cache, pool=pool)
+            apartments = make_apartments(1)
+
+            self.assertEqual(enricher.enrich(apartments), 0)
+            self.assertIsNone(cache.get(apartments[0].url))
+
+            pool.html = ITEM_HTML
+            self.assertEqual(enricher.enrich(apartments), 1)
+            self.assertEqual(len(pool.requests), 2)
+            cache.close()
+
+
+class RateLimiterTestCase(unittest.TestCase):
+    def test_unlimited_rate(self):
+        limiter = RateLimiter(0)
+
+        async def wait():
+            start = time.monotonic()
+            for _ in range(100):
+                await limiter.wait("www.avito.ru")
+            return time.monotonic() - start
+
+        self.assertLess(asyncio.run(wait()), 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,344 @@
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException
+from selenium.webdriver.common.by import By
+from page_parser import PageParser
+from typing import Callable
+from utils import Any, Optional
+import apartments as aparts
+import os
+import threading
+import time
+
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class Commands(Counter):
+    """
+    Counter of the web driver's commands, where key is a name of the command.
+    Every command can be delayed to imitate a round trip to the real web driver.
+    """
+    latency: float
+
+    def __init__(self, latency: float = 0):
+        super().__init__()
+        self.latency = latency
+
+    def record(self, name: str):
+        self[name] += 1
+
+        if self.latency:
+            time.sleep(self.latency)
+
+
+class FakeWebElement:
+    """
+    In-memory replacement of the selenium's `WebElement` which counts every call made through it.
+    """
+    _text: str
+    _attributes: dict[str, str]
+    _children: dict[str, "FakeWebElement"]
+    _calls: Commands
+    _on_click: Optional[Callable[[], None]]
+    is_stale: bool
+
+    def __init__(self,
+                 calls: Commands,
+                 text: str = "",
+                 attributes: Optional[dict[str, str]] = None,
+                 children: Optional[dict[str, "FakeWebElement"]] = None,
+                 on_click: Optional[Callable[[], None]] = None):
+        self._calls = calls
+        self._text = text
+        self._attributes = attributes or {}
+        self._children = children or {}
+        self._on_click = on_click
+        self.is_stale = False
+
+    @property
+    def text(self) -> str:
+        self._calls.record("text")
+        return self._text
+
+    def find_element(self, by: str, value: str) -> "FakeWebElement":
+        self._calls.record("find_element")
+
+        if by != By.CLASS_NAME or value not in self._children:
+            raise NoSuchElementException(f"No element with {by}={value}")
+
+        return self._children[value]
+
+    def find_elements(self, by: str, value: str) -> list["FakeWebElement"]:
+        self._calls.record("find_elements")
+        return [self._children[value]] if by == By.CLASS_NAME and value in self._children else []
+
+    def get_attribute(self, name: str) -> Optional[str]:
+        self._calls.record("get_attribute")
+        return self._attributes.get(name)
+
+    def get_property(self, name: str) -> Optional[str]:
+        return self._attributes.get(name)
+
+    def is_displayed(self) -> bool:
+        self._calls.record("is_displayed")
+        return True
+
+    def is_enabled(self) -> bool:
+        self._calls.record("is_enabled")
+
+        if self.is_stale:
+            raise StaleElementReferenceException("Element is not attached to the page")
+        return True
+
+    def click(self):
+        self._calls.record("click")
+
+        if self._on_click:
+            self._on_click()
+
+    def send_keys(self, *value: str):
+        self._calls.record("send_keys")
+
+
+class FakeWebDriver:
+    """
+    In-memory replacement of the selenium's `WebDriver` which serves the given pages of cards
+    and counts every call made through it. Pages are linked by the next page links with "page:<index>" urls.
+    Every call is delayed by `latency` seconds.
+    """
+    calls: Commands
+    pages: list[list[FakeWebElement]]
+    sources: list[str]
+    page_index: int
+    is_closed: bool
+
+    def __init__(self, cards_class: str, next_page_xpath: Optional[str] = None, latency: float = 0):
+        self.calls = Commands(latency)
+        self.pages = [list()]
+        self.sources = list()
+        self.page_index = 0
+        self.is_closed = False
+        self._cards_class = cards_class
+        self._next_page_xpath = next_page_xpath
+
+    @classmethod
+    def from_html(cls, pages: list[str], site: aparts.ApartmentsSite, latency: float = 0) -> "FakeWebDriver":
+        """
+        Makes driver which serves cards of the recorded search results pages.
+
+        :param pages: html sources of the pages in the order of pagination.
+        :param site: site from which the pages were recorded.
+        :param latency: delay of every call in seconds.
+        :return: `FakeWebDriver` object.
+        """
+        driver = cls(site.get_list_of_apartments(), site.get_next_page(), latency)
+        driver.pages.clear()
+        driver.sources = list(pages)
+
+        for html in pages:
+            driver.add_page()
+
+            for data in PageParser.parse(html, site)[0]:
+                children = dict()
+
+                for key, class_name, attribute in site.get_apartments_fields():
+                    if data[key] is None:
+                        continue
+
+                    element = children.setdefault(class_name, driver.make_element())
+
+                    if attribute:
+                        element._attributes[attribute] = data[key]
+                    else:
+                        element._text = data[key]
+                driver.add_card(children)
+        return driver
+
+    @property
+    def cards(self) -> list[FakeWebElement]:
+        return self.pages[self.page_index]
+
+    def make_element(self, text: str = "", **attributes) -> FakeWebElement:
+        return FakeWebElement(self.calls, text, attributes)
+
+    def add_card(self, children: dict[str, FakeWebElement]):
+        self.pages[-1].append(FakeWebElement(self.calls, children=children))
+
+    def add_page(self):
+        self.pages.append(list())
+
+    def set_window_size(self, width: int, height: int):
+        self.calls.record("set_window_size")
+
+    def implicitly_wait(self, time_to_wait: float):
+        self.calls.record("implicitly_wait")
+
+    @property
+    def current_url(self) -> str:
+        self.calls.record("current_url")
+        return f"page:{self.page_index}"
+
+    @property
+    def page_source(self) -> str:
+        """
+        Html of the current page, only drivers made from html have it.
+        """
+        self.calls.record("page_source")
+        return self.sources[self.page_index]
+
+    def get(self, url: str):
+        self.calls.record("get")
+
+        self.page_index = int(url.removeprefix("page:")) if url.startswith("page:") else 0
+
+    def find_element(self, by: str, value: str) -> FakeWebElement:
+        """
+        Every control of the site's filters is present on the fake page.
+        Click on any of them reloads cards of the current page.
+        """
+        self.calls.record("find_element")
+        return FakeWebElement(self.calls, on_click=self._reload_cards)
+
+    def _reload_cards(self):
+        for card in self.cards:
+            card.is_stale = True
+
+        self.pages[self.page_index] = [FakeWebElement(self.calls, children=card._children) for card in self.cards]
+
+    def close(self):
+        self.calls.record("close")
+        self.is_closed = True
+
+    def quit(self):
+        self.calls.record("quit")
+        self.is_closed = True
+
+    def find_elements(self, by: str, value: str) -> list[FakeWebElement]:
+        self.calls.record("find_elements")
+
+        if by == By.XPATH and value == self._next_page_xpath and self.page_index + 1 < len(self.pages):
+            return [self.make_element(href=f"page:{self.page_index + 1}")]
+
+        return self.cards if by == By.CLASS_NAME and value == self._cards_class else []
+
+    def execute_script(self, script: str, *args) -> Any:
+        """
+        Emulates the batch extraction script of the `Apartment`.
+        """
+        self.calls.record("execute_script")
+        cards, fields = args
+        result = list()
+
+        for card in cards:
+            data = dict()
+
+            for key, class_name, attribute in fields:
+                element = card._children.get(class_name)
+
+                if element is None:
+                    data[key] = None
+                elif attribute:
+                    data[key] = element.get_property(attribute)
+                else:
+                    data[key] = element._text
+            result.append(data)
+        return result
+
+    def round_trips(self) -> int:
+        return sum(self.calls.values())
+
+
+def make_driver(number_of_pages: int, cards_per_page: int) -> FakeWebDriver:
+    """
+    Makes fake driver of avito's search results, names of the cards are "<page>-<index>".
+    """
+    site = aparts.ApartmentsSite.avito
+    driver = FakeWebDriver(site.get_list_of_apartments(), site.get_next_page())
+
+    for page in range(number_of_pages):
+        if page:
+            driver.add_page()
+
+        for index in range(cards_per_page):
+            driver.add_card({
+                site.get_apartments_name(): driver.make_element(title=f"{page}-{index}",
+                                                                href=f"https://www.avito.ru/{page}/{index}")
+            })
+    return driver
+
+
+class FixturesServer:
+    """
+    Local http server which serves saved search results pages of Saint Petersburg,
+    the page is chosen by the `p` query parameter. Pages from `missing_pages` are answered with 404,
+    pages from `blocked_pages` are answered with a captcha page without apartments.
+    Page with heavy assets is served at `heavy_page_url`, every asset is `asset_size` bytes long.
+    """
+    asset_size = 256 * 1024
+
+    server: ThreadingHTTPServer
+    base_url: str
+    heavy_page_url: str
+    requested_queries: list[dict[str, list[str]]]
+    requested_assets: list[str]
+    missing_pages: set[str]
+    blocked_pages: set[str]
+
+    def __init__(self):
+        requested_queries = self.requested_queries = list()
+        requested_assets = self.requested_assets = list()
+        missing_pages = self.missing_pages = set()
+        blocked_pages = self.blocked_pages = set()
+        asset_size = self.asset_size
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+
+                if url.path.startswith("/assets/"):
+                    requested_assets.append(url.path)
+                    self.send_response(200)
+                    self.send_header("Content-Length", str(asset_size))
+                    self.end_headers()
+                    self.wfile.write(bytes(asset_size))
+                    return
+
+                if url.path == "/heavy_page.html":
+                    path = os.path.join(FIXTURES, "heavy_page.html")
+                else:
+                    requested_queries.append(query)
+                    page = query.get('p', ['1'])[0]
+                    path = os.path.join(FIXTURES, f"avito_page_{page}.html")
+
+                    is_missing = page in missing_pages or not os.path.exists(path)
+
+                    if not url.path.startswith("/sankt-peterburg/") or is_missing:
+                        self.send_error(404)
+                        return
+
+                if page in blocked_pages:
+                    body = "<html><body><h2>Доступ ограничен</h2></body></html>".encode()
+                else:
+                    with open(path, "rb") as file:
+                        body = file.read()
+
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}/sankt-peterburg/kvartiry"
+        self.heavy_page_url = f"http://127.0.0.1:{self.server.server_port}/heavy_page.html"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,56 @@
+import unittest
+from apartments import Apartment, ApartmentBatch, ApartmentsSite
+from configurations import Configurations
+from filters import FilterEngine
+
+
+def make_batch() -> ApartmentBatch:
+    listings = [
+        ("1-к. квартира, 38 м²", "25 000 ₽ в месяц", "Невский пр., 120"),
+        ("2-к. квартира, 54 м²", "38 500 ₽ в месяц", "ул. Савушкина, 12"),
+        ("Квартира-студия, 24 м²", "21 000 ₽ в месяц", None),
+        ("3-к. квартира, 78 м²", "65 000 ₽ в месяц", "Московский пр., 200"),
+        ("6-к. квартира, 180 м²", "250 000 ₽ в месяц", "Невский пр., 3"),
+        ("1-к. квартира, 31 м²", None, "ул. Бабушкина, 36"),
+    ]
+    batch = ApartmentBatch(ApartmentsSite.avito)
+
+    for index, (name, price, address) in enumerate(listings):
+        batch.append(Apartment.from_dict({"name": name, "url": str(index), "price": price, "address": address},
+                                         ApartmentsSite.avito))
+    return batch
+
+
+class FilterEngineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = FilterEngine(make_batch())
+
+    def query(self, json_data: dict, **kwargs) -> list[int]:
+        return self.engine.query(Configurations(json_data), **kwargs).tolist()
+
+    def test_price(self):
+        self.assertEqual(self.query({"price": [21000, 38500]}), [0, 1, 2])
+        self.assertEqual(self.query({"price": [40000, 30000]}), [])
+
+    def test_rooms(self):
+        self.assertEqual(self.query({"rooms": [0, 1]}), [0, 2, 5])
+        self.assertEqual(self.query({"rooms": [5]}), [4])
+
+    def test_location(self):
+        self.assertEqual(self.query({"location": "невский"}), [0, 4])
+        self.assertEqual(self.query({"location": "Невский 120"}), [0])
+        self.assertEqual(self.query({"location": "невс"}), [])
+        self.assertEqual(self.query({"location": "невс"}, substring=True), [0, 4])
+
+    def test_all_fields_and_order(self):
+        self.assertEqual(self.query({"price": [0, 100000], "rooms": [1, 2, 3]}, order_by_price=True), [0, 1, 3])
+        self.assertEqual(self.query({}, order_by_price=True), [2, 0, 1, 3, 4, 5])
+        self.assertEqual(self.query({}, order_by_price=False), [4, 3, 1, 0, 2, 5])
+
+    def test_select(self):
+        batch = self.engine.select(Configurations({"location": "пр"}), order_by_price=True)
+        self.assertEqual(batch.urls, ["0", "3", "4"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+import numpy as np
+from apartments import Apartment, ApartmentsSite
+from configurations import Configurations
+from filters import FilterEngine
+from filters_test_case import make_batch
+from geo import Gazetteer, GridIndex, LocationFilter, get_gazetteer, normalize_address, project
+import network
+
+
+ADDRESSES = [
+    "Санкт-Петербург, Невский пр., 120",
+    "ул. Савушкина, 12",
+    "Литейный проспект, д. 10",
+    "Московский пр-т, 200",
+    "Адрес, которого нет",
+    None,
+    "Невский проспект, 3",
+    "м. Чернышевская",
+    "Приморский р-н, Богатырский пр., 12",
+]
+
+
+class NormalizeAddressTestCase(unittest.TestCase):
+    def test_abbreviations_city_and_house_are_normalized(self):
+        self.assertEqual(normalize_address("Санкт-Петербург, Невский пр., 120"), "невский проспект")
+        self.assertEqual(normalize_address("наб. р. Фонтанки, д. 40, лит. А"), "набережная реки фонтанки")
+        self.assertEqual(normalize_address("СПб, Московский пр-т, 200"), "московский проспект")
+        self.assertEqual(normalize_address(None), "")
+
+    def test_geocode_ignores_order_of_street_type(self):
+        gazetteer = get_gazetteer()
+
+        self.assertEqual(gazetteer.geocode("Савушкина ул., 12").name, "улица Савушкина")
+        self.assertEqual(gazetteer.geocode("улица Савушкина, 12").name, "улица Савушкина")
+        self.assertEqual(gazetteer.geocode("метро Чернышевская").kind, "metro")
+        self.assertEqual(gazetteer.find_district("Приморский р-н, Богатырский пр., 12").name, "Приморский")
+        self.assertIsNone(gazetteer.find_district("Невский пр., 120"))
+        self.assertIsNone(gazetteer.geocode("Адрес, которого нет"))
+
+
+class GridIndexTestCase(unittest.TestCase):
+    def test_within_matches_brute_force(self):
+        random = np.random.default_rng(1)
+        latitudes = random.uniform(59.8, 60.1, 2000)
+        longitudes = random.uniform(30.1, 30.5, 2000)
+        latitudes[::10] = np.nan
+        index = GridIndex(latitudes, longitudes, cell_size=0.5)
+
+        xs, ys = project(latitudes, longitudes)
+        x, y = project(59.94, 30.31)
+        expected = np.flatnonzero(np.hypot(xs - x, ys - y) <= 2.5)
+
+        self.assertEqual(index.within(59.94, 30.31, 2.5).tolist(), expected.tolist())
+        self.assertEqual(index.within(10.0, 10.0, 1.0).tolist(), [])
+
+
+class LocationFilterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.locations = LocationFilter(ADDRESSES)
+
+    def test_unknown_addresses_have_no_coordinates(self):
+        self.assertIsNone(self.locations.get_coordinates(4))
+        self.assertIsNone(self.locations.get_coordinates(5))
+        self.assertIsNotNone(self.locations.get_coordinates(0))
+
+    def test_near_metro(self):
+        self.assertEqual(np.flatnonzero(self.locations.near_metro("Маяковская", 1.5)).tolist(), [0, 2, 6, 7])
+        self.assertFalse(self.locations.near_metro("Нет такой станции").any())
+
+    def test_in_district(self):
+        self.assertEqual(np.flatnonzero(self.locations.in_district("Центральный район")).tolist(), [0, 2, 6, 7])
+        self.assertEqual(np.flatnonzero(self.locations.in_district("Приморский")).tolist(), [1, 8])
+
+    def test_match(self):
+        self.assertEqual(np.flatnonzero(self.locations.match("Московский проспект", 1.0)).tolist(), [3])
+        self.assertIsNone(self.locations.match("Луна"))
+        self.assertEqual(np.flatnonzero(self.locations.match("Приморский район", keep_unknown=True)).tolist(),
+                         [1, 4, 5, 8])
+        self.assertEqual(np.flatnonzero(self.locations.match("м. Маяковская", keep_unknown=True)).tolist(),
+                         [0, 2, 4, 5, 6, 7, 8])
+
+    def test_custom_gazetteer(self):
+        gazetteer = Gazetteer({"districts": ["Тестовый"],
+                               "metro": [{"name": "Тестовая", "lat": 59.9, "lon": 30.3, "district": "Тестовый"}]})
+        locations = LocationFilter(["м. Тестовая", "Невский пр., 1"], gazetteer)
+
+        self.assertEqual(locations.in_district("Тестовый").tolist(), [True, False])
+
+
+class FilterEngineLocationTestCase(unittest.TestCase):
+    def test_known_location_is_matched_by_coordinates(self):
+        engine = FilterEngine(make_batch(), gazetteer=get_gazetteer())
+
+        self.assertEqual(engine.query(Configurations({"location": "м. Маяковская"})).tolist(), [0, 4])
+        self.assertEqual(engine.query(Configurations({"location": "Приморский район"})).tolist(), [1])
+
+    def test_unknown_location_is_matched_by_words(self):
+        engine = FilterEngine(make_batch(), gazetteer=get_gazetteer())
+
+        self.assertEqual(engine.query(Configurations({"location": "бабушкина"})).tolist(), [5])
+
+    def test_results_are_filtered_by_location(self):
+        apartments = [Apartment.from_dict({"name": str(index), "url": str(index), "address": address},
+                                          ApartmentsSite.avito)
+                      for index, address in enumerate(ADDRESSES)]
+
+        filtered = network._filter_by_location(apartments, "Центральный район")
+
+        self.assertEqual([apartment.url for apartment in filtered], ["0", "2", "4", "5", "6", "7"])
+        self.assertEqual(network._filter_by_location(apartments, "Луна"), apartments)
+        self.assertEqual(network._filter_by_location(apartments, None), apartments)
+
+    def test_unknown_streets_of_the_district_are_kept(self):
+        apartments = [Apartment.from_dict({"name": str(index), "url": str(index), "address": address},
+                                          ApartmentsSite.avito)
+                      for index, address in enumerate(["Приморский р-н, Богатырский пр., 12", "ул. Оптиков, 4",
+                                                       "Невский пр., 120", "Центральный р-н, ул. Маяковского, 5"])]
+
+        filtered = network._filter_by_location(apartments, "Приморский район")
+
+        self.assertEqual([apartment.url for apartment in filtered], ["0", "1"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+from apartments import ApartmentsSite
+from configurations import Configurations
+from fakes import FixturesServer
+from http_parser import HttpSiteParser
+
+
+class HttpSiteParserTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FixturesServer()
+        cls.base_url = cls.server.base_url
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def setUp(self):
+        self.server.requested_queries.clear()
+
+    def make_parser(self, json_data: dict) -> HttpSiteParser:
+        parser = HttpSiteParser(Configurations(json_data), ApartmentsSite.avito, base_url=self.base_url)
+        self.assertTrue(parser.set_config())
+        return parser
+
+    def test_all_pages_are_parsed(self):
+        apartments = self.make_parser({}).get_apartments()
+
+        self.assertEqual(len(apartments), 6)
+        self.assertEqual(len(self.server.requested_queries), 2)
+        self.assertEqual(apartments[0].as_dict(), {
+            "name": "1-к. квартира, 38 м², 5/12 эт.",
+            "url": f"{self.base_url}/1-k._kvartira_38m_512et._2301",
+            "price": "25 000 ₽ в месяц",
+            "price_value": 25000,
+            "currency": "RUB",
+            "period": "month",
+            "additional_info": None,
+            "address": "Невский пр., 120",
+            "alternate_urls": []
+        })
+        self.assertIsNone(apartments[2].address)
+
+    def test_config_is_applied(self):
+        apartments = self.make_parser({"price": [20000, 40000], "rooms": [0, 1]}).get_apartments()
+
+        self.assertEqual(self.server.requested_queries[0], {"pmin": ["20000"], "pmax": ["40000"]})
+        self.assertEqual([apartment.url[-4:] for apartment in apartments], ["2301", "2303", "2305"])
+
+    def test_limits(self):
+        self.assertEqual(len(self.make_parser({}).get_apartments(max_pages=1)), 4)
+        self.assertEqual(len(self.server.requested_queries), 1)
+        self.assertEqual(len(self.make_parser({}).get_apartments(max_items=5)), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+import os
+import tempfile
+import unittest
+from apartments import ApartmentsSite
+from configurations import Configurations
+from fakes import FixturesServer
+from http_parser import HttpSiteParser
+from listing_index import IncrementalCrawler, ListingIndex
+
+
+class IncrementalCrawlerTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = FixturesServer()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.index = ListingIndex(os.path.join(self.directory.name, "listings.sqlite3"))
+        self.server.requested_queries.clear()
+
+    def tearDown(self):
+        self.index.close()
+        self.directory.cleanup()
+        self.server.missing_pages.clear()
+        self.server.blocked_pages.clear()
+
+    def crawl(self, stop_after_known=None):
+        parser = HttpSiteParser(Configurations({}), ApartmentsSite.avito, base_url=self.server.base_url)
+        parser.set_config()
+        return IncrementalCrawler(parser, self.index, "avito", stop_after_known).crawl()
+
+    def test_only_changes_are_reported(self):
+        report = self.crawl()
+        self.assertEqual((len(report.new), len(report.changed), report.known_count), (6, 0, 0))
+        self.assertEqual(self.server.requested_queries[0]["s"], ["104"])
+
+        url = report.new[1].url
+        self.index.update("avito", {url: "outdated", "https://www.avito.ru/removed": "removed"}, set())
+        report = self.crawl()
+
+        self.assertEqual(report.new, [])
+        self.assertEqual([apartment.url for apartment in report.changed], [url])
+        self.assertEqual(report.removed, ["https://www.avito.ru/removed"])
+        self.assertEqual(report.known_count, 5)
+        self.assertTrue(report.is_complete)
+
+    def test_crawl_stops_after_known_listings(self):
+        self.crawl()
+        self.server.requested_queries.clear()
+        report = self.crawl(stop_after_known=2)
+
+        self.assertEqual(report.known_count, 2)
+        self.assertFalse(report.is_complete)
+        self.assertEqual(len(self.server.requested_queries), 1)
+        self.assertEqual(len(self.index.get_urls("avito")), 6)
+
+    def test_listings_of_failed_page_are_not_removed(self):
+        self.crawl()
+        self.server.missing_pages.add("2")
+        report = self.crawl()
+
+        self.assertFalse(report.is_complete)
+        self.assertEqual(report.removed, [])
+        self.assertEqual(len(self.index.get_urls("avito")), 6)
+
+    def test_listings_of_blocked_page_are_not_removed(self):
+        self.crawl()
+        self.server.blocked_pages.add("2")
+        report = self.crawl()
+
+        self.assertFalse(report.is_complete)
+        self.assertEqual(report.removed, [])
+        self.assertEqual(len(self.index.get_urls("avito")), 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
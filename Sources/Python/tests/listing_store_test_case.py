@@ -0,0 +1,72 @@
+import os
+import tempfile
+import time
+import unittest
+from apartments import Apartment, ApartmentsSite
+from listing_store import ListingStore
+
+
+DAY = 24 * 60 * 60
+
+
+def make_apartment(index: int, price: int, rooms: int = 1, address: str = "Невский проспект, 1") -> Apartment:
+    return Apartment.from_dict({
+        "name": f"{rooms}-к. квартира, 40 м², 2/9 эт.",
+        "url": f"https://www.avito.ru/item_{index}",
+        "price": f"{price} ₽ в месяц",
+        "address": address
+    }, ApartmentsSite.avito)
+
+
+class ListingStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ListingStore(os.path.join(self.directory.name, "listings.sqlite3"))
+
+    def tearDown(self):
+        self.store.close()
+        self.directory.cleanup()
+
+    def test_listings_are_upserted_with_price_history(self):
+        now = time.time()
+        self.store.save([make_apartment(1, 30000), make_apartment(2, 24000)], seen_at=now - 10 * DAY)
+        self.store.save([make_apartment(1, 24500), make_apartment(2, 24000), make_apartment(2, 24000)], seen_at=now)
+
+        self.assertEqual(len(self.store), 2)
+        self.assertEqual(self.store.get_price_history("https://www.avito.ru/item_1"),
+                         [(now - 10 * DAY, 30000), (now, 24500)])
+        self.assertEqual(self.store.get_price_history("https://www.avito.ru/item_2"), [(now - 10 * DAY, 24000)])
+
+        dropped = self.store.query(max_price=25000, dropped_since=now - 7 * DAY)
+        self.assertEqual([listing["url"] for listing in dropped], ["https://www.avito.ru/item_1"])
+        self.assertEqual((dropped[0]["previous_price"], dropped[0]["first_seen"]), (30000, now - 10 * DAY))
+
+    def test_query_by_rooms_and_address(self):
+        self.store.save([
+            make_apartment(1, 20000, rooms=1, address="Невский проспект, 1"),
+            make_apartment(2, 30000, rooms=2, address="невский  проспект, 20"),
+            make_apartment(3, 25000, rooms=2, address="Лиговский проспект, 5")
+        ])
+
+        urls = [listing["url"] for listing in self.store.query(rooms=[2], address="Невский")]
+        self.assertEqual(urls, ["https://www.avito.ru/item_2"])
+
+        prices = [listing["price_value"] for listing in self.store.query(min_price=21000)]
+        self.assertEqual(prices, [25000, 30000])
+
+    def test_queries_use_indexes(self):
+        self.store.save([make_apartment(index, 15000 + index % 30000, rooms=index % 4) for index in range(20000)])
+
+        for conditions in [{"max_price": 25000, "dropped_since": time.time() - 7 * DAY},
+                           {"address": "Невский"},
+                           {"rooms": [2], "max_price": 20000}]:
+            plan = " ".join(self.store.explain(**conditions))
+            self.assertIn("USING INDEX", plan, conditions)
+
+        start = time.perf_counter()
+        self.store.query(max_price=25000, dropped_since=time.time() - 7 * DAY)
+        self.assertLess(time.perf_counter() - start, 0.05)
+
+
+if __name__ == '__main__':
+    unittest.main()
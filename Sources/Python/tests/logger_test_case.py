@@ -0,0 +1,120 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from logger import AsyncFileLogger, Level, SilentLogger, StandardCLLogger, get_default_logger, log_level_variable
+from network import ParserDelegate
+
+
+class Formatted:
+    """
+    Object counts how many times it was converted into a string.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return "formatted"
+
+
+class BlockedLogger(AsyncFileLogger):
+    """
+    Logger which writer waits for the release before it formats the first record.
+    """
+    def __init__(self, path: str, entered: threading.Event, release: threading.Event, **kwargs):
+        self.entered = entered
+        self.release = release
+        super().__init__(path, **kwargs)
+
+    def _format(self, record: tuple) -> str:
+        if not self.entered.is_set():
+            self.entered.set()
+            self.release.wait(5)
+        return super()._format(record)
+
+
+class LoggerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "parser.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def read_lines(self, path: str = None) -> list[str]:
+        with open(path or self.path, encoding="utf-8") as file:
+            return file.read().splitlines()
+
+    def test_disabled_records_are_not_formatted(self):
+        value = Formatted()
+        StandardCLLogger.log(Level.debug, "Apartment was parsed: {}", value)
+        SilentLogger.log(Level.error, "Error occur: {}", value)
+        ParserDelegate(logger=SilentLogger).apartment_was_parsed(value)
+
+        self.assertEqual(value.count, 0)
+
+    def test_records_are_written_by_level(self):
+        logger = AsyncFileLogger(self.path, Level.info)
+        value = Formatted()
+        logger.log(Level.debug, "skipped {}", value)
+        logger.out("Configuration was completed")
+        logger.log(Level.error, "Error occur: {}", value)
+        logger.close()
+
+        self.assertEqual(value.count, 1)
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[0].endswith("INFO: Configuration was completed"))
+        self.assertTrue(lines[1].endswith("ERROR: Error occur: formatted"))
+
+    def test_file_is_rotated(self):
+        logger = AsyncFileLogger(self.path, max_bytes=200, backup_count=2, batch_size=1)
+
+        for index in range(30):
+            logger.log(Level.info, "record {}", index)
+        logger.close()
+
+        self.assertTrue(os.path.exists(f"{self.path}.1"))
+        self.assertTrue(os.path.exists(f"{self.path}.2"))
+        self.assertFalse(os.path.exists(f"{self.path}.3"))
+        self.assertTrue(self.read_lines()[-1].endswith("record 29"))
+
+    def test_records_are_dropped_when_queue_is_full(self):
+        entered, release = threading.Event(), threading.Event()
+        logger = BlockedLogger(self.path, entered, release, queue_size=1)
+        logger.out("blocked")
+        self.assertTrue(entered.wait(5))
+
+        logger.out("queued")
+        logger.out("dropped")
+        release.set()
+        logger.close()
+
+        self.assertEqual(logger.dropped, 1)
+        self.assertEqual(len(self.read_lines()), 2)
+
+    def test_records_keep_values_at_the_moment_of_logging(self):
+        entered, release = threading.Event(), threading.Event()
+        logger = BlockedLogger(self.path, entered, release)
+        logger.out("blocked")
+        self.assertTrue(entered.wait(5))
+
+        prices = [25000]
+        logger.log(Level.info, "Prices: {}", prices)
+        prices.append(30000)
+        release.set()
+        logger.close()
+
+        self.assertTrue(self.read_lines()[1].endswith("INFO: Prices: [25000]"))
+
+    def test_unknown_level_names_the_variable(self):
+        with mock.patch.dict(os.environ, {log_level_variable: "verbose"}), \
+                mock.patch("logger._default_logger", None):
+            with self.assertRaisesRegex(ValueError, log_level_variable):
+                get_default_logger()
+
+
+if __name__ == '__main__':
+    unittest.main()
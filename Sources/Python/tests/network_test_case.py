@@ -0,0 +1,319 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from unittest import mock
+from apartments import Apartment, ApartmentsSite
+from cache import ResultCache
+from configurations import Configurations
+from drivers import DriverFactory
+from fakes import FakeWebDriver, FixturesServer, make_driver
+from waits import Timeouts
+from network import Backend, Job, ParserDelegate, SiteParser, iter_job_pages, request_binary, run_jobs, stream_job
+from logger import SilentLogger
+import columnar
+import network
+
+
+PYTHON_SOURCES = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class PagesDelegate(ParserDelegate):
+    def __init__(self):
+        super().__init__(logger=SilentLogger)
+        self.parsed_pages = list()
+        self.pages = None
+
+    def page_was_parsed(self, page: int, apartments_count: int):
+        self.parsed_pages.append((page, apartments_count))
+
+    def all_apartments_were_parsed(self, apartments: list[Apartment], pages: int):
+        self.pages = pages
+
+
+class SiteParserTestCase(unittest.TestCase):
+    def test_import_is_cheap_and_side_effect_free(self):
+        script = "import sys, time\n" \
+                 "start = time.perf_counter()\n" \
+                 "import network\n" \
+                 "print(time.perf_counter() - start)\n" \
+                 "print(any(name.startswith(('selenium.webdriver.safari', 'selenium.webdriver.chrome'))\n" \
+                 "          for name in sys.modules))\n" \
+                 "print('numpy' in sys.modules)\n"
+        output = subprocess.run([sys.executable, "-c", script], cwd=PYTHON_SOURCES,
+                                capture_output=True, text=True, check=True).stdout.split()
+
+        self.assertLess(float(output[0]), 2.0)
+        self.assertEqual(output[1], "False")
+        self.assertEqual(output[2], "False")
+
+    def test_driver_is_created_lazily(self):
+        created = list()
+
+        def make():
+            created.append(make_driver(1, 1))
+            return created[-1]
+
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, driver_factory=DriverFactory(make=make))
+        self.assertEqual(created, [])
+
+        parser.get_apartments()
+        parser.get_apartments()
+        self.assertEqual(len(created), 1)
+
+        del parser
+        self.assertTrue(created[0].is_closed)
+
+    def test_config_waits_for_refreshed_results(self):
+        driver = make_driver(1, 3)
+        old_cards = list(driver.cards)
+        parser = SiteParser(Configurations({"rooms": [1, 2], "price": [10000, 20000]}),
+                            ApartmentsSite.avito, web_driver=driver)
+
+        start = time.perf_counter()
+        self.assertTrue(parser.set_config())
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertTrue(all(card.is_stale for card in old_cards))
+        self.assertEqual(driver.calls["implicitly_wait"], 1)
+
+    def test_all_pages_are_parsed(self):
+        driver = make_driver(3, 4)
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=driver)
+        apartments = parser.get_apartments()
+
+        self.assertEqual([apartment.name for apartment in apartments][3:6], ["0-3", "1-0", "1-1"])
+        self.assertEqual(len(apartments), 12)
+        self.assertEqual(parser._pages_seen, 3)
+
+    @mock.patch.object(ApartmentsSite, "get_timeouts", lambda site: Timeouts(element=0.1, results=0.1))
+    def test_empty_next_page_interrupts_parsing(self):
+        driver = make_driver(3, 4)
+        driver.pages[1].clear()
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=driver)
+
+        self.assertEqual(len(parser.get_apartments()), 4)
+        self.assertTrue(parser.is_interrupted)
+
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=make_driver(1, 0))
+        self.assertEqual(parser.get_apartments(), [])
+        self.assertFalse(parser.is_interrupted)
+
+    def test_delegate_gets_amount_of_pages(self):
+        delegate = PagesDelegate()
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=make_driver(3, 4), delegate=delegate)
+        parser.get_apartments()
+
+        self.assertEqual(delegate.parsed_pages, [(1, 4), (2, 4), (3, 4)])
+        self.assertEqual(delegate.pages, 3)
+
+    def test_next_page_is_prefetched(self):
+        driver = make_driver(3, 4)
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=driver)
+        pages = parser.iter_pages()
+        next(pages)
+        deadline = time.perf_counter() + 1
+
+        while driver.calls["get"] < 1 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(driver.calls["get"], 1)
+        self.assertEqual([apartment.name for apartment in next(pages)][:1], ["1-0"])
+        pages.close()
+
+    def test_page_limit(self):
+        driver = make_driver(3, 4)
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=driver)
+
+        self.assertEqual(len(list(parser.iter_apartments(max_pages=2))), 8)
+        self.assertEqual(driver.calls["get"], 1)
+
+    def test_items_limit(self):
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=make_driver(3, 4))
+        self.assertEqual(len(list(parser.iter_apartments(max_items=5))), 5)
+
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=make_driver(3, 4))
+        self.assertEqual(list(parser.iter_apartments(max_items=0)), [])
+
+    def test_early_stop(self):
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=make_driver(3, 4))
+        names = [apartment.name for apartment in parser.iter_apartments(should_stop=lambda a: a.name == "1-2")]
+
+        self.assertEqual(names, ["0-0", "0-1", "0-2", "0-3", "1-0", "1-1"])
+
+
+class SearchUrlCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.directory.name, "search_urls.sqlite3"))
+        self.configuration = Configurations({"rooms": [2, 1], "price": [10000, 20000]})
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def set_config(self, driver: FakeWebDriver) -> SiteParser:
+        parser = SiteParser(self.configuration, ApartmentsSite.avito, web_driver=driver, url_cache=self.cache)
+        self.assertTrue(parser.set_config())
+        return parser
+
+    def test_repeat_search_loads_cached_url(self):
+        first_driver = make_driver(2, 3)
+        self.set_config(first_driver)
+        self.assertGreater(first_driver.calls["click"], 0)
+
+        second_driver = make_driver(2, 3)
+        parser = self.set_config(second_driver)
+
+        self.assertEqual(second_driver.calls["click"], 0)
+        self.assertEqual(second_driver.calls["get"], 1)
+        self.assertEqual(len(parser.get_apartments()), 6)
+
+    def test_outdated_url_is_rebuilt(self):
+        key = f"avito:{self.configuration.get_key()}"
+        self.cache.put(key, "page:1")
+        driver = make_driver(1, 3)
+        driver.add_page()
+
+        self.set_config(driver)
+
+        self.assertGreater(driver.calls["click"], 0)
+        self.assertEqual(self.cache.get(key)[0], "page:0")
+
+
+class JobsDelegate(ParserDelegate):
+    def __init__(self):
+        super().__init__(logger=SilentLogger)
+        self.completed = list()
+        self.failed = list()
+
+    def job_was_completed(self, job: Job, apartments_count: int, elapsed: float):
+        self.completed.append((job, apartments_count))
+
+    def job_was_failed(self, job: Job, error: Exception, elapsed: float):
+        self.failed.append(job)
+
+
+class RunJobsTestCase(unittest.TestCase):
+    def test_results_are_merged(self):
+        server = FixturesServer()
+        site = ApartmentsSite.avito
+        jobs = [
+            Job(Configurations({}), site, Backend.http, server.base_url),
+            Job(Configurations({"rooms": [1]}), site, Backend.http, server.base_url),
+            Job(Configurations({}), site, Backend.http, server.base_url.replace("sankt-peterburg", "missing"))
+        ]
+        delegate = JobsDelegate()
+
+        try:
+            list_of_data = run_jobs(jobs, max_workers=2, delegate=delegate)
+        finally:
+            server.close()
+
+        self.assertEqual(len(list_of_data), 6)
+        self.assertEqual(len({data["url"] for data in list_of_data}), 6)
+        self.assertEqual(sorted(count for _, count in delegate.completed), [2, 6])
+        self.assertEqual(delegate.failed, [jobs[2]])
+
+    def test_results_are_filtered_by_location(self):
+        server = FixturesServer()
+        jobs = [Job(Configurations({"location": "Приморский район"}), ApartmentsSite.avito, Backend.http,
+                    server.base_url)]
+
+        try:
+            list_of_data = run_jobs(jobs, max_workers=1)
+        finally:
+            server.close()
+
+        self.assertEqual([data["address"] for data in list_of_data], ["ул. Савушкина, 12", None, "ул. Бабушкина, 36"])
+
+    def test_failed_job_reports_its_own_elapsed_time(self):
+        job = Job(Configurations({}), ApartmentsSite.avito, Backend.http, "http://127.0.0.1:9/missing")
+
+        with mock.patch.object(network.HttpSiteParser, "set_config", side_effect=RuntimeError("failed")):
+            list_of_data, elapsed, error = network._run_job(job)
+
+        self.assertEqual(list_of_data, [])
+        self.assertIsInstance(error, RuntimeError)
+        self.assertLess(elapsed, 1)
+
+
+class StreamJobTestCase(unittest.TestCase):
+    def setUp(self):
+        self.server = FixturesServer()
+        self.job = Job(Configurations({}), ApartmentsSite.avito, Backend.http, self.server.base_url)
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_records_are_passed_page_by_page(self):
+        chunks = list()
+        apartments_count = stream_job(self.job, chunks.append)
+        lines = [line for chunk in chunks for line in chunk.splitlines()]
+
+        self.assertEqual(apartments_count, 6)
+        self.assertEqual([len(chunk.splitlines()) for chunk in chunks], [4, 2])
+        self.assertTrue(all(chunk.endswith("\n") for chunk in chunks))
+        self.assertEqual(json.loads(lines[0])["price_value"], 25000)
+
+    def test_pages_are_filtered_by_location(self):
+        self.job.configuration = Configurations({"location": "Приморский район"})
+        chunks = list()
+        apartments_count = stream_job(self.job, chunks.append)
+        addresses = [json.loads(line)["address"] for chunk in chunks for line in chunk.splitlines()]
+
+        self.assertEqual(apartments_count, 3)
+        self.assertEqual(addresses, ["ул. Савушкина, 12", None, "ул. Бабушкина, 36"])
+
+    def test_pages_are_fetched_lazily(self):
+        pages = iter_job_pages(self.job)
+        next(pages)
+        self.assertEqual(len(self.server.requested_queries), 1)
+
+        pages.close()
+        self.assertEqual(len(self.server.requested_queries), 1)
+
+
+class RequestBinaryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(os.path.join(self.directory.name, "results.sqlite3"))
+        self.results = list()
+        patches = [
+            mock.patch.object(network, "get_result_cache", lambda: self.cache),
+            mock.patch.object(network, "_get_apartments", lambda *args: self.results.pop(0)),
+        ]
+
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_apartments_are_encoded_and_cached(self):
+        apartments = [Apartment.from_dict({"name": "1-к. квартира", "url": "a", "price": "25 000 ₽"},
+                                          ApartmentsSite.avito)]
+        self.results = [apartments]
+
+        buffer = request_binary("{}", Backend.http.value)
+
+        self.assertEqual(buffer, columnar.encode(apartments, ApartmentsSite.avito))
+        self.assertEqual(request_binary("{}", Backend.http.value), buffer)
+
+    def test_failures_are_not_empty_results(self):
+        self.results = [None, [], []]
+
+        with self.assertRaises(RuntimeError):
+            request_binary("{}", Backend.http.value)
+
+        self.assertEqual(columnar.decode(request_binary("{}", Backend.http.value))[1], [])
+        self.assertEqual(columnar.decode(request_binary("{}", Backend.http.value))[1], [])
+        self.assertEqual(self.results, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+from selenium.common.exceptions import NoSuchElementException
+from apartments import ApartmentsSite
+from configurations import Configurations
+from drivers import DriverFactory
+from fakes import FakeWebDriver
+from network import SiteParser
+from session_pool import SessionPool
+
+
+class SessionPoolTestCase(unittest.TestCase):
+    def setUp(self):
+        self.drivers = list()
+
+    def make_pool(self, max_size: int = 1, max_age: float = 60, driver_class: type = FakeWebDriver) -> SessionPool:
+        def make():
+            site = ApartmentsSite.avito
+            self.drivers.append(driver_class(site.get_list_of_apartments(), site.get_next_page()))
+            return self.drivers[-1]
+
+        return SessionPool(ApartmentsSite.avito, DriverFactory(make=make), max_size, max_age)
+
+    def test_sessions_are_reused(self):
+        pool = self.make_pool()
+
+        for _ in range(3):
+            with pool.session() as session:
+                parser = SiteParser(Configurations({}), ApartmentsSite.avito, session=session)
+                parser._set_website()
+                del parser
+
+        self.assertEqual(len(self.drivers), 1)
+        self.assertFalse(self.drivers[0].is_closed)
+        self.assertEqual(self.drivers[0].calls["click"], 1)
+        self.assertEqual(session.uses, 3)
+
+    def test_session_waits_for_category(self):
+        class SlowDriver(FakeWebDriver):
+            def find_element(self, by: str, value: str):
+                if self.calls["find_element"] < 2:
+                    self.calls.record("find_element")
+                    raise NoSuchElementException("Category is not rendered yet")
+                return super().find_element(by, value)
+
+        with self.make_pool(driver_class=SlowDriver).session():
+            pass
+
+        self.assertEqual(self.drivers[0].calls["click"], 1)
+        self.assertEqual(self.drivers[0].calls["find_element"], 3)
+
+    def test_size_is_limited(self):
+        pool = self.make_pool(max_size=2)
+        first = pool.acquire()
+        second = pool.acquire()
+
+        self.assertIsNot(first.driver, second.driver)
+        self.assertRaises(TimeoutError, pool.acquire, 0.05)
+
+        pool.release(first)
+        self.assertIs(pool.acquire(0.05), first)
+
+    def test_bad_and_old_sessions_are_recycled(self):
+        pool = self.make_pool()
+
+        with self.assertRaises(ValueError):
+            with pool.session():
+                raise ValueError()
+
+        self.assertTrue(self.drivers[0].is_closed)
+
+        pool = self.make_pool(max_age=0)
+
+        with pool.session():
+            pass
+
+        with pool.session():
+            pass
+
+        self.assertEqual(len(self.drivers), 3)
+        self.assertTrue(all(driver.is_closed for driver in self.drivers))
+
+    def test_close(self):
+        pool = self.make_pool(max_size=2)
+        idle = pool.acquire()
+        busy = pool.acquire()
+        pool.release(idle)
+        pool.close()
+
+        self.assertTrue(idle.driver.is_closed)
+        self.assertFalse(busy.driver.is_closed)
+        self.assertRaises(RuntimeError, pool.acquire)
+
+        pool.release(busy)
+        self.assertTrue(busy.driver.is_closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
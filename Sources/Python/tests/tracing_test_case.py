@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+import unittest
+from apartments import ApartmentsSite
+from configurations import Configurations
+from fakes import FakeWebDriver, make_driver
+from network import ParserDelegate, SiteParser
+from logger import SilentLogger
+from tracing import Tracer
+
+
+class CommandsDriver(FakeWebDriver):
+    """
+    Fake driver which sends page loads through `execute`, as remote web driver does.
+    """
+    def execute(self, driver_command: str, params: dict = None) -> dict:
+        return {}
+
+    def get(self, url: str):
+        self.execute("get", {"url": url})
+        super().get(url)
+
+
+class TracerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tracer = Tracer()
+        self.delegate = ParserDelegate(logger=SilentLogger, tracer=self.tracer)
+
+    def test_phases_are_timed(self):
+        parser = SiteParser(Configurations({"rooms": [1], "price": [10000, 20000]}),
+                            ApartmentsSite.avito, delegate=self.delegate, web_driver=make_driver(2, 3))
+
+        self.assertTrue(parser.set_config())
+        self.assertEqual(len(parser.get_apartments()), 6)
+
+        phases = self.tracer.get_phases()
+        self.assertEqual(phases["page"]["count"], 2)
+        self.assertEqual(phases["extract_all"]["count"], 2)
+        self.assertEqual(phases["prefetch"]["count"], 1)
+
+        for name in ("navigation", "set_category", "set_rooms", "set_price", "apply_config"):
+            self.assertEqual(phases[name]["count"], 1, name)
+
+    def test_every_apartment_is_timed_without_batch_extraction(self):
+        parser = SiteParser(Configurations({}), ApartmentsSite.avito, delegate=self.delegate,
+                            web_driver=make_driver(1, 4), batch_extraction=False)
+        parser.get_apartments()
+
+        self.assertEqual(self.tracer.get_phases()["apartment"]["count"], 4)
+
+    def test_commands_are_counted_until_tracer_is_closed(self):
+        driver = CommandsDriver(ApartmentsSite.avito.get_list_of_apartments())
+        SiteParser(Configurations({}), ApartmentsSite.avito, delegate=self.delegate, web_driver=driver)
+        driver.get("page:0")
+        driver.get("page:0")
+
+        self.assertEqual(self.tracer.get_commands()["get"]["count"], 2)
+        self.assertNotIn("get", self.tracer.get_phases())
+
+        self.tracer.close()
+        driver.get("page:0")
+        self.assertEqual(self.tracer.get_commands()["get"]["count"], 2)
+        self.assertEqual(driver.calls["get"], 3)
+
+    def test_closed_tracer_does_not_instrument_driver(self):
+        self.tracer.close()
+        driver = CommandsDriver(ApartmentsSite.avito.get_list_of_apartments())
+        SiteParser(Configurations({}), ApartmentsSite.avito, delegate=self.delegate, web_driver=driver)
+        driver.get("page:0")
+
+        self.assertNotIn("execute", driver.__dict__)
+        self.assertEqual(self.tracer.get_commands(), {})
+
+    def test_parser_without_tracer_does_not_instrument_driver(self):
+        driver = CommandsDriver(ApartmentsSite.avito.get_list_of_apartments())
+        SiteParser(Configurations({}), ApartmentsSite.avito, web_driver=driver)
+
+        self.assertNotIn("execute", vars(driver))
+
+    def test_export(self):
+        with self.tracer.span("navigation", url="https://www.avito.ru"):
+            pass
+        self.tracer.count_command("get", 0.5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with open(self.tracer.export(os.path.join(directory, "parser.json"))) as file:
+                data = json.load(file)
+            with open(self.tracer.export(os.path.join(directory, "parser.trace.json"))) as file:
+                trace = json.load(file)
+
+        self.assertEqual(data["phases"]["navigation"]["count"], 1)
+        self.assertEqual(data["commands"]["get"], {"count": 1, "total": 0.5})
+
+        event = trace["traceEvents"][0]
+        self.assertEqual((event["name"], event["ph"]), ("navigation", "X"))
+        self.assertEqual(event["args"], {"url": "https://www.avito.ru"})
+        self.assertEqual(trace["otherData"]["commands"]["get"]["count"], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from apartments import Apartment, ApartmentsSite
+from configurations import Configurations
+from fakes import FixturesServer
+from listing_index import CrawlReport
+from network import Backend, Job
+from watch import CircuitBreaker, Scheduler, Watch, WatchEvent, crawl_job
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class Runner:
+    """
+    Fake crawl of the job which reports a single new listing or raises the queued errors.
+    """
+    def __init__(self):
+        self.jobs = list()
+        self.errors = list()
+        self.running = 0
+        self.max_running = 0
+        self.release = threading.Event()
+        self.release.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, job: Job) -> CrawlReport:
+        with self._lock:
+            self.jobs.append(job)
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+
+        self.release.wait(5)
+
+        with self._lock:
+            self.running -= 1
+            error = self.errors.pop(0) if self.errors else None
+
+        if error:
+            raise error
+
+        report = CrawlReport()
+        report.new.append(Apartment.from_dict({"url": f"https://www.avito.ru/item_{len(self.jobs)}"}, ApartmentsSite.avito))
+        return report
+
+
+class SchedulerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        self.runner = Runner()
+        self.events: list[WatchEvent] = list()
+        self.scheduler = Scheduler(self.events.append, self.runner, max_concurrent=2, jitter=0.1,
+                                   max_backoff=1000, breaker_threshold=3, breaker_timeout=500,
+                                   clock=self.clock, seed=1)
+
+    def tearDown(self):
+        self.runner.release.set()
+        self.scheduler.close()
+
+    def run_at(self, time: float) -> int:
+        self.clock.now = time
+        started = self.scheduler.run_pending()
+        self.scheduler.wait()
+        return started
+
+    def test_duplicate_watches_are_coalesced(self):
+        self.scheduler.add(Watch("cheap", Configurations({"price": [10000, 20000], "rooms": [1, 2]}), interval=100))
+        self.scheduler.add(Watch("same", Configurations({"price": [10000, 20000], "rooms": [2, 1]}), interval=300))
+
+        self.assertEqual(self.run_at(1010), 1)
+        self.assertEqual(self.events[0].kind, "new")
+        self.assertEqual(self.events[0].watches, ["cheap", "same"])
+
+        next_run = self.scheduler.get_next_run()
+        self.assertTrue(1010 + 90 <= next_run <= 1010 + 110)
+        self.assertEqual(self.run_at(next_run - 1), 0)
+        self.assertEqual(self.run_at(next_run), 1)
+
+    def test_concurrency_is_limited(self):
+        self.runner.release.clear()
+
+        for index in range(5):
+            self.scheduler.add(Watch(f"watch_{index}", Configurations({"price": [index, 10000]}), interval=100))
+
+        self.clock.now = 1010
+        self.assertEqual(self.scheduler.run_pending(), 5)
+        self.assertEqual(self.scheduler.run_pending(), 0)
+        self.runner.release.set()
+        self.scheduler.wait()
+
+        self.assertEqual(self.runner.max_running, 2)
+        self.assertEqual(len(self.events), 5)
+
+    def test_failures_are_backed_off_and_break_the_circuit(self):
+        self.scheduler.add(Watch("watch", Configurations({}), interval=100))
+        self.runner.errors = [ConnectionError("throttled")] * 3
+        delays = list()
+        now = 1010
+
+        for _ in range(3):
+            self.assertEqual(self.run_at(now), 1)
+            delays.append(self.scheduler.get_next_run() - now)
+            now = self.scheduler.get_next_run()
+
+        self.assertEqual([event.kind for event in self.events], ["failed"] * 3)
+        self.assertTrue(90 <= delays[0] <= 110 and 180 <= delays[1] <= 220 and 360 <= delays[2] <= 440)
+
+        self.assertEqual(self.run_at(now), 0)
+        self.assertEqual(len(self.runner.jobs), 3)
+
+        self.assertEqual(self.run_at(now + 1000), 1)
+        self.assertEqual(self.events[-1].kind, "new")
+
+    def test_removed_watch_is_not_run(self):
+        self.scheduler.add(Watch("watch", Configurations({}), interval=100))
+        self.scheduler.remove("watch")
+
+        self.assertEqual(self.run_at(2000), 0)
+        self.assertEqual(self.scheduler.get_watches(), [])
+
+
+class CrawlJobTestCase(unittest.TestCase):
+    def test_only_new_listings_are_reported(self):
+        server = FixturesServer()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "watch_index.sqlite3")
+            job = Job(Configurations({}), ApartmentsSite.avito, Backend.http, server.base_url)
+
+            self.assertEqual(len(crawl_job(job, path).new), 6)
+            self.assertEqual(len(crawl_job(job, path).new), 0)
+
+            with self.assertRaises(Exception):
+                crawl_job(Job(Configurations({}), ApartmentsSite.avito, Backend.http, server.base_url.replace("sankt-peterburg", "moskva")), path)
+
+        server.close()
+
+    def test_configuration_failure_without_error(self):
+        job = Job(Configurations({}), ApartmentsSite.avito, Backend.http, "http://127.0.0.1:1")
+
+        with tempfile.TemporaryDirectory() as directory, \
+                mock.patch("watch.HttpSiteParser.set_config", return_value=False):
+            with self.assertRaises(RuntimeError):
+                crawl_job(job, os.path.join(directory, "watch_index.sqlite3"))
+
+
+class CircuitBreakerTestCase(unittest.TestCase):
+    def test_single_trial_after_timeout(self):
+        breaker = CircuitBreaker(threshold=2, reset_timeout=10)
+        breaker.record_failure(0)
+        self.assertTrue(breaker.allow(1))
+
+        breaker.record_failure(1)
+        self.assertFalse(breaker.allow(5))
+        self.assertTrue(breaker.allow(11))
+        self.assertFalse(breaker.allow(11))
+
+        breaker.record_failure(12)
+        self.assertFalse(breaker.allow(20))
+        self.assertTrue(breaker.allow(22))
+
+        breaker.record_success()
+        self.assertFalse(breaker.is_open())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+from selenium.webdriver.remote.webdriver import WebDriver
+from typing import Iterator
+from utils import Any, Optional
+import contextlib
+import json
+import os
+import threading
+import time
+
+
+class Span:
+    """
+    Object represents a single timed phase of parsing.
+    Time is measured in seconds from the start of the tracer.
+    """
+    __slots__ = ("name", "category", "start", "duration", "thread", "args")
+
+    name: str
+    category: str
+    start: float
+    duration: float
+    thread: int
+    args: dict[str, Any]
+
+    def __init__(self, name: str, category: str, start: float, duration: float, thread: int, args: dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.start = start
+        self.duration = duration
+        self.thread = thread
+        self.args = args
+
+    def __repr__(self):
+        return f"Span({self.category}:{self.name}, {self.duration * 1000:.2f}ms)"
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "category": self.category,
+            "start": self.start,
+            "duration": self.duration,
+            "thread": self.thread,
+            "args": self.args
+        }
+
+
+class Tracer:
+    """
+    Collects timed spans of parsing phases and counts web driver's commands by type.
+    Parser records spans only when its delegate has a tracer, so tracing costs nothing when it is disabled.
+
+    `APARTS_FINDER_TRACE` environment variable is a path of the file where the trace of the request is exported.
+    If the path ends with ".trace.json" it is exported as Chrome trace events,
+    which can be opened in chrome://tracing or Perfetto, otherwise as a plain json.
+    """
+    trace_variable = "APARTS_FINDER_TRACE"
+
+    path: Optional[str]
+    _origin: float
+    _spans: list[Span]
+    _commands: dict[str, list]
+    _drivers: list[WebDriver]
+    _is_closed: bool
+    _lock: threading.Lock
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self._origin = time.perf_counter()
+        self._spans = list()
+        self._commands = dict()
+        self._drivers = list()
+        self._is_closed = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls) -> Optional["Tracer"]:
+        """
+        Makes tracer if the trace's path is set by the environment variable.
+
+        :return: `Tracer` object or None if tracing is disabled.
+        """
+        path = os.environ.get(cls.trace_variable)
+        return cls(path) if path else None
+
+    @contextlib.contextmanager
+    def span(self, name: str, category: str = "phase", **args) -> Iterator[None]:
+        """
+        Measures time of the block of code.
+
+        :param name: name of the phase.
+        :param category: category of the phase, e.g. "phase", "apartment" or "webdriver".
+        :param args: additional info which is saved with the span.
+        """
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.add_span(name, category, start, time.perf_counter() - start, args)
+
+    def add_span(self, name: str, category: str, start: float, duration: float, args: Optional[dict[str, Any]] = None):
+        """
+        Saves the span which was measured outside of the tracer.
+
+        :param start: value of `time.perf_counter` when the span was started.
+        :param duration: duration in seconds.
+        """
+        span = Span(name, category, start - self._origin, duration, threading.get_native_id(), args or {})
+
+        with self._lock:
+            self._spans.append(span)
+
+    def count_command(self, command: str, duration: float):
+        """
+        Counts the web driver's command.
+
+        :param command: name of the command, e.g. "get" or "findElements".
+        :param duration: duration of the command's round trip in seconds.
+        """
+        with self._lock:
+            counter = self._commands.setdefault(command, [0, 0.0])
+            counter[0] += 1
+            counter[1] += duration
+
+    def instrument(self, web_driver: WebDriver) -> WebDriver:
+        """
+        Makes the web driver report every command to the tracer.
+        Web driver which was instrumented before is reported only to the latest tracer.
+        Closed tracer doesn't instrument web drivers, e.g. the ones of the background refresh of the request's result.
+
+        :param web_driver: web driver. Its `execute` method is wrapped.
+        :return: the same web driver.
+        """
+        execute = getattr(type(web_driver), "execute", None)
+
+        if execute is None:
+            return web_driver
+
+        def traced_execute(driver_command: str, params: Optional[dict] = None):
+            start = time.perf_counter()
+
+            try:
+                return execute(web_driver, driver_command, params)
+            finally:
+                duration = time.perf_counter() - start
+                self.count_command(driver_command, duration)
+                self.add_span(driver_command, "webdriver", start, duration)
+
+        with self._lock:
+            if self._is_closed:
+                return web_driver
+
+            web_driver.execute = traced_execute
+            self._drivers.append(web_driver)
+        return web_driver
+
+    def close(self):
+        """
+        Stops counting commands of the instrumented web drivers, which may outlive the tracer in the session pool.
+        """
+        with self._lock:
+            drivers, self._drivers = self._drivers, list()
+            self._is_closed = True
+
+        for web_driver in drivers:
+            web_driver.__dict__.pop("execute", None)
+
+    def get_spans(self) -> list[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def get_commands(self) -> dict[str, dict[str, float]]:
+        """
+        Gets web driver's commands grouped by type.
+
+        :return: dictionary where key is a command's name and value is its count and total duration in seconds.
+        """
+        with self._lock:
+            return {command: {"count": count, "total": total} for command, (count, total) in self._commands.items()}
+
+    def get_phases(self) -> dict[str, dict[str, float]]:
+        """
+        Gets spans grouped by name, web driver's commands are not included.
+
+        :return: dictionary where key is a span's name and value is its count and total duration in seconds.
+        """
+        phases = dict()
+
+        for span in self.get_spans():
+            if span.category == "webdriver":
+                continue
+
+            phase = phases.setdefault(span.name, {"count": 0, "total": 0.0})
+            phase["count"] += 1
+            phase["total"] += span.duration
+        return phases
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "phases": self.get_phases(),
+            "commands": self.get_commands(),
+            "spans": [span.as_dict() for span in self.get_spans()]
+        }
+
+    def as_chrome_trace(self) -> dict[str, Any]:
+        """
+        Converts spans into Chrome trace events, time is measured in microseconds.
+        """
+        pid = os.getpid()
+        events = [
+            {
+                "name": span.name,
+                "cat": span.category,
+                "ph": "X",
+                "ts": span.start * 1e6,
+                "dur": span.duration * 1e6,
+                "pid": pid,
+                "tid": span.thread,
+                "args": span.args
+            }
+            for span in self.get_spans()
+        ]
+        return {
+            "traceEvents": events,
+            "displayTimeUnit": "ms",
+            "otherData": {"commands": self.get_commands()}
+        }
+
+    def export(self, path: Optional[str] = None) -> str:
+        """
+        Writes the trace into the file.
+
+        :param path: path of the file, by default the path of the tracer is used.
+        If it ends with ".trace.json" the trace is written as Chrome trace events.
+        :return: path of the file.
+        """
+        path = path or self.path
+        data = self.as_chrome_trace() if path.endswith(".trace.json") else self.as_dict()
+
+        with open(path, "w") as file:
+            json.dump(data, file)
+        return path
@@ -1,5 +1,56 @@
 from typing import TypeVar, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import multiprocessing
+import os
+import re
+import sys
 
 
 Any = TypeVar("Any")
 Logger = TypeVar("Logger")
+Delegate = TypeVar("Delegate")
+
+_TOKEN = re.compile(r"\w+")
+
+
+def with_query(url: str, parameters: dict[str, Any]) -> str:
+    """
+    Adds parameters to the url's query, existing parameters with the same names are replaced.
+
+    :param url: url as a string.
+    :param parameters: dictionary where key is a parameter's name and value is its value.
+    :return: url with the parameters.
+    """
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+    query.update({name: str(value) for name, value in parameters.items()})
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """
+    Normalizes text for matching: lower case, "ё" is replaced with "е" and whitespaces are collapsed.
+
+    :param text: text or None.
+    :return: normalized text, empty if text is None.
+    """
+    if not text:
+        return ""
+    return " ".join(text.lower().replace("ё", "е").split())
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    return _TOKEN.findall(normalize_text(text))
+
+
+def get_process_context() -> multiprocessing.context.BaseContext:
+    """
+    Gets context of the worker processes.
+    When the interpreter is embedded, e.g. through PythonKit, `sys.executable` is not a python,
+    so the python of the current prefix is used to spawn workers.
+    """
+    context = multiprocessing.get_context("spawn")
+
+    if not os.path.basename(sys.executable).startswith("python"):
+        context.set_executable(os.path.join(sys.exec_prefix, "bin", "python3"))
+    return context
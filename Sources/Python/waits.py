@@ -0,0 +1,103 @@
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.wait import WebDriverWait
+from utils import Optional
+
+
+class Timeouts:
+    """
+    Timeouts in seconds of waiting for different conditions on the web site.
+    """
+    element: float
+    results: float
+    poll_frequency: float
+
+    def __init__(self, element: float = 10, results: float = 15, poll_frequency: float = 0.1):
+        self.element = element
+        self.results = results
+        self.poll_frequency = poll_frequency
+
+    def __repr__(self):
+        return f"Timeouts(element={self.element}, results={self.results}, poll_frequency={self.poll_frequency})"
+
+
+def probe(parent, by: str, value: str) -> Optional[WebElement]:
+    """
+    Finds an optional element without waiting for it.
+    Web driver's implicit wait have to be turned off, otherwise it is applied to the missing elements.
+
+    :param parent: web driver or web element where element should be found.
+    :param by: locator strategy, see `By`.
+    :param value: locator.
+    :return: first found element or None if there are no such elements.
+    """
+    elements = parent.find_elements(by, value)
+    return elements[0] if elements else None
+
+
+class Waiter:
+    """
+    Waits for explicit conditions on the web site instead of sleeping for a fixed time.
+    """
+    _driver: WebDriver
+    _timeouts: Timeouts
+
+    def __init__(self, driver: WebDriver, timeouts: Timeouts):
+        self._driver = driver
+        self._timeouts = timeouts
+
+    def element_present(self, by: str, value: str) -> WebElement:
+        """
+        Waits until element appears on the page.
+
+        :return: found element.
+        :raises TimeoutException: if element hasn't appeared in time.
+        """
+        condition = expected_conditions.presence_of_element_located((by, value))
+        return self._wait(self._timeouts.element).until(condition, f"Element {value} is not present")
+
+    def element_clickable(self, by: str, value: str) -> WebElement:
+        """
+        Waits until element is visible and enabled.
+
+        :return: found element.
+        :raises TimeoutException: if element hasn't become clickable in time.
+        """
+        condition = expected_conditions.element_to_be_clickable((by, value))
+        return self._wait(self._timeouts.element).until(condition, f"Element {value} is not clickable")
+
+    def elements_present(self, by: str, value: str) -> list[WebElement]:
+        """
+        Waits until at least one element appears on the page.
+
+        :return: list of found elements, empty if nothing has appeared in time.
+        """
+        condition = expected_conditions.presence_of_all_elements_located((by, value))
+
+        try:
+            return self._wait(self._timeouts.results).until(condition)
+        except TimeoutException:
+            return []
+
+    def results_refreshed(self, old_element: Optional[WebElement], by: str, value: str) -> bool:
+        """
+        Waits until old results are replaced by the new ones.
+        If there were no old results waits only for the new ones to appear.
+
+        :param old_element: any element of the old results or None.
+        :param by: locator strategy of the results.
+        :param value: locator of the results.
+        :return: True if new results have appeared, otherwise False.
+        """
+        if old_element is not None:
+            try:
+                self._wait(self._timeouts.results).until(expected_conditions.staleness_of(old_element))
+            except TimeoutException:
+                return False
+
+        return bool(self.elements_present(by, value))
+
+    def _wait(self, timeout: float) -> WebDriverWait:
+        return WebDriverWait(self._driver, timeout, self._timeouts.poll_frequency)
@@ -0,0 +1,439 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from archive import get_page_archive
+from cache import get_default_cache_path
+from http_parser import HttpSiteParser
+from listing_index import CrawlReport, IncrementalCrawler, ListingIndex
+from network import Backend, Job, JobDelegate, SiteParser, get_search_url_cache
+from session_pool import get_session_pool
+from typing import Callable
+from utils import Any, Optional
+import apartments as aparts
+import configurations as config
+import json
+import random
+import sys
+import threading
+import time
+
+
+class Watch:
+    """
+    Saved search which is repeated every `interval` seconds.
+    """
+    name: str
+    configuration: config.Configurations
+    site: aparts.ApartmentsSite
+    interval: float
+    backend: Backend
+
+    def __init__(self,
+                 name: str,
+                 configuration: config.Configurations,
+                 site: aparts.ApartmentsSite = aparts.ApartmentsSite.avito,
+                 interval: float = 15 * 60,
+                 backend: Backend = Backend.http):
+        self.name = name
+        self.configuration = configuration
+        self.site = site
+        self.interval = interval
+        self.backend = backend
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "Watch":
+        """
+        Makes watch from the dictionary with "name", "configuration" in the same format as `network.request` takes
+        and optional "site", "interval" in seconds and "backend".
+        """
+        return cls(data["name"],
+                   config.Configurations(data.get("configuration", {})),
+                   aparts.ApartmentsSite[data.get("site", aparts.ApartmentsSite.avito.name)],
+                   data.get("interval", 15 * 60),
+                   Backend(data.get("backend", Backend.http.value)))
+
+    def get_key(self) -> str:
+        """
+        Gets key of the search, watches with the same key are run as a single job.
+        """
+        return f"{self.site.name}:{self.backend.value}:{self.configuration.get_key()}"
+
+    def __repr__(self):
+        return f"Watch({self.name}, every {self.interval}s, {self.get_key()})"
+
+
+class WatchEvent:
+    """
+    Change of the watched search results or failure of the search.
+    Kind is one of "new", "changed", "removed" and "failed".
+    """
+    kind: str
+    watches: list[str]
+    url: Optional[str]
+    apartment: Optional[aparts.Apartment]
+    error: Optional[Exception]
+
+    def __init__(self,
+                 kind: str,
+                 watches: list[str],
+                 url: Optional[str] = None,
+                 apartment: Optional[aparts.Apartment] = None,
+                 error: Optional[Exception] = None):
+        self.kind = kind
+        self.watches = watches
+        self.url = url
+        self.apartment = apartment
+        self.error = error
+
+    def __repr__(self):
+        return f"WatchEvent({self.kind}, {self.watches}, {self.url or self.error})"
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "watches": self.watches,
+            "url": self.url,
+            "apartment": self.apartment.as_dict() if self.apartment else None,
+            "error": str(self.error) if self.error else None
+        }
+
+
+class CircuitBreaker:
+    """
+    Stops requests to the site after `threshold` consecutive failures.
+    After `reset_timeout` seconds a single trial request is allowed, its success closes the breaker.
+    """
+    _threshold: int
+    _reset_timeout: float
+    _failures: int
+    _opened_at: Optional[float]
+    _is_trying: bool
+
+    def __init__(self, threshold: int = 3, reset_timeout: float = 10 * 60):
+        self._threshold = threshold
+        self._reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._is_trying = False
+
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self, now: float) -> bool:
+        """
+        Checks whether request to the site can be made now.
+        """
+        if self._opened_at is None:
+            return True
+
+        if now - self._opened_at >= self._reset_timeout and not self._is_trying:
+            self._is_trying = True
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+        self._is_trying = False
+
+    def record_failure(self, now: float):
+        self._failures += 1
+
+        if self._is_trying or self._failures >= self._threshold:
+            self._opened_at = now
+        self._is_trying = False
+
+
+class _Entry:
+    """
+    Scheduled job of the watches which share the same search.
+    """
+    key: str
+    watches: list[Watch]
+    next_run: float
+    failures: int
+    is_running: bool
+
+    def __init__(self, key: str, next_run: float):
+        self.key = key
+        self.watches = list()
+        self.next_run = next_run
+        self.failures = 0
+        self.is_running = False
+
+    def get_interval(self) -> float:
+        return min((watch.interval for watch in self.watches), default=0)
+
+    def get_names(self) -> list[str]:
+        return [watch.name for watch in self.watches]
+
+
+def crawl_job(job: Job, index_path: str) -> CrawlReport:
+    """
+    Crawls search results of the job incrementally and reports changes since the previous crawl of the same search.
+    Browser backend uses a warm session of the shared pool.
+
+    :param job: job to run.
+    :param index_path: path of the listing index's file.
+    :return: `CrawlReport` object.
+    """
+    delegate = JobDelegate()
+    index = ListingIndex(index_path)
+    scope = f"{job.site.name}:{job.configuration.get_key()}"
+
+    try:
+        match job.backend:
+            case Backend.browser:
+                with get_session_pool(job.site).session() as session:
+                    parser = SiteParser(job.configuration, job.site, delegate=delegate, session=session,
+                                        url_cache=get_search_url_cache(), archive=get_page_archive())
+
+                    if not parser.set_config():
+                        session.invalidate()
+                        raise delegate.errors[-1] if delegate.errors else RuntimeError(f"{job} wasn't configured")
+
+                    report = IncrementalCrawler(parser, index, scope).crawl()
+
+            case Backend.http:
+                parser = HttpSiteParser(job.configuration, job.site, delegate=delegate, base_url=job.base_url,
+                                        archive=get_page_archive())
+
+                if not parser.set_config():
+                    raise delegate.errors[-1] if delegate.errors else RuntimeError(f"{job} wasn't configured")
+
+                report = IncrementalCrawler(parser, index, scope).crawl()
+    finally:
+        index.close()
+
+    if delegate.errors and not (report.new or report.changed or report.known_count):
+        raise delegate.errors[-1]
+
+    return report
+
+
+class Scheduler:
+    """
+    Repeats saved searches on their own intervals and sends changes of their results to the sink.
+
+    Watches of the same search are coalesced into a single job, which is repeated on the shortest of their intervals.
+    Every interval is randomly stretched or shrunk by `jitter`, so jobs don't run in lockstep.
+    Failed job is retried with exponentially growing delay up to `max_backoff` seconds,
+    and a site is not requested at all while its circuit breaker is open.
+    At most `max_concurrent` jobs are run at the same time.
+    """
+    _sink: Callable[[WatchEvent], Any]
+    _runner: Callable[[Job], CrawlReport]
+    _jitter: float
+    _max_backoff: float
+    _breaker_threshold: int
+    _breaker_timeout: float
+    _clock: Callable[[], float]
+    _random: random.Random
+    _entries: dict[str, _Entry]
+    _breakers: dict[aparts.ApartmentsSite, CircuitBreaker]
+    _running: int
+    _executor: ThreadPoolExecutor
+    _lock: threading.Condition
+    _wake_up: threading.Event
+
+    def __init__(self,
+                 sink: Callable[[WatchEvent], Any],
+                 runner: Optional[Callable[[Job], CrawlReport]] = None,
+                 max_concurrent: int = 2,
+                 jitter: float = 0.1,
+                 max_backoff: float = 60 * 60,
+                 breaker_threshold: int = 3,
+                 breaker_timeout: float = 10 * 60,
+                 clock: Callable[[], float] = time.monotonic,
+                 seed: Optional[int] = None):
+        """
+        :param sink: function which is called with every event, it is called from the worker threads.
+        :param runner: function which crawls the job, by default it is `crawl_job` with the shared listing index.
+        :param max_concurrent: maximum amount of jobs which are run at the same time.
+        :param jitter: fraction of the interval by which it is randomly changed.
+        :param max_backoff: maximum delay before retrying the failed job in seconds.
+        :param breaker_threshold: amount of consecutive failures of the site which opens its circuit breaker.
+        :param breaker_timeout: time in seconds after which the open breaker allows a trial request.
+        :param clock: monotonic clock in seconds.
+        :param seed: seed of the jitter's random numbers.
+        """
+        index_path = get_default_cache_path("watch_index.sqlite3") if runner is None else None
+        self._sink = sink
+        self._runner = runner or (lambda job: crawl_job(job, index_path))
+        self._jitter = jitter
+        self._max_backoff = max_backoff
+        self._breaker_threshold = breaker_threshold
+        self._breaker_timeout = breaker_timeout
+        self._clock = clock
+        self._random = random.Random(seed)
+        self._entries = dict()
+        self._breakers = dict()
+        self._running = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix="watch")
+        self._lock = threading.Condition()
+        self._wake_up = threading.Event()
+
+    def add(self, watch: Watch):
+        """
+        Adds watch. Its first run is spread over the first tenth of its interval.
+        """
+        with self._lock:
+            entry = self._entries.get(watch.get_key())
+
+            if entry is None:
+                entry = _Entry(watch.get_key(), self._clock() + self._random.uniform(0, watch.interval * 0.1))
+                self._entries[entry.key] = entry
+
+            entry.watches.append(watch)
+
+        self._wake_up.set()
+
+    def remove(self, name: str):
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                entry.watches = [watch for watch in entry.watches if watch.name != name]
+
+                if not entry.watches:
+                    del self._entries[key]
+
+    def get_watches(self) -> list[Watch]:
+        with self._lock:
+            return [watch for entry in self._entries.values() for watch in entry.watches]
+
+    def get_next_run(self) -> Optional[float]:
+        """
+        Gets time of the closest scheduled job by the scheduler's clock, running jobs are not counted.
+        """
+        with self._lock:
+            return min((entry.next_run for entry in self._entries.values() if not entry.is_running), default=None)
+
+    def run_pending(self) -> int:
+        """
+        Starts all jobs which are due. Jobs of the sites with open circuit breakers are postponed.
+
+        :return: amount of started jobs.
+        """
+        now = self._clock()
+        started = list()
+
+        with self._lock:
+            for entry in sorted(self._entries.values(), key=lambda entry: entry.next_run):
+                if entry.is_running or entry.next_run > now:
+                    continue
+
+                watch = entry.watches[0]
+                breaker = self._breakers.setdefault(
+                    watch.site, CircuitBreaker(self._breaker_threshold, self._breaker_timeout)
+                )
+
+                if not breaker.allow(now):
+                    entry.next_run = now + self._with_jitter(min(entry.get_interval(), self._breaker_timeout))
+                    continue
+
+                entry.is_running = True
+                self._running += 1
+                started.append((entry, Job(watch.configuration, watch.site, watch.backend)))
+
+        for entry, job in started:
+            future = self._executor.submit(self._runner, job)
+            future.add_done_callback(lambda future, entry=entry, job=job: self._finish(entry, job, future))
+
+        return len(started)
+
+    def run_forever(self, stop: threading.Event, max_wait: float = 60):
+        """
+        Runs jobs until the stop event is set. Scheduler's clock have to be `time.monotonic`.
+
+        :param stop: event which stops the scheduler.
+        :param max_wait: maximum time between checks of the schedule in seconds.
+        """
+        while not stop.is_set():
+            self.run_pending()
+            next_run = self.get_next_run()
+            timeout = max_wait if next_run is None else min(max_wait, max(0.0, next_run - self._clock()))
+            self._wake_up.clear()
+            self._wake_up.wait(timeout)
+
+            if stop.is_set():
+                break
+
+    def wait(self):
+        """
+        Waits until all running jobs are finished and their events are sent.
+        """
+        with self._lock:
+            self._lock.wait_for(lambda: self._running == 0)
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown()
+
+    def _finish(self, entry: _Entry, job: Job, future: Future):
+        """
+        Reschedules the job and sends its events.
+        """
+        try:
+            self._reschedule(entry, job, future)
+            self._send_events(entry.get_names(), future)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._lock.notify_all()
+
+    def _reschedule(self, entry: _Entry, job: Job, future: Future):
+        now = self._clock()
+        error = future.exception()
+
+        with self._lock:
+            breaker = self._breakers[job.site]
+            entry.is_running = False
+
+            if error is None:
+                entry.failures = 0
+                breaker.record_success()
+                entry.next_run = now + self._with_jitter(entry.get_interval())
+            else:
+                entry.failures += 1
+                breaker.record_failure(now)
+                backoff = min(entry.get_interval() * 2 ** (entry.failures - 1), self._max_backoff)
+                entry.next_run = now + self._with_jitter(backoff)
+
+        self._wake_up.set()
+
+    def _send_events(self, names: list[str], future: Future):
+        error = future.exception()
+
+        if error is not None:
+            self._sink(WatchEvent("failed", names, error=error))
+            return
+
+        report = future.result()
+
+        for apartment in report.new:
+            self._sink(WatchEvent("new", names, apartment.url, apartment))
+
+        for apartment in report.changed:
+            self._sink(WatchEvent("changed", names, apartment.url, apartment))
+
+        for url in report.removed:
+            self._sink(WatchEvent("removed", names, url))
+
+    def _with_jitter(self, interval: float) -> float:
+        return interval * self._random.uniform(1 - self._jitter, 1 + self._jitter)
+
+
+def _print_event(event: WatchEvent):
+    print(json.dumps(event.as_dict(), ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1]) as file:
+        watches = [Watch.from_dict(data) for data in json.load(file)]
+
+    scheduler = Scheduler(_print_event)
+
+    for saved_watch in watches:
+        scheduler.add(saved_watch)
+
+    try:
+        scheduler.run_forever(threading.Event())
+    except KeyboardInterrupt:
+        scheduler.close()